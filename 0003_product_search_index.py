@@ -0,0 +1,48 @@
+from django.db import OperationalError, migrations
+
+# Copied from store.search as of this migration, so later changes there
+# don't alter what replaying it creates
+SEARCH_TABLE = 'store_product_fts'
+RANK_FUNCTION = 'bm25(10.0, 1.0)'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+                f"USING fts5(name, description, tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', %s)",
+                [RANK_FUNCTION]
+            )
+        except OperationalError:
+            # SQLite built without FTS5, search falls back to icontains
+            return
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) "
+            f"SELECT id, name, description FROM store_product"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0002_product_image_url_alter_product_image"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
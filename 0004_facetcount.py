@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, Count, IntegerField, Value, When
+
+# Upper bounds of store.facets.PRICE_BUCKETS as of this migration; the
+# last bucket is open-ended
+BUCKET_HIGHS = [
+    Decimal("24.99"),
+    Decimal("49.99"),
+    Decimal("99.99"),
+    Decimal("249.99"),
+    Decimal("499.99"),
+    Decimal("999.99"),
+]
+
+
+def bucket_expression():
+    whens = [When(price__lte=high, then=Value(index)) for index, high in enumerate(BUCKET_HIGHS)]
+    return Case(*whens, default=Value(len(BUCKET_HIGHS)), output_field=IntegerField())
+
+
+def populate_facet_counts(apps, schema_editor):
+    Product = apps.get_model("store", "Product")
+    FacetCount = apps.get_model("store", "FacetCount")
+    rows = (
+        Product.objects.order_by()
+        .annotate(bucket=bucket_expression())
+        .values("category_id", "bucket")
+        .annotate(total=Count("id"))
+    )
+    FacetCount.objects.bulk_create(
+        [
+            FacetCount(
+                category_id=row["category_id"],
+                price_bucket=row["bucket"],
+                count=row["total"],
+            )
+            for row in rows
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0003_product_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FacetCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("price_bucket", models.PositiveSmallIntegerField()),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="store.category"
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("category", "price_bucket")},
+            },
+        ),
+        migrations.RunPython(populate_facet_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+# store.orders.SUMMARY_ITEMS as of this migration
+SUMMARY_ITEMS = 3
+
+
+def summarize_orders(apps, schema_editor):
+    Order = apps.get_model("store", "Order")
+    # Historical models have no get_thumbnail_url; use the original image
+    batch = []
+    orders = Order.objects.prefetch_related("items__product").order_by("id")
+    for order in orders.iterator(chunk_size=500):
+        items = list(order.items.all())
+        order.item_count = sum(item.quantity for item in items)
+        order.item_summary = [
+            {
+                "name": item.product.name,
+                "thumbnail": (
+                    item.product.image.url
+                    if item.product.image
+                    else item.product.image_url or ""
+                ),
+                "quantity": item.quantity,
+                "price": str(item.price),
+                "total": str(item.price * item.quantity),
+            }
+            for item in items[:SUMMARY_ITEMS]
+        ]
+        batch.append(order)
+        if len(batch) >= 500:
+            Order.objects.bulk_update(batch, ["item_count", "item_summary"])
+            batch = []
+    Order.objects.bulk_update(batch, ["item_count", "item_summary"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0006_product_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="item_summary",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(summarize_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+// Animate stats counter
+function animateStats() {
+    const statNumbers = document.querySelectorAll('.stat-number');
+
+    statNumbers.forEach(stat => {
+        const target = parseInt(stat.textContent);
+        const increment = target / 100;
+        let current = 0;
+
+        const timer = setInterval(() => {
+            current += increment;
+            if (current >= target) {
+                current = target;
+                clearInterval(timer);
+            }
+            stat.textContent = Math.floor(current).toLocaleString() +
+                (stat.textContent.includes('+') ? '+' : '') +
+                (stat.textContent.includes('%') ? '%' : '');
+        }, 20);
+    });
+}
+
+// Initialize animations on scroll
+document.addEventListener('DOMContentLoaded', function() {
+    // Intersection Observer for animations
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                if (entry.target.classList.contains('stats-grid')) {
+                    animateStats();
+                }
+                entry.target.classList.add('animate');
+            }
+        });
+    }, { threshold: 0.1 });
+
+    // Observe elements
+    document.querySelectorAll('.value-card, .team-card, .stat-card, .timeline-item').forEach(el => {
+        observer.observe(el);
+    });
+
+    // Add hover effects
+    const cards = document.querySelectorAll('.value-card, .team-card');
+    cards.forEach(card => {
+        card.addEventListener('mouseenter', () => {
+            card.style.transform = 'translateY(-10px)';
+        });
+
+        card.addEventListener('mouseleave', () => {
+            card.style.transform = 'translateY(0)';
+        });
+    });
+});
@@ -0,0 +1,131 @@
+"""
+Async versions of the read-only storefront views.
+
+Enabled with ASYNC_STOREFRONT = True when serving through asgi.py. They use
+the async ORM and cache APIs, so a request waiting on the database doesn't
+hold a thread-pool slot. Everything a template touches is loaded before
+render() runs, because template rendering itself is synchronous; home is
+the exception, rendering in a thread so its cached category nav needs no
+query.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from . import catalog_snapshot, conditional, facets, guest_cart, product_cache, related, search
+from .models import Category, Product
+from .pagination import KeysetPaginator
+from .views import PRODUCT_SORTS, product_list_context, product_listing, quick_view_data, ranked_page
+
+
+async def _prepare(request):
+    """Resolve the user and cart summary the context processors would load"""
+    request.user = await request.auser()
+    request.cart_summary = await guest_cart.arequest_summary(request)
+
+
+@sync_to_async
+def _load_images(products):
+    """Resolve image renditions off the event loop; they may read manifests from storage"""
+    for product in products:
+        product.get_image_variants()
+
+
+def _ranked_page(products, per_page, count, number):
+    page = ranked_page(products, per_page, count, number)
+    page.object_list = list(page.object_list)
+    return page
+
+
+async def home(request):
+    """Home page view"""
+    await _prepare(request)
+    featured_products = [product async for product in Product.objects.all()[:8]]
+    await _load_images(featured_products)
+
+    context = {
+        'featured_products': featured_products,
+        # Only read when the category nav fragment isn't cached, so it
+        # stays lazy and the page renders in a thread
+        'categories': Category.objects.all()[:6],
+        'catalog_version': await product_cache.aget_catalog_version(),
+    }
+    return await sync_to_async(render)(request, 'store/home.html', context)
+
+
+async def product_list(request):
+    """Product listing page with search and filtering"""
+    await _prepare(request)
+    etag, last_modified = conditional.listing_validators(
+        request, request.cart_summary,
+        await product_cache.aget_catalog_version(), await product_cache.aget_catalog_modified()
+    )
+    not_modified = conditional.not_modified(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    # Warm the one-off FTS availability check before building the query
+    await sync_to_async(search.index_available)()
+    listing = product_listing(request.GET)
+    products = listing['products']
+    per_page = getattr(settings, 'PRODUCTS_PER_PAGE', 24)
+
+    snapshot = None if listing['search_query'] else await sync_to_async(catalog_snapshot.get_snapshot)()
+    if snapshot is not None:
+        sidebar = snapshot.facets(listing['category_id'], listing['min_price'], listing['max_price'])
+        field, descending = PRODUCT_SORTS.get(listing['sort_by'], ('id', False))
+        page, total_count = await sync_to_async(snapshot.page)(
+            listing, field, descending, per_page, request.GET.get('cursor')
+        )
+        await _load_images(page.object_list)
+        context = product_list_context(listing, sidebar, page, total_count)
+        return conditional.set_validators(render(request, 'store/product_list.html', context), etag, last_modified)
+
+    sidebar = await sync_to_async(facets.get_facets)(
+        listing['category_id'], listing['min_price'], listing['max_price'],
+        searched=listing['searched']
+    )
+
+    total_count = sidebar['matching']
+    if listing['ranked']:
+        page = await sync_to_async(_ranked_page)(products, per_page, total_count, request.GET.get('page'))
+    else:
+        field, descending = PRODUCT_SORTS.get(listing['sort_by'], ('id', False))
+        paginator = KeysetPaginator(products, field, descending, per_page)
+        page = await paginator.aget_page(request.GET.get('cursor'))
+
+    await _load_images(page.object_list)
+    context = product_list_context(listing, sidebar, page, total_count)
+    return conditional.set_validators(render(request, 'store/product_list.html', context), etag, last_modified)
+
+
+async def product_detail(request, product_id):
+    """Product detail page view"""
+    await _prepare(request)
+    product = await product_cache.aget_product_or_404(product_id)
+    etag, last_modified = conditional.product_validators(
+        request, request.cart_summary, await product_cache.aget_catalog_version(), product
+    )
+    not_modified = conditional.not_modified(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    related_products = await related.arelated_products(product)
+    await _load_images([product, *related_products])
+
+    context = {
+        'product': product,
+        'related_products': related_products,
+    }
+    return conditional.set_validators(render(request, 'store/product_detail.html', context), etag, last_modified)
+
+
+async def product_quick_view_api(request, product_id):
+    """API endpoint for quick view modal"""
+    product = await product_cache.aget_product_or_404(product_id)
+    etag, last_modified = conditional.quick_view_validators(await product_cache.aget_catalog_version(), product)
+    not_modified = conditional.not_modified(request, etag, last_modified, private=False)
+    if not_modified:
+        return not_modified
+    return conditional.set_validators(JsonResponse(quick_view_data(product)), etag, last_modified, private=False)
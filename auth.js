@@ -0,0 +1,134 @@
+// Toggle password visibility
+function togglePassword() {
+    const passwordInput = document.getElementById('password');
+    const toggleBtn = event.currentTarget;
+    const icon = toggleBtn.querySelector('i');
+
+    if (passwordInput.type === 'password') {
+        passwordInput.type = 'text';
+        icon.classList.remove('fa-eye');
+        icon.classList.add('fa-eye-slash');
+    } else {
+        passwordInput.type = 'password';
+        icon.classList.remove('fa-eye-slash');
+        icon.classList.add('fa-eye');
+    }
+}
+
+// Form validation
+document.getElementById('loginForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+
+    const username = document.getElementById('username').value.trim();
+    const password = document.getElementById('password').value.trim();
+    let isValid = true;
+
+    // Reset errors
+    document.querySelectorAll('.error-message').forEach(el => {
+        el.style.display = 'none';
+    });
+    document.querySelectorAll('.form-control').forEach(el => {
+        el.classList.remove('error');
+    });
+
+    // Validate username/email
+    if (!username) {
+        showError('username', 'Username or email is required');
+        isValid = false;
+    } else if (!isValidEmail(username) && username.length < 3) {
+        showError('username', 'Please enter a valid email or username');
+        isValid = false;
+    }
+
+    // Validate password
+    if (!password) {
+        showError('password', 'Password is required');
+        isValid = false;
+    } else if (password.length < 6) {
+        showError('password', 'Password must be at least 6 characters');
+        isValid = false;
+    }
+
+    if (isValid) {
+        // Show loading state
+        const submitBtn = this.querySelector('button[type="submit"]');
+        const originalText = submitBtn.innerHTML;
+        submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Signing in...';
+        submitBtn.disabled = true;
+
+        // Submit form after delay (simulating API call)
+        setTimeout(() => {
+            this.submit();
+        }, 1000);
+    } else {
+        // Shake form on error
+        this.classList.add('shake');
+        setTimeout(() => {
+            this.classList.remove('shake');
+        }, 500);
+    }
+});
+
+function showError(fieldId, message) {
+    const input = document.getElementById(fieldId);
+    const errorEl = document.getElementById(`${fieldId}-error`);
+
+    input.classList.add('error');
+    errorEl.textContent = message;
+    errorEl.style.display = 'block';
+}
+
+function isValidEmail(email) {
+    const re = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+    return re.test(email);
+}
+
+// Social login
+function socialLogin(provider) {
+    const btn = event.currentTarget;
+    const originalText = btn.innerHTML;
+
+    btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Connecting...';
+    btn.disabled = true;
+
+    // Simulate social login
+    setTimeout(() => {
+        alert(`In a real application, this would redirect to ${provider} authentication.`);
+        btn.innerHTML = originalText;
+        btn.disabled = false;
+    }, 1500);
+}
+
+// Forgot password
+document.querySelector('.forgot-password').addEventListener('click', function(e) {
+    e.preventDefault();
+
+    const email = prompt('Please enter your email address to reset your password:');
+    if (email && isValidEmail(email)) {
+        alert(`Password reset link has been sent to ${email}`);
+    } else if (email) {
+        alert('Please enter a valid email address.');
+    }
+});
+
+// Remember me functionality
+document.addEventListener('DOMContentLoaded', function() {
+    const rememberCheckbox = document.getElementById('remember');
+    const usernameInput = document.getElementById('username');
+
+    // Load saved credentials if remember me was checked
+    const savedUsername = localStorage.getItem('rememberedUsername');
+    if (savedUsername) {
+        usernameInput.value = savedUsername;
+        rememberCheckbox.checked = true;
+    }
+
+    // Save credentials on form submit if remember me is checked
+    document.getElementById('loginForm').addEventListener('submit', function() {
+        if (rememberCheckbox.checked) {
+            localStorage.setItem('rememberedUsername', usernameInput.value);
+        } else {
+            localStorage.removeItem('rememberedUsername');
+        }
+    });
+});
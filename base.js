@@ -0,0 +1,77 @@
+// Mobile menu toggle
+const mobileMenuBtn = document.getElementById('mobileMenuBtn');
+const navLinks = document.getElementById('navLinks');
+
+mobileMenuBtn.addEventListener('click', () => {
+    navLinks.classList.toggle('active');
+    mobileMenuBtn.innerHTML = navLinks.classList.contains('active')
+        ? '<i class="fas fa-times"></i>'
+        : '<i class="fas fa-bars"></i>';
+});
+
+// Close menu when clicking outside
+document.addEventListener('click', (e) => {
+    if (!e.target.closest('nav') && !e.target.closest('.mobile-menu-btn')) {
+        navLinks.classList.remove('active');
+        mobileMenuBtn.innerHTML = '<i class="fas fa-bars"></i>';
+    }
+});
+
+// Animation on scroll
+const observerOptions = {
+    threshold: 0.1,
+    rootMargin: '0px 0px -50px 0px'
+};
+
+const observer = new IntersectionObserver((entries) => {
+    entries.forEach(entry => {
+        if (entry.isIntersecting) {
+            entry.target.classList.add('animate');
+        }
+    });
+}, observerOptions);
+
+// Observe elements with animation class
+document.querySelectorAll('.animate-on-scroll').forEach(el => {
+    observer.observe(el);
+});
+
+// Cart count update
+function updateCartCount(count) {
+    const cartCount = document.querySelector('.cart-count');
+    if (cartCount) {
+        cartCount.textContent = count;
+        if (count > 0) {
+            cartCount.style.animation = 'none';
+            setTimeout(() => {
+                cartCount.style.animation = 'bounce 0.5s';
+            }, 10);
+        }
+    }
+}
+
+// Add to cart animation
+function addToCartAnimation(productId) {
+    const button = document.querySelector(`[data-product-id="${productId}"]`);
+    if (button) {
+        button.innerHTML = '<i class="fas fa-check"></i> Added!';
+        button.style.background = 'var(--success)';
+        setTimeout(() => {
+            button.innerHTML = '<i class="fas fa-cart-plus"></i> Add to Cart';
+            button.style.background = '';
+        }, 2000);
+    }
+}
+
+// Initialize animations
+document.addEventListener('DOMContentLoaded', () => {
+    // Add CSS for bounce animation
+    const style = document.createElement('style');
+    style.textContent = `
+        @keyframes bounce {
+            0%, 100% { transform: scale(1); }
+            50% { transform: scale(1.2); }
+        }
+    `;
+    document.head.appendChild(style);
+});
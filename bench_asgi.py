@@ -0,0 +1,142 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from store.models import Product
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = 'Compare the sync and async storefront views under uvicorn (requests/sec and tail latency)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Measured requests per mode')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent client connections')
+        parser.add_argument('--warmup', type=int, default=100, help='Unmeasured requests sent first')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--workers', type=int, default=1, help='uvicorn worker processes')
+        parser.add_argument('--path', action='append', dest='paths', help='URL path to request (repeatable)')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise CommandError('uvicorn is required: pip install uvicorn')
+
+        paths = options['paths']
+        if not paths:
+            product_id = Product.objects.values_list('id', flat=True).first()
+            if product_id is None:
+                raise CommandError('No products found, seed the catalog first (manage.py seed_products).')
+            paths = [
+                '/',
+                '/products/',
+                f'/product/{product_id}/',
+                f'/api/product/{product_id}/quick-view/',
+            ]
+
+        results = {}
+        for mode in ('sync', 'async'):
+            self.stdout.write(f'Benchmarking {mode} views...')
+            with self.server(mode, options):
+                base = f"http://127.0.0.1:{options['port']}"
+                self.load(base, paths, options['warmup'], options['concurrency'])
+                results[mode] = self.load(base, paths, options['requests'], options['concurrency'])
+
+        self.stdout.write(f"{'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+        for mode, stats in results.items():
+            self.stdout.write(
+                f"{mode:<6} {stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+                f"{stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f} {stats['errors']:>7}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'paths': paths, 'options': {
+                    key: options[key] for key in ('requests', 'concurrency', 'workers')
+                }, 'results': results}, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def server(self, mode, options):
+        command = self
+
+        class Server:
+            def __enter__(self):
+                app = getattr(settings, 'ASGI_APPLICATION', None) or settings.WSGI_APPLICATION.replace('.wsgi.', '.asgi.')
+                module, attr = app.rsplit('.', 1)
+                env = dict(os.environ, SHOPEASY_ASYNC_STOREFRONT='1' if mode == 'async' else '0')
+                self.process = subprocess.Popen(
+                    [sys.executable, '-m', 'uvicorn', f'{module}:{attr}',
+                     '--port', str(options['port']), '--workers', str(options['workers']),
+                     '--log-level', 'warning', '--no-access-log'],
+                    env=env,
+                )
+                command.wait_for_port(options['port'], self.process)
+                return self
+
+            def __exit__(self, *exc):
+                self.process.terminate()
+                try:
+                    self.process.wait(10)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+
+        return Server()
+
+    def wait_for_port(self, port, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError('uvicorn exited before accepting connections')
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'uvicorn did not start listening on port {port}')
+
+    def load(self, base, paths, total, concurrency):
+        def fetch(i):
+            url = base + paths[i % len(paths)]
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    response.read()
+                    ok = response.status < 500
+            except urllib.error.HTTPError as e:
+                ok = e.code < 500
+            except OSError:
+                ok = False
+            return time.perf_counter() - started, ok
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(fetch, range(total)))
+        elapsed = time.perf_counter() - began
+
+        latencies = sorted(latency * 1000 for latency, ok in samples)
+        return {
+            'requests': total,
+            'errors': sum(1 for latency, ok in samples if not ok),
+            'seconds': round(elapsed, 3),
+            'rps': total / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'max_ms': latencies[-1] if latencies else 0.0,
+        }
@@ -0,0 +1,86 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from store.models import Category, OrderItem, Product
+from store.orders import OutOfStockError, place_order
+
+
+class Command(BaseCommand):
+    help = 'Race concurrent checkouts for one product and verify stock is never oversold'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=50, help='Starting stock of the contested product')
+        parser.add_argument('--buyers', type=int, default=200, help='Number of concurrent checkouts')
+        parser.add_argument('--quantity', type=int, default=1, help='Units per checkout')
+        parser.add_argument('--workers', type=int, default=16, help='Parallel worker threads')
+
+    def handle(self, *args, **options):
+        stock = options['stock']
+        quantity = options['quantity']
+        run_id = uuid.uuid4().hex[:8]
+
+        category, _ = Category.objects.get_or_create(name='Benchmark')
+        product = Product.objects.create(
+            category=category,
+            name=f'Checkout benchmark item {run_id}',
+            description='Contested product for the checkout benchmark',
+            price=10,
+            stock=stock
+        )
+        users = User.objects.bulk_create([
+            User(username=f'bench-{run_id}-{i}', password='!')
+            for i in range(options['buyers'])
+        ])
+        users = list(User.objects.filter(username__startswith=f'bench-{run_id}-'))
+
+        start = threading.Event()
+        results = {'ok': 0, 'sold_out': 0, 'busy': 0}
+        lock = threading.Lock()
+
+        def buy(user):
+            start.wait()
+            try:
+                place_order(user, [(product, quantity)], product.price * quantity, 'Benchmark')
+                outcome = 'ok'
+            except OutOfStockError:
+                outcome = 'sold_out'
+            except OperationalError:
+                # Database too busy to take the write lock in time
+                outcome = 'busy'
+            finally:
+                connection.close()
+            with lock:
+                results[outcome] += 1
+
+        try:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                futures = [pool.submit(buy, user) for user in users]
+                began = time.perf_counter()
+                start.set()
+                for future in futures:
+                    future.result()
+                elapsed = time.perf_counter() - began
+
+            product.refresh_from_db()
+            sold = OrderItem.objects.filter(product=product).aggregate(total=Sum('quantity'))['total'] or 0
+        finally:
+            User.objects.filter(username__startswith=f'bench-{run_id}-').delete()
+            Product.objects.filter(pk=product.pk).delete()
+
+        self.stdout.write(f"{len(users)} checkouts in {elapsed:.2f}s ({len(users) / elapsed:.0f}/s)")
+        self.stdout.write(
+            f"placed={results['ok']} sold_out={results['sold_out']} busy={results['busy']} "
+            f"units_sold={sold} stock_left={product.stock}"
+        )
+
+        if sold > stock or product.stock < 0 or product.stock != stock - sold:
+            raise CommandError(f'Oversold: started with {stock}, sold {sold}, {product.stock} left')
+        if results['ok'] * quantity != sold:
+            raise CommandError(f"{results['ok']} orders placed but {sold} units recorded")
+        self.stdout.write(self.style.SUCCESS('No oversell.'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from store import images
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP thumbnails for every product image, fetching image_url sources; pages show originals until this runs'
+
+    def handle(self, *args, **kwargs):
+        built = failed = 0
+        for product in Product.objects.iterator():
+            if not images.image_source(product):
+                continue
+            if images.build_variants(product):
+                built += 1
+            else:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'Could not build thumbnails for product {product.id} ({product.name})'))
+
+        self.stdout.write(self.style.SUCCESS(f'Thumbnails ready for {built} products, {failed} failed.'))
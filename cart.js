@@ -0,0 +1,122 @@
+// Set on the <script> tag by cart.html
+const cartScript = document.currentScript.dataset;
+const homeUrl = cartScript.homeUrl;
+
+// The cart API answers with the changed line and the recomputed totals
+async function postCart(url, data = {}) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: {'X-CSRFToken': cartScript.csrfToken},
+        body: new URLSearchParams(data),
+    });
+    if (!response.ok && response.status !== 409) {
+        // Gone from another tab, or logged out: show the real cart
+        window.location.reload();
+        return null;
+    }
+    return response.json();
+}
+
+function itemUrl(template, itemId) {
+    return template.replace('/0/', `/${itemId}/`);
+}
+
+async function updateQuantity(itemId, change) {
+    const quantityInput = document.getElementById(`quantity-${itemId}`);
+    let quantity = parseInt(quantityInput.value) + change;
+
+    // Ensure quantity is within bounds
+    const maxQuantity = parseInt(quantityInput.max);
+    if (quantity < 1) quantity = 1;
+    if (quantity > maxQuantity) quantity = maxQuantity;
+    quantityInput.value = quantity;
+
+    const result = await postCart(itemUrl(cartScript.updateUrl, itemId), {quantity});
+    if (!result) return;
+    if (result.error) alert(result.error);
+    if (result.item) {
+        quantityInput.value = result.item.quantity;
+        document.getElementById(`price-${itemId}`).textContent = result.item.line_total;
+    }
+    showTotals(result.cart);
+}
+
+async function removeItem(itemId) {
+    const cartItem = document.getElementById(`cart-item-${itemId}`);
+    cartItem.style.opacity = '0.5';
+    cartItem.style.transform = 'translateX(-100px)';
+
+    const result = await postCart(itemUrl(cartScript.removeUrl, itemId));
+    if (!result) return;
+    cartItem.remove();
+    showTotals(result.cart);
+
+    // Show empty cart message if no items left
+    if (result.cart.count === 0) {
+        window.location.reload();
+    }
+}
+
+async function clearCart() {
+    if (confirm('Are you sure you want to clear your cart?')) {
+        const cartItems = document.querySelectorAll('.cart-item');
+        cartItems.forEach(item => {
+            item.style.opacity = '0';
+            item.style.transform = 'translateX(-100px)';
+        });
+
+        if (await postCart(cartScript.clearUrl)) {
+            window.location.href = homeUrl;
+        }
+    }
+}
+
+function showTotals(cart) {
+    document.getElementById('subtotal').textContent = cart.subtotal;
+
+    const shippingElement = document.getElementById('shipping-cost');
+    shippingElement.innerHTML = parseFloat(cart.shipping) === 0 ?
+        '<span style="color: var(--success);">FREE</span>' :
+        `$${cart.shipping}`;
+
+    document.getElementById('tax').textContent = cart.tax;
+    document.getElementById('total').textContent = cart.total;
+
+    const cartCount = document.querySelector('.cart-count');
+    if (cartCount) cartCount.textContent = cart.count;
+}
+
+function applyDiscount() {
+    const discountCode = document.getElementById('discount-code').value.trim();
+
+    if (discountCode === 'SHOPEASY10') {
+        const subtotal = parseFloat(document.getElementById('subtotal').textContent);
+        const discount = subtotal * 0.1;
+        const total = parseFloat(document.getElementById('total').textContent);
+
+        // Update total with discount
+        document.getElementById('total').textContent = (total - discount).toFixed(2);
+
+        // Show success message
+        alert('Discount applied! You saved $' + discount.toFixed(2));
+    } else if (discountCode) {
+        alert('Invalid discount code. Try "SHOPEASY10" for 10% off!');
+    }
+}
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function() {
+    // Quantity input change
+    document.querySelectorAll('.quantity-input').forEach(input => {
+        input.addEventListener('change', function() {
+            const itemId = this.id.split('-')[1];
+            const quantity = parseInt(this.value);
+            const maxQuantity = parseInt(this.max);
+
+            if (quantity < 1) this.value = 1;
+            if (quantity > maxQuantity) this.value = maxQuantity;
+
+            updateQuantity(parseInt(itemId), 0);
+        });
+    });
+});
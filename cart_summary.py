@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Sum
+
+from .models import Cart
+
+
+def _cache_key(user_id):
+    return f'cart-summary:{user_id}'
+
+
+def get_cart_summary(user):
+    """
+    Return {'count': distinct items, 'subtotal': Decimal} for a user's cart.
+
+    The result is cached per user until a cart view, or a price change to
+    a product in the cart, invalidates it, so ordinary page views don't
+    query the cart at all.
+    """
+    if not user.is_authenticated:
+        return {'count': 0, 'subtotal': Decimal('0.00')}
+
+    key = _cache_key(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        totals = Cart.objects.filter(user_id=user.pk).aggregate(
+            count=Count('id'),
+            subtotal=Sum(F('quantity') * F('product__price')),
+        )
+        summary = {
+            'count': totals['count'],
+            'subtotal': totals['subtotal'] or Decimal('0.00'),
+        }
+        cache.set(key, summary, getattr(settings, 'CART_SUMMARY_TIMEOUT', 300))
+    return summary
+
+
+async def aget_cart_summary(user):
+    """Async twin of get_cart_summary for the async storefront views"""
+    if not user.is_authenticated:
+        return {'count': 0, 'subtotal': Decimal('0.00')}
+
+    key = _cache_key(user.pk)
+    summary = await cache.aget(key)
+    if summary is None:
+        totals = await Cart.objects.filter(user_id=user.pk).aaggregate(
+            count=Count('id'),
+            subtotal=Sum(F('quantity') * F('product__price')),
+        )
+        summary = {
+            'count': totals['count'],
+            'subtotal': totals['subtotal'] or Decimal('0.00'),
+        }
+        await cache.aset(key, summary, getattr(settings, 'CART_SUMMARY_TIMEOUT', 300))
+    return summary
+
+
+def invalidate_cart_summary(user):
+    """Drop the cached summary after the user's cart changes"""
+    cache.delete(_cache_key(user.pk))
+
+
+def invalidate_product_carts(product_id):
+    """Drop the cached summaries of every cart holding a product, after its price changes"""
+    user_ids = Cart.objects.filter(product_id=product_id).values_list('user_id', flat=True)
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
@@ -0,0 +1,124 @@
+import base64
+import binascii
+import json
+
+from django.core.files.storage import default_storage
+
+from .models import DEFAULT_PRODUCT_IMAGE, Product
+
+# Rows fetched per query while streaming
+BATCH_SIZE = 500
+
+# Public field -> values() columns it is built from
+FIELDS = {
+    'id': ('id',),
+    'name': ('name',),
+    'description': ('description',),
+    'price': ('price',),
+    'image_url': ('image', 'image_url'),
+    'category': ('category__name',),
+    'category_id': ('category_id',),
+    'stock': ('stock',),
+    'created_at': ('created_at',),
+}
+
+DEFAULT_FIELDS = ['id', 'name', 'description', 'price', 'image_url', 'category', 'stock', 'created_at']
+
+
+def parse_fields(value):
+    """Split a ?fields= value, raising ValueError on unknown names"""
+    if not value:
+        return DEFAULT_FIELDS
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(f'id:{last_id}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the last id seen, raising ValueError on a malformed cursor"""
+    if not cursor:
+        return 0
+    try:
+        prefix, last_id = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split(':')
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if prefix != 'id':
+        raise ValueError('Invalid cursor')
+    return int(last_id)
+
+
+def serialize_row(row, fields):
+    """Build the API payload for one values() row, matching Product.to_json"""
+    data = {}
+    for name in fields:
+        if name == 'price':
+            data[name] = str(row['price'])
+        elif name == 'image_url':
+            if row['image']:
+                data[name] = default_storage.url(row['image'])
+            else:
+                data[name] = row['image_url'] or DEFAULT_PRODUCT_IMAGE
+        elif name == 'category':
+            data[name] = row['category__name']
+        elif name == 'created_at':
+            data[name] = row['created_at'].strftime('%Y-%m-%d')
+        else:
+            data[name] = row[name]
+    return data
+
+
+def iter_products(fields, after_id=0, limit=None):
+    """
+    Yield serialized products in id order, then the next cursor (or None).
+
+    Rows are read in keyset batches of BATCH_SIZE straight from values()
+    with the category name joined in, so no model instances are built and
+    memory stays flat however large the catalog is.
+    """
+    columns = {'id'}
+    for name in fields:
+        columns.update(FIELDS[name])
+    queryset = Product.objects.order_by('id').values(*columns)
+
+    sent = 0
+    last_id = after_id
+    while limit is None or sent < limit:
+        size = BATCH_SIZE if limit is None else min(BATCH_SIZE, limit - sent)
+        rows = list(queryset.filter(id__gt=last_id)[:size])
+        for row in rows:
+            yield serialize_row(row, fields)
+        sent += len(rows)
+        if len(rows) < size:
+            yield None
+            return
+        last_id = rows[-1]['id']
+
+    more = Product.objects.filter(id__gt=last_id).exists()
+    yield encode_cursor(last_id) if more else None
+
+
+def stream_ndjson(items):
+    """One product per line, closed by a {"next_cursor": ...} line"""
+    for item in items:
+        if isinstance(item, dict):
+            yield json.dumps(item) + '\n'
+        else:
+            yield json.dumps({'next_cursor': item}) + '\n'
+
+
+def stream_json(items):
+    """A single {"products": [...], "next_cursor": ...} document, sent piecewise"""
+    yield '{"products": ['
+    first = True
+    for item in items:
+        if isinstance(item, dict):
+            yield ('' if first else ',') + json.dumps(item)
+            first = False
+        else:
+            yield '], "next_cursor": ' + json.dumps(item) + '}'
@@ -0,0 +1,221 @@
+"""
+Per-worker columnar snapshot of the listing columns.
+
+With CATALOG_SNAPSHOT on (and NumPy installed), every worker keeps each
+product's id, category, price, created_at and name in parallel NumPy
+arrays and answers unsearched product_list pages with vectorized masks
+over presorted orders: no SQL for the filter, sort, count or sidebar, and
+the page's products come from product_cache. Cursors are the ones
+KeysetPaginator issues, so pages move freely between the two paths.
+
+The snapshot refreshes when the catalog version moves, or after
+CATALOG_SNAPSHOT_MAX_AGE seconds, by reading only products whose
+updated_at is recent; a count/id checksum catches deletions and falls
+back to a full reload.
+"""
+import datetime
+import threading
+import time
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from . import facets, product_cache
+from .models import Category, Product
+from .pagination import KeysetPaginator
+
+try:
+    import numpy as np
+except ImportError:  # optional; listings stay on SQL without it
+    np = None
+
+COLUMNS = ('id', 'category_id', 'price', 'created_at', 'name')
+
+# Re-read changes this far back, for transactions that committed after
+# the previous refresh had already run
+REFRESH_OVERLAP = datetime.timedelta(seconds=60)
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+_snapshot = None
+_refresh_lock = threading.Lock()
+
+
+def _cents(value, rounding=ROUND_FLOOR):
+    return int((Decimal(value) * 100).to_integral_value(rounding))
+
+
+def _micros(value):
+    return (value - _EPOCH) // datetime.timedelta(microseconds=1)
+
+
+class CatalogSnapshot:
+    """Listing columns of every product as parallel arrays, ordered by id"""
+
+    def __init__(self, ids, category_ids, prices, created, names, categories, version, since):
+        by_id = np.argsort(ids, kind='stable')
+        self.ids = ids[by_id]
+        self.category_ids = category_ids[by_id]
+        self.prices = prices[by_id]
+        self.created = created[by_id]
+        self.names = names[by_id]
+        # Names sort as their rank among the distinct names
+        self.name_values, self.name_ranks = np.unique(self.names, return_inverse=True)
+        self.keys = {'id': self.ids, 'price': self.prices, 'created_at': self.created, 'name': self.name_ranks}
+        # Positions in (key, id) order for every listing sort
+        self.orders = {field: np.lexsort((self.ids, key)) for field, key in self.keys.items()}
+        self.categories = categories
+        self.version = version
+        self.since = since
+        self.loaded = time.monotonic()
+
+    @classmethod
+    def from_rows(cls, rows, categories, version, since):
+        ids, category_ids, prices, created, names = zip(*rows) if rows else ((),) * len(COLUMNS)
+        return cls(
+            np.array(ids, dtype=np.int64),
+            np.array(category_ids, dtype=np.int64),
+            np.array([_cents(price) for price in prices], dtype=np.int64),
+            np.array([_micros(value) for value in created], dtype=np.int64),
+            np.array(names, dtype=str),
+            categories, version, since,
+        )
+
+    def merged(self, rows, categories, version, since):
+        """A new snapshot with rows (COLUMNS tuples) inserted or replaced"""
+        changed = CatalogSnapshot.from_rows(rows, categories, version, since)
+        keep = ~np.isin(self.ids, changed.ids)
+        return CatalogSnapshot(
+            np.concatenate([self.ids[keep], changed.ids]),
+            np.concatenate([self.category_ids[keep], changed.category_ids]),
+            np.concatenate([self.prices[keep], changed.prices]),
+            np.concatenate([self.created[keep], changed.created]),
+            np.concatenate([self.names[keep], changed.names]),
+            categories, version, since,
+        )
+
+    def checksum(self):
+        return len(self.ids), int(self.ids.sum())
+
+    def _cursor_key(self, field, value):
+        """A cursor's sort value in the units of self.keys[field]"""
+        if field == 'price':
+            return _cents(value)
+        if field == 'created_at':
+            return _micros(value)
+        if field == 'name':
+            # Ranks follow code points, like SQLite's default collation.
+            # A name since gone from the catalog seeks between two ranks
+            rank = int(np.searchsorted(self.name_values, value))
+            exists = rank < len(self.name_values) and self.name_values[rank] == value
+            return rank if exists else rank - 0.5
+        return value
+
+    def _filter(self, category_id=None, min_price=None, max_price=None):
+        mask = np.ones(len(self.ids), dtype=bool)
+        if category_id:
+            mask &= self.category_ids == int(category_id)
+        if min_price:
+            mask &= self.prices >= _cents(min_price, ROUND_CEILING)
+        if max_price:
+            mask &= self.prices <= _cents(max_price)
+        return mask
+
+    def page(self, listing, field, descending, per_page, cursor=None):
+        """(KeysetPage, total_count) for an unsearched listing, as product_list builds it"""
+        mask = self._filter(listing['category_id'], listing['min_price'], listing['max_price'])
+        total_count = int(mask.sum())
+
+        # The queryset only types the cursor; it is never evaluated
+        paginator = KeysetPaginator(Product.objects.all(), field, descending, per_page)
+        decoded = paginator.decode_cursor(cursor)
+        reverse = False
+        if decoded:
+            direction, value, pk = decoded
+            reverse = direction == 'prev'
+            key, target = self.keys[field], self._cursor_key(field, value)
+            if descending != reverse:
+                mask &= (key < target) | ((key == target) & (self.ids < pk))
+            else:
+                mask &= (key > target) | ((key == target) & (self.ids > pk))
+
+        order = self.orders[field]
+        positions = order[mask[order]]
+        limit = per_page + 1
+        positions = positions[-limit:][::-1] if descending != reverse else positions[:limit]
+        page_ids = [int(product_id) for product_id in self.ids[positions]]
+
+        found = product_cache.get_products(page_ids)
+        return paginator.page_from_rows([found[pk] for pk in page_ids if pk in found], cursor), total_count
+
+    def facets(self, category_id=None, min_price=None, max_price=None):
+        """The sidebar facets.get_facets would return for an unsearched listing"""
+        _, bucket = facets.bucket_for_range(min_price, max_price)
+        try:
+            category_id = int(category_id) if category_id else None
+        except ValueError:
+            category_id = None
+
+        in_range = self._filter(min_price=min_price, max_price=max_price)
+        ids, counts = np.unique(self.category_ids[in_range], return_counts=True)
+        category_counts = dict(zip(ids.tolist(), counts.tolist()))
+
+        highs = [_cents(high) for label, low, high in facets.PRICE_BUCKETS if high is not None]
+        in_category = self.prices[self.category_ids == category_id] if category_id else self.prices
+        buckets = np.bincount(np.searchsorted(highs, in_category), minlength=len(facets.PRICE_BUCKETS))
+        bucket_counts = dict(enumerate(buckets.tolist()))
+
+        return {
+            'categories': [
+                {'id': cat_id, 'name': name, 'count': category_counts.get(cat_id, 0)}
+                for cat_id, name in self.categories.items()
+            ],
+            'total': sum(category_counts.values()),
+            'matching': category_counts.get(category_id, 0) if category_id else sum(category_counts.values()),
+            'price_buckets': facets._price_buckets(bucket_counts, bucket),
+        }
+
+
+def _checksum():
+    totals = Product.objects.aggregate(count=Count('id'), id_sum=Sum('id'))
+    return totals['count'], totals['id_sum'] or 0
+
+
+def _refresh(snapshot, version):
+    since = timezone.now()
+    categories = dict(Category.objects.order_by('id').values_list('id', 'name'))
+    if snapshot is not None:
+        rows = list(Product.objects.filter(updated_at__gte=snapshot.since - REFRESH_OVERLAP).values_list(*COLUMNS))
+        refreshed = snapshot.merged(rows, categories, version, since)
+        if refreshed.checksum() == _checksum():
+            return refreshed
+    # First load, or products were deleted
+    return CatalogSnapshot.from_rows(list(Product.objects.values_list(*COLUMNS)), categories, version, since)
+
+
+def get_snapshot():
+    """
+    This worker's snapshot, or None when CATALOG_SNAPSHOT is off or NumPy
+    is missing. While one thread refreshes, the others keep serving the
+    previous snapshot instead of waiting.
+    """
+    global _snapshot
+    if np is None or not getattr(settings, 'CATALOG_SNAPSHOT', False):
+        return None
+
+    version = product_cache.get_catalog_version()
+    max_age = getattr(settings, 'CATALOG_SNAPSHOT_MAX_AGE', 30)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version and time.monotonic() - snapshot.loaded < max_age:
+        return snapshot
+
+    if not _refresh_lock.acquire(blocking=snapshot is None):
+        return snapshot
+    try:
+        if _snapshot is snapshot:
+            _snapshot = _refresh(snapshot, version)
+        return _snapshot
+    finally:
+        _refresh_lock.release()
@@ -0,0 +1,61 @@
+// Payment method selection
+function selectPaymentMethod(method) {
+    // Update selected payment method
+    document.querySelectorAll('.payment-method').forEach(el => {
+        el.classList.remove('selected');
+    });
+    event.currentTarget.classList.add('selected');
+
+    // Update hidden input
+    document.getElementById('payment_method').value = method;
+
+    // Show corresponding payment details
+    document.querySelectorAll('.payment-details').forEach(el => {
+        el.style.display = 'none';
+    });
+    document.getElementById(`${method}_details`).style.display = 'block';
+}
+
+// Format card number
+document.getElementById('card_number')?.addEventListener('input', function(e) {
+    let value = e.target.value.replace(/\s+/g, '').replace(/[^0-9]/gi, '');
+    let formatted = value.match(/.{1,4}/g)?.join(' ') || '';
+    e.target.value = formatted.substring(0, 19);
+});
+
+// Format expiry date
+document.getElementById('expiry_date')?.addEventListener('input', function(e) {
+    let value = e.target.value.replace(/\D/g, '');
+    if (value.length >= 2) {
+        value = value.substring(0, 2) + '/' + value.substring(2, 4);
+    }
+    e.target.value = value.substring(0, 5);
+});
+
+// Format CVV
+document.getElementById('cvv')?.addEventListener('input', function(e) {
+    this.value = this.value.replace(/\D/g, '').substring(0, 3);
+});
+
+// Form validation
+document.querySelector('form').addEventListener('submit', function(e) {
+    const terms = document.getElementById('terms');
+    if (!terms.checked) {
+        e.preventDefault();
+        alert('Please agree to the terms and conditions.');
+        return false;
+    }
+
+    // Show loading state
+    const submitBtn = this.querySelector('button[type="submit"]');
+    const originalText = submitBtn.innerHTML;
+    submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Processing...';
+    submitBtn.disabled = true;
+
+    // In production, you would handle the actual payment processing here
+    // This is just for demonstration
+    setTimeout(() => {
+        submitBtn.innerHTML = originalText;
+        submitBtn.disabled = false;
+    }, 3000);
+});
@@ -0,0 +1,79 @@
+"""
+Validators for conditional GETs on the catalog pages and quick view API.
+
+ETags hash the catalog version (bumped by every product or category save
+or delete, and by related-product mining) with when the products shown
+last changed: their updated_at, which order stock changes move too, or
+for listings product_cache's catalog-modified stamp. HTML pages also
+hash what they show of the viewer, the user and cart summary, and skip
+validation while flash messages wait to be shown. All of it comes from
+the cache, so a 304 runs no SQL. Pages carry Last-Modified for anonymous
+viewers with an empty cart, and Cache-Control no-cache so browsers
+revalidate instead of guessing a freshness lifetime.
+"""
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def _etag(*parts):
+    return '"%s"' % hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+
+def _viewer(request, summary):
+    """What a storefront page shows of the viewer, or None when it can't be validated"""
+    if len(get_messages(request)):
+        return None
+    return (request.user.pk, summary['count'], str(summary['subtotal']))
+
+
+def page_validators(request, summary, version, updated_at, *parts):
+    """(etag, last_modified) for an HTML page, or (None, None)"""
+    viewer = _viewer(request, summary)
+    if viewer is None:
+        return None, None
+    # A cart or a login changes the page without touching any product
+    last_modified = updated_at if request.user.pk is None and not summary['count'] else None
+    return _etag(version, updated_at, viewer, *parts), last_modified
+
+
+def product_validators(request, summary, version, product):
+    return page_validators(request, summary, version, product.updated_at, product.pk)
+
+
+def listing_validators(request, summary, version, modified):
+    return page_validators(request, summary, version, modified)
+
+
+def quick_view_validators(version, product):
+    return _etag(version, product.updated_at, product.pk), product.updated_at
+
+
+def _timestamp(last_modified):
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+def not_modified(request, etag, last_modified, private=True):
+    """
+    A 304 when the request's If-None-Match/If-Modified-Since still match,
+    else None. Pages are private: they embed the viewer's CSRF token.
+    """
+    if etag is None:
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=_timestamp(last_modified))
+    if response is not None:
+        set_validators(response, etag, last_modified, private)
+    return response
+
+
+def set_validators(response, etag, last_modified, private=True):
+    """Add ETag/Last-Modified to a response, and make caches revalidate it"""
+    if etag is None:
+        return response
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(_timestamp(last_modified))
+    patch_cache_control(response, no_cache=True, **{'private' if private else 'public': True})
+    return response
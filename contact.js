@@ -0,0 +1,176 @@
+// Show success message if it exists
+document.addEventListener('DOMContentLoaded', function() {
+    const successMessage = document.getElementById('successMessage');
+    if (successMessage) {
+        successMessage.style.display = 'block';
+
+        // Auto-hide after 5 seconds
+        setTimeout(() => {
+            successMessage.style.opacity = '0';
+            setTimeout(() => {
+                successMessage.style.display = 'none';
+            }, 300);
+        }, 5000);
+    }
+});
+
+// Toggle FAQ
+function toggleFAQ(element) {
+    const faqItem = element.parentElement;
+    faqItem.classList.toggle('active');
+
+    // Close other FAQs
+    if (faqItem.classList.contains('active')) {
+        document.querySelectorAll('.faq-item').forEach(item => {
+            if (item !== faqItem && item.classList.contains('active')) {
+                item.classList.remove('active');
+            }
+        });
+    }
+}
+
+// Form validation
+document.getElementById('contactForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+
+    // Get form values
+    const name = document.getElementById('name').value.trim();
+    const email = document.getElementById('email').value.trim();
+    const subject = document.getElementById('subject').value;
+    const message = document.getElementById('message').value.trim();
+
+    let isValid = true;
+
+    // Reset errors
+    document.querySelectorAll('.error-message').forEach(el => {
+        el.style.display = 'none';
+    });
+    document.querySelectorAll('.form-control').forEach(el => {
+        el.classList.remove('error');
+    });
+
+    // Validate name
+    if (!name) {
+        showError('name', 'Name is required');
+        isValid = false;
+    }
+
+    // Validate email
+    if (!email) {
+        showError('email', 'Email is required');
+        isValid = false;
+    } else if (!isValidEmail(email)) {
+        showError('email', 'Please enter a valid email address');
+        isValid = false;
+    }
+
+    // Validate subject
+    if (!subject) {
+        showError('subject', 'Please select a subject');
+        isValid = false;
+    }
+
+    // Validate message
+    if (!message) {
+        showError('message', 'Message is required');
+        isValid = false;
+    } else if (message.length < 10) {
+        showError('message', 'Message must be at least 10 characters');
+        isValid = false;
+    }
+
+    if (isValid) {
+        // Show loading state
+        const submitBtn = this.querySelector('button[type="submit"]');
+        const originalText = submitBtn.innerHTML;
+        submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Sending...';
+        submitBtn.disabled = true;
+
+        // Simulate API call
+        setTimeout(() => {
+            // In a real application, you would submit the form here
+            // For demo purposes, we'll show a success message
+            const successMessage = document.getElementById('successMessage');
+            if (!successMessage) {
+                const newSuccessMessage = document.createElement('div');
+                newSuccessMessage.className = 'success-message';
+                newSuccessMessage.id = 'successMessage';
+                newSuccessMessage.innerHTML = `
+                    <i class="fas fa-check-circle"></i>
+                    Thank you for your message! We'll get back to you soon.
+                `;
+                this.parentElement.insertBefore(newSuccessMessage, this);
+                newSuccessMessage.style.display = 'block';
+            }
+
+            // Reset form
+            this.reset();
+            submitBtn.innerHTML = originalText;
+            submitBtn.disabled = false;
+
+            // Auto-hide success message after 5 seconds
+            setTimeout(() => {
+                const msg = document.getElementById('successMessage');
+                if (msg) {
+                    msg.style.opacity = '0';
+                    setTimeout(() => {
+                        msg.style.display = 'none';
+                    }, 300);
+                }
+            }, 5000);
+        }, 1500);
+    }
+});
+
+function showError(fieldId, message) {
+    const input = document.getElementById(fieldId);
+    const errorEl = document.getElementById(`${fieldId}-error`);
+
+    input.classList.add('error');
+    errorEl.textContent = message;
+    errorEl.style.display = 'block';
+}
+
+function isValidEmail(email) {
+    const re = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+    return re.test(email);
+}
+
+// Phone number formatting
+document.getElementById('phone')?.addEventListener('input', function(e) {
+    let value = e.target.value.replace(/\D/g, '');
+
+    if (value.length > 0) {
+        value = '+1 (' + value;
+
+        if (value.length > 7) {
+            value = value.substring(0, 7) + ') ' + value.substring(7);
+        }
+        if (value.length > 12) {
+            value = value.substring(0, 12) + '-' + value.substring(12, 16);
+        }
+    }
+
+    e.target.value = value.substring(0, 17);
+});
+
+// Initialize FAQ
+document.addEventListener('DOMContentLoaded', function() {
+    // Open first FAQ by default
+    const firstFaq = document.querySelector('.faq-item');
+    if (firstFaq) {
+        firstFaq.classList.add('active');
+    }
+
+    // Add animation to info cards
+    const infoCards = document.querySelectorAll('.info-card');
+    infoCards.forEach(card => {
+        card.addEventListener('mouseenter', () => {
+            card.style.transform = 'translateY(-5px)';
+        });
+
+        card.addEventListener('mouseleave', () => {
+            card.style.transform = 'translateY(0)';
+        });
+    });
+});
@@ -1,6 +1,16 @@
+from django.conf import settings
+
+from . import guest_cart
+
 def cart_context(request):
-    """Add cart count to all templates"""
-    cart_count = 0
-    if request.user.is_authenticated:
-        cart_count = request.user.cart_set.count()  # Using default related name
-    return {'cart_count': cart_count}
\ No newline at end of file
+    """Add cart count and subtotal to all templates"""
+    # Async views resolve the summary up front since this runs synchronously
+    summary = getattr(request, 'cart_summary', None) or guest_cart.request_summary(request)
+    return {
+        'cart_count': summary['count'],
+        'cart_subtotal': summary['subtotal'],
+    }
+
+def fragment_cache(request):
+    """Lifetime for {% cache %} fragments; their keys are versioned, so this only bounds memory"""
+    return {'fragment_timeout': getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 3600)}
\ No newline at end of file
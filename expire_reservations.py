@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from store import reservations
+
+
+class Command(BaseCommand):
+    help = 'Delete expired stock reservations (run periodically, e.g. from cron)'
+
+    def handle(self, *args, **kwargs):
+        removed = reservations.expire_holds()
+        self.stdout.write(self.style.SUCCESS(f'Expired {removed} reservations.'))
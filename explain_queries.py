@@ -0,0 +1,157 @@
+import re
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from store.models import Cart, Order, Product
+
+# Tables read whole on purpose: a handful of categories, one row per facet
+# cell, and SQLite's schema (search.index_available)
+ALLOWED_SCANS = {'store_category', 'store_facetcount', 'sqlite_master'}
+
+# Column lists are long and say nothing about the plan
+SELECT_LIST = re.compile(r'^SELECT .*? FROM ')
+
+# The "next page" link the listing and order history templates render
+NEXT_CURSOR = re.compile(r'[?&]cursor=([\w-]+)')
+
+# A bare "SCAN t" (SQLite) or "Seq Scan on t" (PostgreSQL) reads every row
+SCAN_PATTERNS = {
+    'sqlite': re.compile(r'^SCAN (\S+)$'),
+    'postgresql': re.compile(r'Seq Scan on (\S+)'),
+}
+# Unfiltered first pages walk the primary key and stop at the LIMIT, which
+# SQLite also reports as a bare SCAN
+PK_PAGE = re.compile(r'ORDER BY "(\w+)"\."id" (ASC|DESC) LIMIT \d+$')
+
+# Sorting rows no index delivers in order; reported, but never fails the run
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+    'postgresql': re.compile(r'^\s*(->\s*)?Sort\b'),
+}
+EXPLAIN_PREFIX = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN every query the listing, cart, checkout and order history views run and report full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fail', action='store_true', help='Exit with an error if any query scans a whole table')
+        parser.add_argument('--plans', action='store_true', help='Print every plan, not just the scans')
+        parser.add_argument('--allow', action='append', default=[], metavar='TABLE',
+                            help='Another table that may be scanned (repeatable)')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SCAN_PATTERNS:
+            raise CommandError(f'No plan reader for the {connection.vendor} backend')
+        category_id = Product.objects.values_list('category_id', flat=True).first()
+        if category_id is None:
+            raise CommandError('The catalog is empty; run seed_products first')
+
+        # Fresh, empty caches so the queries behind cached data run too;
+        # everything written is rolled back afterwards
+        caches = {
+            alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'explain-{alias}'}
+            for alias in settings.CACHES
+        }
+        with override_settings(ALLOWED_HOSTS=['*'], CACHES=caches), transaction.atomic():
+            shapes = self.capture(category_id)
+            transaction.set_rollback(True)
+
+        allowed = ALLOWED_SCANS | set(options['allow'])
+        scans = sorts = 0
+        for view, queries in shapes.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{view}: {len(queries)} query shapes'))
+            for sql, params in queries.items():
+                plan = self.explain(sql, params)
+                tables = [
+                    match.group(1).strip('"') for match in
+                    (SCAN_PATTERNS[connection.vendor].search(line) for line in plan) if match
+                ]
+                page = PK_PAGE.search(sql) if ' WHERE ' not in sql else None
+                flagged = [table for table in tables if table not in allowed and not (page and page.group(1) == table)]
+                sorted_ = any(SORT_PATTERNS[connection.vendor].search(line) for line in plan)
+                if flagged or sorted_ or options['plans']:
+                    if flagged:
+                        label = self.style.ERROR('FULL SCAN ' + ', '.join(flagged))
+                    else:
+                        label = self.style.WARNING('SORT') if sorted_ else 'ok'
+                    self.stdout.write(f'  {label}: {SELECT_LIST.sub("SELECT ... FROM ", sql, count=1)}')
+                    for line in plan:
+                        self.stdout.write(f'      {line}')
+                scans += bool(flagged)
+                sorts += sorted_
+
+        if sorts:
+            self.stdout.write(self.style.WARNING(f'{sorts} query shapes sort without an index'))
+        if scans:
+            message = f'{scans} query shapes scan a whole table'
+            if options['fail']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No full table scans.'))
+
+    def capture(self, category_id):
+        """Run each view as a throwaway shopper; returns {view: {sql: params}} of its SELECTs"""
+        user = User.objects.create_user('explain-queries', password=None)
+        products = list(Product.objects.order_by('id')[:3])
+        Cart.objects.bulk_create([Cart(user=user, product=product) for product in products])
+        per_page = getattr(settings, 'ORDERS_PER_PAGE', 10)
+        Order.objects.bulk_create([
+            Order(user=user, total_amount=0, shipping_address='EXPLAIN') for _ in range(per_page + 1)
+        ])
+
+        client = Client()
+        client.force_login(user)
+        listing = reverse('product_list')
+        requests = [
+            ('product_list', listing),
+            ('product_list', f'{listing}?category={category_id}'),
+            ('product_list', f'{listing}?min_price=10&max_price=200'),
+            ('product_list', f'{listing}?category={category_id}&min_price=10&max_price=200&sort=price_asc'),
+            ('product_list', f'{listing}?sort=price_desc'),
+            ('product_list', f'{listing}?sort=newest'),
+            ('product_list', f'{listing}?sort=name_asc'),
+            ('product_list', f'{listing}?search=wireless'),
+            ('cart', reverse('cart')),
+            ('checkout', reverse('checkout')),
+            ('order_history', reverse('order_history')),
+        ]
+
+        shapes = {}
+        for view, path in requests:
+            queries = shapes.setdefault(view, {})
+            response = self.request(client, path, queries)
+            # Follow the next-page link so the keyset seek is explained too
+            next_link = NEXT_CURSOR.search(response.content.decode())
+            if next_link:
+                separator = '&' if '?' in path else '?'
+                self.request(client, f'{path}{separator}cursor={next_link.group(1)}', queries)
+        return shapes
+
+    def request(self, client, path, queries):
+        def collect(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                queries.setdefault(sql, params)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(collect):
+            response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f'GET {path} returned {response.status_code}')
+        return response
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(EXPLAIN_PREFIX[connection.vendor] + sql, params)
+            rows = cursor.fetchall()
+        # SQLite rows are (id, parent, notused, detail); PostgreSQL's are one column
+        return [row[-1] for row in rows]
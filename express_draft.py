@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from . import reservations
+
+
+def _cache_key(user_id):
+    return f'express-checkout:{user_id}'
+
+
+def save_draft(user, product, quantity):
+    """
+    Remember the user's Buy Now product and quantity for express checkout.
+
+    Only the two ids travel, cached per user for as long as the Buy Now
+    hold lasts; totals are worked out again from the product, so the
+    session is never written on the way to checkout. The hold itself is
+    the durable copy, see get_draft.
+    """
+    cache.set(_cache_key(user.pk), (product.id, quantity), getattr(settings, 'RESERVATION_TTL', 15 * 60))
+
+
+def get_draft(user):
+    """
+    (product_id, quantity) of the pending Buy Now, or None.
+
+    The cache may have evicted the draft, or another worker may have
+    written it to its own LocMem cache, so a miss reads the user's newest
+    Buy Now hold instead; it lives exactly as long as the draft.
+    """
+    draft = cache.get(_cache_key(user.pk))
+    if draft is None:
+        draft = (
+            reservations.active_holds().filter(user=user, kind='buy_now')
+            .order_by('-expires_at').values_list('product_id', 'quantity').first()
+        )
+    return draft
+
+
+def clear_draft(user):
+    cache.delete(_cache_key(user.pk))
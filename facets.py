@@ -0,0 +1,194 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+
+from .models import Category, FacetCount, Product
+
+# (label, min price, max price) - max is inclusive with two decimal places so
+# bucket links map onto the listing's price__gte / price__lte filters exactly
+PRICE_BUCKETS = [
+    ('Under $25', Decimal('0'), Decimal('24.99')),
+    ('$25 - $50', Decimal('25'), Decimal('49.99')),
+    ('$50 - $100', Decimal('50'), Decimal('99.99')),
+    ('$100 - $250', Decimal('100'), Decimal('249.99')),
+    ('$250 - $500', Decimal('250'), Decimal('499.99')),
+    ('$500 - $1000', Decimal('500'), Decimal('999.99')),
+    ('$1000 & up', Decimal('1000'), None),
+]
+
+
+def bucket_for_price(price):
+    """Index of the price bucket a product belongs to"""
+    price = Decimal(price)
+    for index, (label, low, high) in enumerate(PRICE_BUCKETS):
+        if high is None or price <= high:
+            return index
+    return len(PRICE_BUCKETS) - 1
+
+
+def bucket_expression():
+    """SQL CASE mapping Product.price to its bucket index"""
+    whens = [
+        When(price__lte=high, then=Value(index))
+        for index, (label, low, high) in enumerate(PRICE_BUCKETS)
+        if high is not None
+    ]
+    return Case(*whens, default=Value(len(PRICE_BUCKETS) - 1), output_field=IntegerField())
+
+
+def bucket_for_range(min_price, max_price):
+    """
+    Match a min/max price filter against the buckets.
+
+    Returns (aligned, index): index is None when there is no price filter,
+    aligned is False when the range does not line up with a single bucket.
+    """
+    if not min_price and not max_price:
+        return True, None
+    try:
+        low = Decimal(min_price) if min_price else Decimal('0')
+        high = Decimal(max_price) if max_price else None
+    except InvalidOperation:
+        return False, None
+    for index, (label, bucket_low, bucket_high) in enumerate(PRICE_BUCKETS):
+        if low == bucket_low and high == bucket_high:
+            return True, index
+    return False, None
+
+
+def _adjust(category_id, bucket, delta):
+    updated = FacetCount.objects.filter(
+        category_id=category_id, price_bucket=bucket
+    ).update(count=F('count') + delta)
+    if not updated and delta > 0:
+        facet, created = FacetCount.objects.get_or_create(
+            category_id=category_id, price_bucket=bucket,
+            defaults={'count': delta}
+        )
+        if not created:
+            FacetCount.objects.filter(pk=facet.pk).update(count=F('count') + delta)
+
+
+def remember_facet(product):
+    """Stash the stored (category, bucket) and price of a product about to be saved"""
+    product._facet_previous = product._stored_price = None
+    if product.pk:
+        stored = Product.objects.filter(pk=product.pk).values_list('category_id', 'price').first()
+        if stored:
+            product._facet_previous = (stored[0], bucket_for_price(stored[1]))
+            product._stored_price = stored[1]
+
+
+def product_saved(product, created):
+    """Move a product's count to its new (category, bucket) cell"""
+    previous = product.__dict__.pop('_facet_previous', None)
+    if not created and previous is None:
+        # Category and price were not part of this save
+        return
+    current = (product.category_id, bucket_for_price(product.price))
+    if previous == current:
+        return
+    with transaction.atomic():
+        if previous:
+            _adjust(*previous, -1)
+        _adjust(*current, 1)
+
+
+def product_deleted(product):
+    _adjust(product.category_id, bucket_for_price(product.price), -1)
+
+
+def refresh_facets():
+    """Recount every (category, bucket) cell from the product table"""
+    rows = (
+        Product.objects.order_by()
+        .annotate(bucket=bucket_expression())
+        .values('category_id', 'bucket')
+        .annotate(total=Count('id'))
+    )
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create([
+            FacetCount(category_id=row['category_id'], price_bucket=row['bucket'], count=row['total'])
+            for row in rows
+        ])
+    return len(rows)
+
+
+def _price_buckets(counts, selected):
+    return [
+        {
+            'index': index,
+            'label': label,
+            'min': low,
+            'max': high,
+            'count': counts.get(index, 0),
+            'active': index == selected,
+        }
+        for index, (label, low, high) in enumerate(PRICE_BUCKETS)
+    ]
+
+
+def get_facets(category_id=None, min_price=None, max_price=None, searched=None):
+    """
+    Category and price-bucket counts for the listing sidebar.
+
+    Each facet respects every filter except its own, so picking a category
+    still shows counts for the other categories. Unsearched listings with
+    no price filter, or with one that matches a bucket, are answered from
+    the precomputed FacetCount table in a single query. Search results and
+    custom price ranges are counted live over ``searched``, which is the
+    product queryset after search but before category/price filtering.
+    Either way ``matching`` is how many products pass every filter, so the
+    listing needn't count them again.
+    """
+    aligned, bucket = bucket_for_range(min_price, max_price)
+    try:
+        category_id = int(category_id) if category_id else None
+    except ValueError:
+        category_id = None
+
+    category_counts, bucket_counts = {}, {}
+
+    if searched is None and aligned:
+        rows = Category.objects.order_by('id').values_list(
+            'id', 'name', 'facetcount__price_bucket', 'facetcount__count'
+        )
+        names = {}
+        for cat_id, name, cell_bucket, count in rows:
+            names[cat_id] = name
+            if cell_bucket is None:
+                continue
+            if bucket is None or cell_bucket == bucket:
+                category_counts[cat_id] = category_counts.get(cat_id, 0) + count
+            if category_id is None or cat_id == category_id:
+                bucket_counts[cell_bucket] = bucket_counts.get(cell_bucket, 0) + count
+    else:
+        products = searched if searched is not None else Product.objects.all()
+        by_category = products
+        if min_price:
+            by_category = by_category.filter(price__gte=min_price)
+        if max_price:
+            by_category = by_category.filter(price__lte=max_price)
+        category_counts = dict(
+            by_category.order_by().values_list('category_id').annotate(total=Count('id'))
+        )
+        by_price = products.filter(category_id=category_id) if category_id else products
+        totals = by_price.aggregate(**{
+            f'bucket_{index}': Count('id', filter=Q(price__gte=low) & (Q(price__lte=high) if high is not None else Q()))
+            for index, (label, low, high) in enumerate(PRICE_BUCKETS)
+        })
+        bucket_counts = {index: totals[f'bucket_{index}'] for index in range(len(PRICE_BUCKETS))}
+        names = dict(Category.objects.order_by('id').values_list('id', 'name'))
+
+    categories = [
+        {'id': cat_id, 'name': name, 'count': category_counts.get(cat_id, 0)}
+        for cat_id, name in names.items()
+    ]
+    return {
+        'categories': categories,
+        'total': sum(category_counts.values()),
+        'matching': category_counts.get(category_id, 0) if category_id else sum(category_counts.values()),
+        'price_buckets': _price_buckets(bucket_counts, bucket),
+    }
@@ -0,0 +1,162 @@
+"""
+Carts for visitors who haven't logged in.
+
+A guest's lines live in a signed cookie as {product_id: quantity}, not
+in the session, so casual browsing writes no rows whichever
+SESSION_ENGINE is configured (the default, cached_db, saves every
+changed session to the database). GuestCartMiddleware writes the cookie
+back when a view changed the cart. Stock is checked as for a user's
+cart, but guests hold no reservations, since a StockReservation needs a
+user. When the visitor logs in or registers, signals.merge_guest_cart
+moves the lines onto Cart with one bulk upsert, capped at the stock
+available to them, and takes the matching holds.
+"""
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.utils.deprecation import MiddlewareMixin
+
+from . import product_cache, reservations
+from .cart_summary import aget_cart_summary, get_cart_summary, invalidate_cart_summary
+from .models import Cart
+
+COOKIE_NAME = 'guest_cart'
+COOKIE_SALT = 'store.guest_cart'
+
+
+class GuestLine:
+    """A guest cart line shaped like a Cart row for the cart template; its id is the product's"""
+
+    def __init__(self, product, quantity):
+        self.id = product.id
+        self.product = product
+        self.product_id = product.id
+        self.quantity = quantity
+
+    def total_price(self):
+        return self.product.price * self.quantity
+
+
+def get_lines(request):
+    """{product_id: quantity}; a missing, tampered or expired cookie is an empty cart"""
+    if not hasattr(request, '_guest_cart'):
+        try:
+            data = signing.loads(
+                request.COOKIES[COOKIE_NAME], salt=COOKIE_SALT, max_age=settings.SESSION_COOKIE_AGE
+            )
+            # The cookie is JSON, so ids are stored as strings
+            request._guest_cart = {int(product_id): int(quantity) for product_id, quantity in data.items()}
+        except (KeyError, signing.BadSignature, AttributeError, TypeError, ValueError):
+            request._guest_cart = {}
+    return dict(request._guest_cart)
+
+
+def _save(request, lines):
+    request._guest_cart = lines
+    request._guest_cart_changed = True
+
+
+def set_quantity(request, product_id, quantity):
+    """Set a line's quantity, dropping the line below 1"""
+    lines = get_lines(request)
+    if quantity < 1:
+        lines.pop(product_id, None)
+    else:
+        lines[product_id] = quantity
+    _save(request, lines)
+
+
+def clear(request):
+    _save(request, {})
+
+
+class GuestCartMiddleware(MiddlewareMixin):
+    """Write the guest cart cookie back, or delete it, after a view changed the cart"""
+
+    def process_response(self, request, response):
+        if not getattr(request, '_guest_cart_changed', False):
+            return response
+        if request._guest_cart:
+            value = signing.dumps(
+                {str(product_id): quantity for product_id, quantity in request._guest_cart.items()},
+                salt=COOKIE_SALT, compress=True,
+            )
+            response.set_cookie(
+                COOKIE_NAME, value, max_age=settings.SESSION_COOKIE_AGE,
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        else:
+            response.delete_cookie(COOKIE_NAME, samesite=settings.SESSION_COOKIE_SAMESITE)
+        return response
+
+
+def cart_items(request):
+    """GuestLines for the products that still exist, read through product_cache"""
+    lines = get_lines(request)
+    products = product_cache.get_products(list(lines))
+    return [GuestLine(products[product_id], quantity) for product_id, quantity in lines.items() if product_id in products]
+
+
+def get_summary(request):
+    """The cart_summary.get_cart_summary dict for a guest"""
+    items = cart_items(request) if get_lines(request) else []
+    return {
+        'count': len(items),
+        'subtotal': sum((item.total_price() for item in items), Decimal('0.00')),
+    }
+
+
+def request_summary(request):
+    """Cart summary for whoever is browsing, logged in or not"""
+    if request.user.is_authenticated:
+        return get_cart_summary(request.user)
+    return get_summary(request)
+
+
+async def arequest_summary(request):
+    if request.user.is_authenticated:
+        return await aget_cart_summary(request.user)
+    # product_cache reads the database on a miss, so stay off the event loop
+    return await sync_to_async(get_summary)(request)
+
+
+def merge_into_cart(user, request):
+    """
+    Add the guest's lines to the user's Cart and hold their stock.
+
+    Quantities add to lines the user already had, up to the stock
+    available to the user, as add_to_cart allows; lines the user already
+    had are never reduced. The cart lines go in with one INSERT ... ON
+    CONFLICT DO UPDATE and the holds with another. Returns
+    [(product, quantity now in the cart)] for lines that were cut short.
+    """
+    lines = get_lines(request)
+    if not lines:
+        return []
+    # Products deleted since they were added are dropped
+    products = product_cache.get_products(list(lines))
+    lines = {product_id: quantity for product_id, quantity in lines.items() if product_id in products}
+    existing = dict(Cart.objects.filter(user=user, product_id__in=lines).values_list('product_id', 'quantity'))
+    available = reservations.available_quantities([products[product_id] for product_id in lines], user)
+
+    totals = {}
+    shortened = []
+    for product_id, quantity in lines.items():
+        had = existing.get(product_id, 0)
+        total = max(had, min(had + quantity, available[product_id]))
+        if total < had + quantity:
+            shortened.append((products[product_id], total))
+        if total > had:
+            totals[product_id] = total
+
+    if totals:
+        Cart.objects.bulk_create(
+            [Cart(user=user, product_id=product_id, quantity=quantity) for product_id, quantity in totals.items()],
+            update_conflicts=True, unique_fields=['user', 'product'], update_fields=['quantity'],
+        )
+        reservations.hold_many(user, totals)
+        invalidate_cart_summary(user)
+    clear(request)
+    return shortened
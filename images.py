@@ -0,0 +1,174 @@
+import hashlib
+import io
+import json
+import logging
+import urllib.request
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.module_loading import import_string
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Widths of the WebP renditions made for every product image
+VARIANT_WIDTHS = (160, 320, 640, 1024)
+VARIANT_DIR = 'product_images/variants'
+WEBP_QUALITY = 80
+
+# Seconds allowed to download an image_url source
+FETCH_TIMEOUT = 10
+
+
+def fetch_remote(url):
+    """Download an image_url source; PRODUCT_IMAGE_FETCHER can point elsewhere (e.g. a test stub)"""
+    request = urllib.request.Request(url, headers={'User-Agent': 'ShopEasy image pipeline'})
+    with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+        return response.read()
+
+
+def _fetcher():
+    return import_string(getattr(settings, 'PRODUCT_IMAGE_FETCHER', 'store.images.fetch_remote'))
+
+
+def image_source(product):
+    """The product's current image (upload name or image_url), or None"""
+    if product.image:
+        return product.image.name
+    return product.image_url or None
+
+
+def _stem(product_id, source):
+    # The source digest changes with the image, so old renditions are never served
+    digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+    return f'{VARIANT_DIR}/{product_id}-{digest}'
+
+
+def _cache_key(product_id, source):
+    return f'product-images:{_stem(product_id, source)}'
+
+
+def _read_source(product):
+    if product.image:
+        with default_storage.open(product.image.name, 'rb') as f:
+            return f.read()
+    return _fetcher()(product.image_url)
+
+
+def _save(name, content):
+    """Store content, returning the name it was stored under"""
+    # Another worker may be building the same rendition: the storage then
+    # picks a free name, and this worker's manifest points at its own file
+    return default_storage.save(name, ContentFile(content))
+
+
+def _read_manifest(product, source):
+    """{width: url} from the product's manifest, or None if it has none"""
+    manifest = f'{_stem(product.id, source)}.json'
+    if not default_storage.exists(manifest):
+        return None
+    with default_storage.open(manifest, 'rb') as f:
+        return {int(width): url for width, url in json.load(f).items()}
+
+
+def generate_variants(product):
+    """
+    Write WebP renditions of the product image under MEDIA_ROOT.
+
+    Each width in VARIANT_WIDTHS up to the original's own width is made
+    (at least one rendition for small originals). A JSON manifest of
+    {width: url} is saved alongside, so a cold cache can find them again
+    without re-encoding.
+    """
+    source = image_source(product)
+    if not source:
+        return {}
+    stem = _stem(product.id, source)
+
+    with Image.open(io.BytesIO(_read_source(product))) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            transparent = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if transparent else 'RGB')
+
+        variants = {}
+        for width in VARIANT_WIDTHS:
+            if width >= image.width:
+                width = image.width
+            height = max(1, round(image.height * width / image.width))
+            buffer = io.BytesIO()
+            image.resize((width, height), Image.LANCZOS).save(buffer, 'WEBP', quality=WEBP_QUALITY)
+            name = _save(f'{stem}-{width}.webp', buffer.getvalue())
+            variants[width] = default_storage.url(name)
+            if width == image.width:
+                break
+
+    _save(f'{stem}.json', json.dumps(variants).encode())
+    return variants
+
+
+def build_variants(product):
+    """
+    {width: url} of the product's renditions, making any that are missing.
+
+    This downloads image_url sources, so it runs from build_product_images
+    and after uploads (see signals), never while rendering a page. Returns
+    {} and logs when the source can't be fetched or decoded.
+    """
+    source = image_source(product)
+    if not source:
+        return {}
+    try:
+        variants = _read_manifest(product, source)
+        if variants is None:
+            variants = generate_variants(product)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.warning('Could not build image variants for product %s from %s', product.id, source, exc_info=True)
+        return {}
+    cache.set(_cache_key(product.id, source), variants, getattr(settings, 'PRODUCT_IMAGE_CACHE_TIMEOUT', 24 * 60 * 60))
+    return variants
+
+
+def get_variants(product):
+    """
+    {width: url} of the product's WebP renditions, or {} until they're built.
+
+    Only the cache and the manifest are read, so pages never wait on a
+    download or an encode; they show the original image until
+    build_variants has run. A missing manifest is remembered for
+    PRODUCT_IMAGE_RETRY_AFTER seconds, so storage isn't checked on every view.
+    """
+    source = image_source(product)
+    if not source:
+        return {}
+    key = _cache_key(product.id, source)
+    variants = cache.get(key)
+    if variants is not None:
+        return variants
+
+    try:
+        variants = _read_manifest(product, source)
+    except (OSError, ValueError):
+        logger.warning('Could not read image variants for product %s', product.id, exc_info=True)
+        variants = None
+    if variants is None:
+        cache.set(key, {}, getattr(settings, 'PRODUCT_IMAGE_RETRY_AFTER', 300))
+        return {}
+
+    cache.set(key, variants, getattr(settings, 'PRODUCT_IMAGE_CACHE_TIMEOUT', 24 * 60 * 60))
+    return variants
+
+
+def srcset(variants):
+    """Format {width: url} as an <img srcset> value"""
+    return ', '.join(f'{url} {width}w' for width, url in sorted(variants.items()))
+
+
+def pick(variants, width):
+    """URL of the narrowest rendition at least `width` wide (else the widest), or None"""
+    if not variants:
+        return None
+    wide_enough = [w for w in variants if w >= width]
+    return variants[min(wide_enough) if wide_enough else max(variants)]
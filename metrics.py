@@ -0,0 +1,299 @@
+"""
+Request metrics in the Prometheus text format.
+
+MetricsMiddleware records, per URL name, request latency, SQL query count
+and time, template render time and response size. Each worker process
+keeps its own totals in memory, and a background thread writes them to
+METRICS_DIR/<pid>-<token>.json every METRICS_FLUSH_INTERVAL seconds; the
+/metrics view sums every file, so one scrape covers all workers. Every
+series is a counter or a histogram, which add up across processes.
+
+The random token keeps a new worker that reuses a pid from overwriting
+an exited worker's file. Those files are deliberately kept: dropping them
+would make the summed counters go down, which Prometheus reads as a
+reset. METRICS_DIR must therefore be emptied when the server is
+(re)started for a deploy, as prometheus_client's multiprocess mode
+requires too.
+"""
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'shopeasy_requests_total': ('counter', 'Requests by URL name, method and status class', None),
+    'shopeasy_request_duration_seconds': ('histogram', 'Time spent handling a request', LATENCY_BUCKETS),
+    'shopeasy_request_queries': ('histogram', 'SQL queries run per request', QUERY_BUCKETS),
+    'shopeasy_request_query_seconds': ('histogram', 'Time spent in SQL per request', LATENCY_BUCKETS),
+    'shopeasy_template_render_seconds': ('histogram', 'Template render time per request', LATENCY_BUCKETS),
+    'shopeasy_response_size_bytes': ('histogram', 'Response body size', SIZE_BUCKETS),
+}
+
+# Anything else is reported as OTHER, so junk methods can't add series
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+_current = ContextVar('request_metrics', default=None)
+_store = None
+
+
+class RequestStats:
+    """What one request spent, filled in by the query wrapper and template backend"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.templates = 0
+        self.render_seconds = 0.0
+
+
+class MetricsStore:
+    """This process's counters, flushed to a file that the scrape merges with the others"""
+
+    def __init__(self, directory, flush_interval):
+        self.directory = str(directory)
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._reset()
+
+    def _reset(self):
+        # A forked worker must not re-report what its parent already counted
+        self._pid = os.getpid()
+        self._filename = f'{self._pid}-{uuid.uuid4().hex[:12]}.json'
+        self._values = defaultdict(float)
+        self._dirty = False
+        self._flushed_at = 0.0
+        # Threads don't survive a fork, so each process starts its own
+        self._flusher = None
+
+    def _start_flusher(self):
+        self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush(force=True)
+
+    def stop(self):
+        """End the background flushes, e.g. when METRICS_DIR changes"""
+        self._stopped.set()
+
+    def _add(self, key, amount):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self._flusher is None:
+                self._start_flusher()
+            self._values[key] += amount
+            self._dirty = True
+
+    def inc(self, name, labels, amount=1):
+        self._add((name, '', tuple(sorted(labels.items())), None), amount)
+
+    def observe(self, name, labels, value):
+        labels = tuple(sorted(labels.items()))
+        for le in METRICS[name][2] + (math.inf,):
+            # Empty buckets are written too; Prometheus expects the full set
+            self._add((name, '_bucket', labels, le), 1 if value <= le else 0)
+        self._add((name, '_sum', labels, None), value)
+        self._add((name, '_count', labels, None), 1)
+
+    def flush(self, force=False):
+        """Write this process's totals if they changed and the interval has passed"""
+        now = time.monotonic()
+        with self._lock:
+            if not self._dirty or (not force and now - self._flushed_at < self.flush_interval):
+                return
+            samples = [[name, suffix, labels, le, value] for (name, suffix, labels, le), value in self._values.items()]
+            self._dirty = False
+            self._flushed_at = now
+            filename = self._filename
+
+        os.makedirs(self.directory, exist_ok=True)
+        # Write then rename, so a scrape never reads half a file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(samples, f)
+        os.replace(tmp, os.path.join(self.directory, filename))
+
+    def collect(self):
+        """Totals summed over every worker's file"""
+        self.flush(force=True)
+        totals = defaultdict(float)
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith('.json')]
+        except FileNotFoundError:
+            names = []
+        for filename in names:
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    samples = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, suffix, labels, le, value in samples:
+                if name in METRICS:
+                    totals[(name, suffix, tuple(tuple(pair) for pair in labels), le)] += value
+        return totals
+
+    def render(self):
+        """The merged totals in the Prometheus text exposition format"""
+        families = defaultdict(list)
+        for key, value in self.collect().items():
+            families[key[0]].append((key, value))
+
+        lines = []
+        for name in sorted(families):
+            kind, help_text, _ = METRICS[name]
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            suffix_order = {'_bucket': 0, '_sum': 1, '_count': 2}
+            samples = sorted(
+                families[name],
+                key=lambda item: (item[0][2], suffix_order.get(item[0][1], 0), item[0][3] or 0),
+            )
+            for (_, suffix, labels, le), value in samples:
+                pairs = list(labels) + ([('le', _number(le))] if le is not None else [])
+                label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in pairs)
+                lines.append(f'{name}{suffix}{{{label_text}}} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def get_store():
+    """The process-wide store, rebuilt if METRICS_DIR changes (e.g. override_settings)"""
+    global _store
+    directory = str(getattr(settings, 'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'shopeasy-metrics')))
+    if _store is None or _store.directory != directory:
+        if _store is None:
+            atexit.register(lambda: _store.flush(force=True))
+        else:
+            _store.stop()
+        _store = MetricsStore(directory, getattr(settings, 'METRICS_FLUSH_INTERVAL', 1))
+    return _store
+
+
+def timed_execute(execute, sql, params, many, context):
+    """Database execute wrapper counting queries into the current request's stats"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - started
+
+
+def instrument(connection):
+    """Install timed_execute on a database connection (see signals.connection_opened)"""
+    if timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timed_execute)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats = _current.get()
+            if stats is not None:
+                stats.templates += 1
+                stats.render_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render for the metrics middleware"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def record(request, response, stats):
+    """Add one finished request to the store"""
+    match = getattr(request, 'resolver_match', None)
+    view = (match.view_name or 'unnamed') if match else 'unmatched'
+    method = request.method if request.method in METHODS else 'OTHER'
+
+    store = get_store()
+    store.inc('shopeasy_requests_total', {'view': view, 'method': method, 'status': f'{response.status_code // 100}xx'})
+    store.observe('shopeasy_request_duration_seconds', {'view': view, 'method': method}, time.perf_counter() - stats.started)
+    store.observe('shopeasy_request_queries', {'view': view}, stats.queries)
+    store.observe('shopeasy_request_query_seconds', {'view': view}, stats.query_seconds)
+    if stats.templates:
+        store.observe('shopeasy_template_render_seconds', {'view': view}, stats.render_seconds)
+    # Streaming bodies are only measured when they declare a length
+    size = response.get('Content-Length') if response.streaming else len(response.content)
+    if size is not None:
+        store.observe('shopeasy_response_size_bytes', {'view': view}, int(size))
+
+
+class MetricsMiddleware:
+    """Record every request's latency, SQL, template time and response size"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        record(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, so ORM calls in worker threads still count
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        record(request, response, stats)
+        return response
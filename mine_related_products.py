@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from store import related
+
+
+class Command(BaseCommand):
+    help = 'Mine co-purchases from orders placed since the last run into the related products table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Discard mined counts and start again from the first order')
+        parser.add_argument('--batch-size', type=int, default=related.ORDER_BATCH, help='Orders mined per transaction')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            related.reset()
+        mined, reranked = related.mine(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Mined {mined} orders; re-ranked related products for {reranked} products.'))
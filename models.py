@@ -1,6 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from . import images
+
+# Shown for products without an uploaded image or image URL
+DEFAULT_PRODUCT_IMAGE = 'https://images.unsplash.com/photo-1505740420928-5e560c06d30e?ixlib=rb-4.0.3&auto=format&fit=crop&w=500&q=80'
+
 class Category(models.Model):
     name = models.CharField(max_length=100)
     image = models.ImageField(upload_to='category_images/', blank=True, null=True)
@@ -18,6 +23,19 @@ class Product(models.Model):
     image_url = models.URLField(blank=True, null=True)
     stock = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Versions the cached product card fragments
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            # Listing filters and keyset sorts (see explain_queries)
+            models.Index(fields=['category', 'price'], name='product_category_price_idx'),
+            models.Index(fields=['price'], name='product_price_idx'),
+            models.Index(fields=['created_at'], name='product_created_idx'),
+            models.Index(fields=['name'], name='product_name_idx'),
+            # Incremental catalog snapshot refreshes (see catalog_snapshot)
+            models.Index(fields=['updated_at'], name='product_updated_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -26,7 +44,21 @@ class Product(models.Model):
         """Return either uploaded image or URL"""
         if self.image and hasattr(self.image, 'url'):
             return self.image.url
-        return self.image_url or 'https://images.unsplash.com/photo-1505740420928-5e560c06d30e?ixlib=rb-4.0.3&auto=format&fit=crop&w=500&q=80'
+        return self.image_url or DEFAULT_PRODUCT_IMAGE
+    
+    def get_image_variants(self):
+        """WebP renditions of the product image as {width: url}"""
+        if not hasattr(self, '_image_variants'):
+            self._image_variants = images.get_variants(self)
+        return self._image_variants
+    
+    def get_thumbnail_url(self, width=320):
+        """Smallest rendition at least `width` wide, falling back to the original image"""
+        return images.pick(self.get_image_variants(), width) or self.get_image_url()
+    
+    def get_image_srcset(self):
+        """srcset value listing every rendition, empty if there are none"""
+        return images.srcset(self.get_image_variants())
     
     def to_json(self):
         """Convert product to JSON for API"""
@@ -41,18 +73,58 @@ class Product(models.Model):
             'created_at': self.created_at.strftime('%Y-%m-%d'),
         }
 
+class FacetCount(models.Model):
+    """Precomputed product count per (category, price bucket) for the listing sidebar"""
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    price_bucket = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('category', 'price_bucket')
+    
+    def __str__(self):
+        return f"{self.category_id}/{self.price_bucket}: {self.count}"
+
 class Cart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.IntegerField(default=1)
     added_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        # One line per product; adding again raises the quantity
+        unique_together = ('user', 'product')
+    
     def __str__(self):
         return f"{self.quantity} x {self.product.name} ({self.user.username})"
     
     def total_price(self):
         return self.product.price * self.quantity
 
+class StockReservation(models.Model):
+    """Time-limited hold on product stock for a user's cart or Buy Now"""
+    KIND_CHOICES = [
+        ('cart', 'Cart'),
+        ('buy_now', 'Buy Now'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='cart')
+    quantity = models.IntegerField()
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ('user', 'product', 'kind')
+        indexes = [
+            # Covers the active-holds SUM per product
+            models.Index(fields=['product', 'expires_at', 'quantity'], name='reservation_active_idx'),
+            models.Index(fields=['expires_at'], name='reservation_expiry_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} held for {self.user_id} until {self.expires_at}"
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -67,10 +139,24 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     shipping_address = models.TextField()
+    # Written at checkout so the order history list never reads OrderItem:
+    # total quantity, and the first few lines as {name, thumbnail, quantity, price, total}
+    item_count = models.PositiveIntegerField(default=0)
+    item_summary = models.JSONField(default=list, blank=True)
+    
+    class Meta:
+        indexes = [
+            # Order history, newest first
+            models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"Order #{self.id} - {self.user.username}"
     
+    def more_items(self):
+        """Quantity not listed in item_summary"""
+        return self.item_count - sum(line['quantity'] for line in self.item_summary)
+    
     def get_status_display_with_color(self):
         """Return status with Bootstrap color class"""
         colors = {
@@ -92,4 +178,41 @@ class OrderItem(models.Model):
         return f"{self.quantity} x {self.product.name} (Order #{self.order.id})"
     
     def total_price(self):
-        return self.price * self.quantity
\ No newline at end of file
+        return self.price * self.quantity
+
+class CoPurchase(models.Model):
+    """Number of orders containing both products; each pair is stored both ways"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    other = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('product', 'other')
+    
+    def __str__(self):
+        return f"{self.product_id} + {self.other_id}: {self.count}"
+
+class RelatedProduct(models.Model):
+    """A product's top co-purchased neighbours by rank, rebuilt by mine_related_products"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    count = models.IntegerField()
+    
+    class Meta:
+        # Also the index product_detail reads through
+        unique_together = ('product', 'rank')
+    
+    def __str__(self):
+        return f"{self.product_id} #{self.rank}: {self.related_id}"
+
+class CoPurchaseRun(models.Model):
+    """One mined batch of orders; the latest last_order_id is where the next run starts"""
+    last_order_id = models.IntegerField()
+    orders = models.IntegerField()
+    # Set once the batch's products have been re-ranked into RelatedProduct
+    reranked = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.orders} orders up to #{self.last_order_id}"
\ No newline at end of file
@@ -0,0 +1,52 @@
+// Set on the <script> tag by order_confirmation.html
+const orderId = document.currentScript.dataset.orderId;
+
+// Copy tracking number
+function copyTrackingNumber() {
+    const trackingNumber = document.querySelector('.tracking-number span').textContent;
+    navigator.clipboard.writeText(trackingNumber).then(() => {
+        const btn = event.currentTarget;
+        const originalText = btn.innerHTML;
+
+        btn.innerHTML = '<i class="fas fa-check"></i> Copied!';
+        btn.style.background = '#10b981';
+        btn.style.color = 'white';
+
+        setTimeout(() => {
+            btn.innerHTML = originalText;
+            btn.style.background = '';
+            btn.style.color = '';
+        }, 2000);
+    });
+}
+
+// Print order confirmation
+function printOrder() {
+    window.print();
+}
+
+// Share order
+function shareOrder() {
+    if (navigator.share) {
+        navigator.share({
+            title: 'My Order from ShopEasy',
+            text: `I just placed an order #${orderId} on ShopEasy!`,
+            url: window.location.href
+        });
+    } else {
+        alert('Share this URL: ' + window.location.href);
+    }
+}
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function() {
+    // Add print button if needed
+    const actionButtons = document.querySelector('.action-buttons');
+    const printBtn = document.createElement('button');
+    printBtn.className = 'btn';
+    printBtn.innerHTML = '<i class="fas fa-print"></i> Print Invoice';
+    printBtn.onclick = printOrder;
+    printBtn.style.background = '#e5e7eb';
+    printBtn.style.color = 'var(--dark)';
+    actionButtons.appendChild(printBtn);
+});
@@ -0,0 +1,108 @@
+// View order details
+function viewOrderDetails(orderId) {
+    const modal = document.getElementById('orderDetailsModal');
+    const modalBody = document.getElementById('modalBody');
+
+    // Show loading
+    modalBody.innerHTML = `
+        <div style="text-align: center; padding: 2rem;">
+            <i class="fas fa-spinner fa-spin fa-2x"></i>
+            <p style="margin-top: 1rem;">Loading order details...</p>
+        </div>
+    `;
+
+    modal.classList.add('active');
+
+    // In a real application, you would fetch order details from the server
+    // For now, we'll show static data
+    setTimeout(() => {
+        modalBody.innerHTML = `
+            <div class="order-details">
+                <h3 style="margin-bottom: 1rem; color: var(--dark);">Order #${orderId.toString().padStart(8, '0')}</h3>
+
+                <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; margin: 2rem 0;">
+                    <div style="background: #f8fafc; padding: 1rem; border-radius: 8px;">
+                        <strong>Order Date</strong>
+                        <p style="margin-top: 0.5rem;">${new Date().toLocaleDateString()}</p>
+                    </div>
+                    <div style="background: #f8fafc; padding: 1rem; border-radius: 8px;">
+                        <strong>Status</strong>
+                        <p style="margin-top: 0.5rem;">
+                            <span class="order-status status-delivered" style="display: inline-block; padding: 0.3rem 0.8rem;">Delivered</span>
+                        </p>
+                    </div>
+                    <div style="background: #f8fafc; padding: 1rem; border-radius: 8px;">
+                        <strong>Total Amount</strong>
+                        <p style="margin-top: 0.5rem; color: var(--primary); font-weight: 600;">$149.99</p>
+                    </div>
+                </div>
+
+                <h4 style="margin: 1.5rem 0 1rem;">Items</h4>
+                <div class="order-items">
+                    <!-- Sample items would go here -->
+                </div>
+
+                <h4 style="margin: 1.5rem 0 1rem;">Shipping Information</h4>
+                <div style="background: #f8fafc; padding: 1rem; border-radius: 8px;">
+                    <p>123 Main St, City, State 12345</p>
+                </div>
+            </div>
+        `;
+    }, 500);
+}
+
+// Close modal
+function closeModal() {
+    document.getElementById('orderDetailsModal').classList.remove('active');
+}
+
+// Close modal when clicking outside
+document.getElementById('orderDetailsModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        closeModal();
+    }
+});
+
+// Cancel order
+function cancelOrder(orderId) {
+    if (confirm('Are you sure you want to cancel this order?')) {
+        // In a real application, you would send a request to cancel the order
+        alert(`Order #${orderId} has been cancelled.`);
+
+        // Reload the page or update the UI
+        setTimeout(() => {
+            window.location.reload();
+        }, 1000);
+    }
+}
+
+// Track order
+function trackOrder(orderId) {
+    alert(`Tracking order #${orderId}. In a real application, this would show tracking details.`);
+}
+
+// Apply filters
+function applyFilters() {
+    const statusFilter = document.getElementById('statusFilter').value;
+    const orderCards = document.querySelectorAll('.order-card');
+
+    orderCards.forEach(card => {
+        if (statusFilter === 'all' || card.dataset.status === statusFilter) {
+            card.style.display = 'block';
+        } else {
+            card.style.display = 'none';
+        }
+    });
+}
+
+// Initialize filters
+document.addEventListener('DOMContentLoaded', function() {
+    // Initialize filter dropdowns
+    const urlParams = new URLSearchParams(window.location.search);
+    const status = urlParams.get('status');
+
+    if (status) {
+        document.getElementById('statusFilter').value = status;
+        applyFilters();
+    }
+});
@@ -0,0 +1,117 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import product_cache, reservations
+from .models import Order, OrderItem, Product
+
+FREE_SHIPPING_THRESHOLD = Decimal('50')
+SHIPPING_FEE = Decimal('5.00')
+TAX_RATE = Decimal('0.10')
+
+# Order lines copied onto Order.item_summary for the order history list
+SUMMARY_ITEMS = 3
+
+
+def order_totals(subtotal):
+    """Return (shipping, tax, total) for a subtotal"""
+    subtotal = Decimal(subtotal)
+    shipping = Decimal('0.00') if subtotal >= FREE_SHIPPING_THRESHOLD else SHIPPING_FEE
+    tax = (subtotal * TAX_RATE).quantize(Decimal('0.01'))
+    return shipping, tax, subtotal + shipping + tax
+
+
+def _invalidate_products(product_ids):
+    for product_id in product_ids:
+        product_cache.invalidate_product(product_id)
+    # Listings show stock too, without a catalog version bump
+    product_cache.touch_catalog()
+
+
+def order_summary(lines):
+    """(item_count, item_summary) for (product, quantity) lines, as stored on Order"""
+    summary = [
+        {
+            'name': product.name,
+            'thumbnail': product.get_thumbnail_url(160),
+            'quantity': quantity,
+            'price': str(product.price),
+            'total': str(product.price * quantity),
+        }
+        for product, quantity in lines[:SUMMARY_ITEMS]
+    ]
+    return sum(quantity for product, quantity in lines), summary
+
+
+class OutOfStockError(Exception):
+    """Raised when a line can't be filled; the whole order is rolled back"""
+
+    def __init__(self, product, requested, available):
+        self.product = product
+        self.requested = requested
+        self.available = available
+        super().__init__(f'Only {available} of {product.name} left, {requested} requested')
+
+
+def place_order(user, lines, total_amount, shipping_address, cart_items=None, hold_kind='cart'):
+    """
+    Create an order from (product, quantity) lines in a single transaction.
+
+    Stock is taken with one conditional ``UPDATE ... SET stock = stock - n
+    WHERE stock - <other active holds> >= n`` per product, so two
+    buyers racing for the last unit can't both succeed: the loser matches
+    no row and gets OutOfStockError with nothing written. Order items go in
+    with one bulk_create, and ``cart_items`` (if given) and the user's
+    ``hold_kind`` reservations are removed in the same transaction. The
+    order's item_count/item_summary are filled in from the lines.
+    """
+    # Merge duplicate products and lock rows in a stable order
+    quantities = {}
+    products = {}
+    for product, quantity in lines:
+        quantities[product.id] = quantities.get(product.id, 0) + quantity
+        products[product.id] = product
+
+    # Before the transaction: thumbnail URLs may be read from storage
+    item_count, item_summary = order_summary(lines)
+
+    with transaction.atomic():
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            taken = Product.objects.filter(
+                id=product_id, stock__gte=quantity + reservations.others_reserved(user, hold_kind)
+            ).update(stock=F('stock') - quantity, updated_at=timezone.now())
+            if not taken:
+                current = Product.objects.filter(id=product_id).first()
+                available = reservations.available_quantity(current, user, hold_kind) if current else 0
+                raise OutOfStockError(products[product_id], quantity, available)
+
+        order = Order.objects.create(
+            user=user,
+            total_amount=total_amount,
+            shipping_address=shipping_address,
+            status='pending',
+            item_count=item_count,
+            item_summary=item_summary,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=product,
+                quantity=quantity,
+                price=product.price
+            )
+            for product, quantity in lines
+        ])
+
+        if cart_items is not None:
+            cart_items.delete()
+        reservations.release(user, list(quantities), kind=hold_kind)
+
+        # Cached products carry their stock level
+        product_ids = list(quantities)
+        transaction.on_commit(lambda: _invalidate_products(product_ids))
+
+    return order
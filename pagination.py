@@ -0,0 +1,147 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+
+
+def _cursor_value(value):
+    """JSON-safe form of a sort key without losing precision"""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPage:
+    """One page of results plus opaque cursors for its neighbours"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over a queryset ordered by one column plus ``id``.
+
+    Each page is fetched with a ``WHERE (field, id) > (last_field, last_id)``
+    seek instead of an OFFSET, so deep pages cost the same as the first one
+    and only ``per_page + 1`` rows are ever materialized.
+    """
+
+    def __init__(self, queryset, field='id', descending=False, per_page=24):
+        self.queryset = queryset
+        self.field = field
+        self.descending = descending
+        self.per_page = per_page
+
+    def encode_cursor(self, obj, direction):
+        value = _cursor_value(getattr(obj, self.field))
+        payload = json.dumps([self.field, direction, value, obj.pk])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """
+        Return (direction, value, pk) with value and pk converted to their
+        fields' types, or None for missing, foreign or tampered cursors
+        """
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            field, direction, value, pk = json.loads(base64.urlsafe_b64decode(padded))
+        except (ValueError, TypeError, binascii.Error):
+            return None
+        if field != self.field or direction not in ('next', 'prev'):
+            return None
+        meta = self.queryset.model._meta
+        try:
+            value = meta.get_field(field).to_python(value)
+            pk = meta.pk.to_python(pk)
+        except (ValidationError, ValueError, TypeError):
+            return None
+        if value is None or pk is None:
+            return None
+        if isinstance(value, datetime.datetime) and timezone.is_naive(value):
+            return None
+        return direction, value, pk
+
+    def _ordering(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        return [f'{prefix}{self.field}', f'{prefix}id']
+
+    def _seek(self, value, pk, reverse=False):
+        """Rows strictly after (value, pk) in the requested direction"""
+        descending = self.descending != reverse
+        op = 'lt' if descending else 'gt'
+        if self.field == 'id':
+            return Q(**{f'id__{op}': pk})
+        return (
+            Q(**{f'{self.field}__{op}': value}) |
+            Q(**{self.field: value, f'id__{op}': pk})
+        )
+
+    def _page_queryset(self, decoded):
+        """The per_page + 1 rows to fetch for a decoded cursor"""
+        limit = self.per_page + 1
+        if decoded is None:
+            return self.queryset.order_by(*self._ordering())[:limit]
+        direction, value, pk = decoded
+        reverse = direction == 'prev'
+        return (
+            self.queryset.filter(self._seek(value, pk, reverse))
+            .order_by(*self._ordering(reverse))[:limit]
+        )
+
+    def _build_page(self, rows, decoded):
+        extra = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if decoded is None:
+            has_more, has_before = extra, False
+        elif decoded[0] == 'prev':
+            rows.reverse()
+            has_more, has_before = True, extra
+        else:
+            has_more, has_before = extra, True
+
+        next_cursor = previous_cursor = None
+        if rows and has_more:
+            next_cursor = self.encode_cursor(rows[-1], 'next')
+        if rows and has_before:
+            previous_cursor = self.encode_cursor(rows[0], 'prev')
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None):
+        decoded = self.decode_cursor(cursor)
+        return self._build_page(list(self._page_queryset(decoded)), decoded)
+
+    def page_from_rows(self, rows, cursor=None):
+        """Page from up to per_page + 1 rows found elsewhere, in this paginator's order after ``cursor``"""
+        return self._build_page(list(rows), self.decode_cursor(cursor))
+
+    async def aget_page(self, cursor=None):
+        decoded = self.decode_cursor(cursor)
+        return self._build_page([obj async for obj in self._page_queryset(decoded)], decoded)
@@ -0,0 +1,284 @@
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Max
+from django.http import Http404
+from django.utils import timezone
+
+from .models import Product
+
+CATALOG_VERSION_KEY = 'catalog-version'
+CATALOG_MODIFIED_KEY = 'catalog-modified'
+
+# How long a worker waits for another worker to fill a key before querying itself
+FILL_WAIT = 2.0
+FILL_POLL_INTERVAL = 0.05
+
+# Per-process tier in front of the shared cache
+_local = LocMemCache('shopeasy-product-cache', {
+    'TIMEOUT': getattr(settings, 'PRODUCT_CACHE_LOCAL_TIMEOUT', 5),
+    'OPTIONS': {'MAX_ENTRIES': getattr(settings, 'PRODUCT_CACHE_LOCAL_MAX_ENTRIES', 1000)},
+})
+
+# In-process single flight: product key -> Event set once the leader has filled it
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Async single flight: product key -> Future resolved by the coroutine filling it
+_ainflight = {}
+
+
+def _shared():
+    return caches[getattr(settings, 'PRODUCT_CACHE_ALIAS', 'default')]
+
+
+def get_catalog_version():
+    """Current catalog version, shared by every worker"""
+    version = _local.get(CATALOG_VERSION_KEY)
+    if version is None:
+        shared = _shared()
+        version = shared.get(CATALOG_VERSION_KEY)
+        if version is None:
+            # Start from the clock so an evicted counter never reuses old keys
+            shared.add(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+            version = shared.get(CATALOG_VERSION_KEY)
+        _local.set(CATALOG_VERSION_KEY, version)
+    return version
+
+
+async def aget_catalog_version():
+    version = _local.get(CATALOG_VERSION_KEY)
+    if version is None:
+        shared = _shared()
+        version = await shared.aget(CATALOG_VERSION_KEY)
+        if version is None:
+            await shared.aadd(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+            version = await shared.aget(CATALOG_VERSION_KEY)
+        _local.set(CATALOG_VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached product at once"""
+    shared = _shared()
+    try:
+        shared.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        shared.add(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+    _local.delete(CATALOG_VERSION_KEY)
+    touch_catalog()
+
+
+def touch_catalog():
+    """Record that some product changed now, e.g. stock taken by an order"""
+    _shared().set(CATALOG_MODIFIED_KEY, timezone.now(), None)
+
+
+def get_catalog_modified():
+    """
+    When any product last changed, for listing validators.
+
+    Writers overwrite the stamp; a reader only fills a missing one from
+    the newest updated_at with add(), so it can't undo a newer write.
+    """
+    shared = _shared()
+    modified = shared.get(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        modified = Product.objects.aggregate(newest=Max('updated_at'))['newest']
+        if modified is not None:
+            shared.add(CATALOG_MODIFIED_KEY, modified, None)
+            modified = shared.get(CATALOG_MODIFIED_KEY, modified)
+    return modified
+
+
+async def aget_catalog_modified():
+    shared = _shared()
+    modified = await shared.aget(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        modified = (await Product.objects.aaggregate(newest=Max('updated_at')))['newest']
+        if modified is not None:
+            await shared.aadd(CATALOG_MODIFIED_KEY, modified, None)
+            modified = await shared.aget(CATALOG_MODIFIED_KEY, modified)
+    return modified
+
+
+def _product_key(product_id, version=None):
+    if version is None:
+        version = get_catalog_version()
+    return f'product:{version}:{product_id}'
+
+
+def invalidate_product(product_id):
+    """Drop one product from both cache tiers"""
+    key = _product_key(product_id)
+    _local.delete(key)
+    _shared().delete(key)
+
+
+def _load(product_id):
+    return Product.objects.select_related('category').filter(id=product_id).first()
+
+
+def _fill(key, product_id):
+    """
+    Load a product from the database with stampede protection.
+
+    Only one thread per process queries for a given key and the rest wait
+    for it. Across processes a short-lived lock in the shared cache lets a
+    single worker refill the key while the others poll for the result.
+    """
+    with _inflight_lock:
+        event = _inflight.get(key)
+        leader = event is None
+        if leader:
+            event = _inflight[key] = threading.Event()
+
+    if not leader:
+        event.wait(FILL_WAIT)
+        product = _local.get(key)
+        return product if product is not None else _load(product_id)
+
+    shared = _shared()
+    lock_key = f'{key}:lock'
+    locked = shared.add(lock_key, 1, FILL_WAIT)
+    try:
+        if not locked:
+            deadline = time.monotonic() + FILL_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(FILL_POLL_INTERVAL)
+                product = shared.get(key)
+                if product is not None:
+                    _local.set(key, product)
+                    return product
+
+        product = _load(product_id)
+        if product is not None:
+            shared.set(key, product, getattr(settings, 'PRODUCT_CACHE_TIMEOUT', 600))
+            _local.set(key, product)
+        return product
+    finally:
+        if locked:
+            shared.delete(lock_key)
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        event.set()
+
+
+def get_product(product_id):
+    """Return the product with its category loaded, or None if it doesn't exist"""
+    key = _product_key(product_id)
+    product = _local.get(key)
+    if product is None:
+        product = _shared().get(key)
+        if product is not None:
+            _local.set(key, product)
+        else:
+            product = _fill(key, product_id)
+    return product
+
+
+async def _aload(product_id):
+    return await Product.objects.select_related('category').filter(id=product_id).afirst()
+
+
+async def _afill(key, product_id):
+    """Async counterpart of _fill, coalescing concurrent misses on one event loop"""
+    future = _ainflight.get(key)
+    if future is not None:
+        try:
+            product = await asyncio.wait_for(asyncio.shield(future), FILL_WAIT)
+        except asyncio.TimeoutError:
+            product = None
+        return product if product is not None else await _aload(product_id)
+
+    future = _ainflight[key] = asyncio.get_running_loop().create_future()
+    shared = _shared()
+    lock_key = f'{key}:lock'
+    product = None
+    locked = await shared.aadd(lock_key, 1, FILL_WAIT)
+    try:
+        if not locked:
+            deadline = time.monotonic() + FILL_WAIT
+            while product is None and time.monotonic() < deadline:
+                await asyncio.sleep(FILL_POLL_INTERVAL)
+                product = await shared.aget(key)
+            if product is not None:
+                _local.set(key, product)
+                return product
+
+        product = await _aload(product_id)
+        if product is not None:
+            await shared.aset(key, product, getattr(settings, 'PRODUCT_CACHE_TIMEOUT', 600))
+            _local.set(key, product)
+        return product
+    finally:
+        if locked:
+            await shared.adelete(lock_key)
+        _ainflight.pop(key, None)
+        if not future.done():
+            future.set_result(product)
+
+
+async def aget_product(product_id):
+    """Async get_product for the async storefront views"""
+    key = _product_key(product_id, await aget_catalog_version())
+    product = _local.get(key)
+    if product is None:
+        product = await _shared().aget(key)
+        if product is not None:
+            _local.set(key, product)
+        else:
+            product = await _afill(key, product_id)
+    return product
+
+
+def get_products(product_ids):
+    """
+    Return {id: product} for the given ids, skipping ones that don't exist.
+
+    Each tier is consulted with one multi-key lookup and whatever is still
+    missing is loaded with a single query, then written back to the cache.
+    """
+    version = get_catalog_version()
+    keys = {_product_key(product_id, version): product_id for product_id in product_ids}
+
+    found = _local.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        shared_hits = _shared().get_many(missing)
+        if shared_hits:
+            _local.set_many(shared_hits)
+            found.update(shared_hits)
+        missing = [key for key in missing if key not in shared_hits]
+
+    if missing:
+        loaded = {
+            _product_key(product.id, version): product
+            for product in Product.objects.select_related('category').filter(
+                id__in=[keys[key] for key in missing]
+            )
+        }
+        if loaded:
+            _shared().set_many(loaded, getattr(settings, 'PRODUCT_CACHE_TIMEOUT', 600))
+            _local.set_many(loaded)
+            found.update(loaded)
+
+    return {keys[key]: product for key, product in found.items()}
+
+
+def get_product_or_404(product_id):
+    product = get_product(product_id)
+    if product is None:
+        raise Http404('No Product matches the given query.')
+    return product
+
+
+async def aget_product_or_404(product_id):
+    product = await aget_product(product_id)
+    if product is None:
+        raise Http404('No Product matches the given query.')
+    return product
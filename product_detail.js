@@ -0,0 +1,198 @@
+    // Change main image
+    function changeImage(imageUrl) {
+        const mainImage = document.getElementById('mainImage');
+        // Renditions of the original image would override the new src
+        mainImage.removeAttribute('srcset');
+        mainImage.src = imageUrl;
+
+        // Update active thumbnail
+        document.querySelectorAll('.thumbnail').forEach(thumb => {
+            thumb.classList.remove('active');
+        });
+        event.currentTarget.classList.add('active');
+    }
+
+    // Switch tabs
+    function switchTab(tabName) {
+        // Hide all tabs
+        document.querySelectorAll('.tab-content').forEach(tab => {
+            tab.classList.remove('active');
+        });
+
+        // Remove active class from all tab buttons
+        document.querySelectorAll('.tab').forEach(tab => {
+            tab.classList.remove('active');
+        });
+
+        // Show selected tab
+        document.getElementById(tabName).classList.add('active');
+        event.currentTarget.classList.add('active');
+    }
+
+    // Quantity controls
+  function increaseQuantity() {
+    const quantityInput = document.getElementById('quantity');
+    const maxQuantity = parseInt(quantityInput.dataset.max);
+    const currentValue = parseInt(quantityInput.value);
+
+    if (currentValue < maxQuantity) {
+        quantityInput.value = currentValue + 1;
+        updateFormQuantities();
+    }
+}
+
+
+    function decreaseQuantity() {
+        const quantityInput = document.getElementById('quantity');
+        const currentValue = parseInt(quantityInput.value);
+
+        if (currentValue > 1) {
+            quantityInput.value = currentValue - 1;
+            updateFormQuantities();
+        }
+    }
+
+    // Update form hidden inputs
+    function updateFormQuantities() {
+        const quantity = document.getElementById('quantity').value;
+        document.getElementById('buyNowQuantity').value = quantity;
+        document.getElementById('addToCartQuantity').value = quantity;
+    }
+
+    // Color selection
+    function selectColor(colorCode, colorName) {
+        document.querySelectorAll('.color-option').forEach(option => {
+            option.classList.remove('active');
+        });
+        event.currentTarget.classList.add('active');
+
+        // In a real app, you would update product details based on color
+        console.log(`Selected color: ${colorName} (${colorCode})`);
+    }
+
+    // Size selection
+    document.querySelectorAll('.size-option').forEach(option => {
+        option.addEventListener('click', function() {
+            document.querySelectorAll('.size-option').forEach(opt => {
+                opt.classList.remove('active');
+            });
+            this.classList.add('active');
+
+            // In a real app, you would update product details based on size
+            console.log(`Selected size: ${this.textContent}`);
+        });
+    });
+
+    // Wishlist toggle
+    function toggleWishlist() {
+        const wishlistBtn = event.currentTarget;
+        const icon = wishlistBtn.querySelector('i');
+
+        if (wishlistBtn.classList.contains('active')) {
+            wishlistBtn.classList.remove('active');
+            icon.classList.remove('fas');
+            icon.classList.add('far');
+            showMessage('Removed from wishlist', 'success');
+        } else {
+            wishlistBtn.classList.add('active');
+            icon.classList.remove('far');
+            icon.classList.add('fas');
+            showMessage('Added to wishlist', 'success');
+        }
+    }
+
+    // Notify when available
+    function notifyWhenAvailable() {
+        showMessage('We will notify you when this product is back in stock!', 'success');
+    }
+
+    // Show message
+    function showMessage(text, type) {
+        const messageDiv = document.createElement('div');
+        messageDiv.className = `message message-${type}`;
+        messageDiv.innerHTML = `
+            <i class="fas fa-${type === 'error' ? 'exclamation-circle' : 'check-circle'}"></i>
+            ${text}
+        `;
+
+        // Insert after breadcrumb
+        const container = document.querySelector('.container');
+        const firstChild = container.firstChild;
+        container.insertBefore(messageDiv, firstChild);
+
+        // Remove after 5 seconds
+        setTimeout(() => {
+            messageDiv.remove();
+        }, 5000);
+    }
+
+    // Form submissions
+    document.getElementById('buyNowForm')?.addEventListener('submit', function(e) {
+        const button = this.querySelector('button[type="submit"]');
+        const originalText = button.innerHTML;
+
+        // Show loading state
+        button.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Processing...';
+        button.disabled = true;
+
+        // In production, this would submit to your checkout endpoint
+        // For demo, we'll simulate a delay
+        setTimeout(() => {
+            showMessage('Redirecting to checkout...', 'success');
+
+            // Reset button
+            setTimeout(() => {
+                button.innerHTML = originalText;
+                button.disabled = false;
+
+                // In a real app, you would redirect to checkout
+                // window.location.href = "/checkout/?product=<id>&quantity=" + quantity;
+            }, 1000);
+        }, 1500);
+
+        // For demo, prevent actual form submission
+        e.preventDefault();
+    });
+
+    document.getElementById('addToCartForm')?.addEventListener('submit', function(e) {
+        const button = this.querySelector('button[type="submit"]');
+        const originalText = button.innerHTML;
+
+        // Show loading state
+        button.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Adding...';
+        button.disabled = true;
+
+        // In production, this would submit to your add-to-cart endpoint
+        // For demo, we'll simulate a delay
+        setTimeout(() => {
+            showMessage('Product added to cart!', 'success');
+
+            // Reset button
+            setTimeout(() => {
+                button.innerHTML = originalText;
+                button.disabled = false;
+
+                // In a real app, you might update cart count in header
+                // updateCartCount();
+            }, 1000);
+        }, 1000);
+
+        // For demo, prevent actual form submission
+        e.preventDefault();
+    });
+
+    // Initialize quantity sync
+    document.addEventListener('DOMContentLoaded', function() {
+        updateFormQuantities();
+
+        // Listen for manual quantity input
+        document.getElementById('quantity').addEventListener('input', updateFormQuantities);
+
+        // Initialize first color and size as active
+        if (!document.querySelector('.color-option.active')) {
+            document.querySelector('.color-option').classList.add('active');
+        }
+        if (!document.querySelector('.size-option.active')) {
+            document.querySelector('.size-option').classList.add('active');
+        }
+    });
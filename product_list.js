@@ -0,0 +1,66 @@
+// Filter functionality
+document.addEventListener('DOMContentLoaded', function() {
+    // Price range filter
+    const priceInputs = document.querySelectorAll('.price-input');
+    const applyFilterBtn = document.querySelector('.btn-primary[style*="width: 100%"]');
+
+    applyFilterBtn.addEventListener('click', function() {
+        const minPrice = priceInputs[0].value;
+        const maxPrice = priceInputs[1].value;
+
+        if (minPrice || maxPrice) {
+            let url = new URL(window.location.href);
+            if (minPrice) url.searchParams.set('min_price', minPrice);
+            if (maxPrice) url.searchParams.set('max_price', maxPrice);
+            url.searchParams.delete('cursor');
+            url.searchParams.delete('page');
+            window.location.href = url.toString();
+        }
+    });
+
+    // Sort functionality
+    const sortSelect = document.querySelector('.sort-select');
+    sortSelect.addEventListener('change', function() {
+        const sortValue = this.value.toLowerCase();
+        let url = new URL(window.location.href);
+        url.searchParams.delete('cursor');
+        url.searchParams.delete('page');
+
+        if (sortValue.includes('price low')) {
+            url.searchParams.set('sort', 'price_asc');
+        } else if (sortValue.includes('price high')) {
+            url.searchParams.set('sort', 'price_desc');
+        } else if (sortValue.includes('newest')) {
+            url.searchParams.set('sort', 'newest');
+        }
+
+        window.location.href = url.toString();
+    });
+
+    // Search on enter
+    const searchInput = document.querySelector('input[name="search"]');
+    searchInput.addEventListener('keypress', function(e) {
+        if (e.key === 'Enter') {
+            this.form.submit();
+        }
+    });
+
+    // Add to cart animation
+    const addToCartForms = document.querySelectorAll('form[action*="add-to-cart"]');
+    addToCartForms.forEach(form => {
+        form.addEventListener('submit', function(e) {
+            e.preventDefault();
+            const button = this.querySelector('button');
+            const originalText = button.innerHTML;
+
+            // Show loading state
+            button.innerHTML = '<i class="fas fa-spinner fa-spin"></i>';
+            button.disabled = true;
+
+            // Submit form after animation
+            setTimeout(() => {
+                this.submit();
+            }, 500);
+        });
+    });
+});
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from store import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product full-text search index'
+
+    def handle(self, *args, **kwargs):
+        if not search.index_available():
+            self.stdout.write(self.style.WARNING('Full-text search index is not available on this database.'))
+            return
+
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} products.'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from store import facets
+
+
+class Command(BaseCommand):
+    help = 'Recount the precomputed category and price facets'
+
+    def handle(self, *args, **kwargs):
+        cells = facets.refresh_facets()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {cells} facet counts.'))
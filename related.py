@@ -0,0 +1,152 @@
+from django.db import connection, transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from . import product_cache
+from .models import CoPurchase, CoPurchaseRun, Order, OrderItem, Product, RelatedProduct
+
+# Neighbours kept per product, and how many product_detail shows
+TOP_K = 8
+SHOWN = 4
+
+# Orders mined per transaction, and products per top-K rebuild query
+ORDER_BATCH = 5000
+PRODUCT_CHUNK = 500
+
+
+def related_products(product, limit=SHOWN):
+    """
+    Products most often bought with ``product``, best first.
+
+    One lookup on RelatedProduct's (product, rank) index; products with
+    fewer than ``limit`` neighbours (new, or never ordered) are topped up
+    from their category.
+    """
+    related = [
+        row.related for row in
+        RelatedProduct.objects.filter(product_id=product.id).select_related('related').order_by('rank')[:limit]
+    ]
+    if len(related) < limit:
+        exclude = [product.id] + [p.id for p in related]
+        related += Product.objects.filter(category_id=product.category_id).exclude(id__in=exclude)[:limit - len(related)]
+    return related
+
+
+async def arelated_products(product, limit=SHOWN):
+    """related_products for the async storefront"""
+    related = [
+        row.related async for row in
+        RelatedProduct.objects.filter(product_id=product.id).select_related('related').order_by('rank')[:limit]
+    ]
+    if len(related) < limit:
+        exclude = [product.id] + [p.id for p in related]
+        related += [
+            p async for p in
+            Product.objects.filter(category_id=product.category_id).exclude(id__in=exclude)[:limit - len(related)]
+        ]
+    return related
+
+
+def _pair_counts(first_order_id, last_order_id):
+    """{(product_id, other_id): orders} for orders in (first, last], both directions"""
+    rows = (
+        OrderItem.objects.filter(order_id__gt=first_order_id, order_id__lte=last_order_id)
+        .annotate(other=F('order__items__product_id'))
+        .exclude(other=F('product_id'))
+        .values('product_id', 'other')
+        .annotate(orders=Count('order_id', distinct=True))
+        .order_by()
+    )
+    return {(row['product_id'], row['other']): row['orders'] for row in rows}
+
+
+def _add_pairs(deltas):
+    """Add deltas onto the stored CoPurchase counts, inserting new pairs"""
+    table = connection.ops.quote_name(CoPurchase._meta.db_table)
+    count = connection.ops.quote_name('count')
+    # Both SQLite and PostgreSQL upsert this way; the ORM can only overwrite
+    sql = (
+        f'INSERT INTO {table} (product_id, other_id, {count}) VALUES (%s, %s, %s) '
+        f'ON CONFLICT (product_id, other_id) DO UPDATE SET {count} = {table}.{count} + excluded.{count}'
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(product_id, other_id, delta) for (product_id, other_id), delta in deltas.items()])
+
+
+def _rebuild_top_k(product_ids):
+    """Recompute RelatedProduct rows for up to PRODUCT_CHUNK products from CoPurchase"""
+    ranked = (
+        CoPurchase.objects.filter(product_id__in=product_ids)
+        .annotate(rank=Window(RowNumber(), partition_by=F('product_id'), order_by=[F('count').desc(), F('other_id')]))
+        .filter(rank__lte=TOP_K)
+        .values_list('product_id', 'other_id', 'count', 'rank')
+    )
+    rows = [
+        RelatedProduct(product_id=product_id, related_id=other_id, count=count, rank=rank)
+        for product_id, other_id, count, rank in ranked
+    ]
+    RelatedProduct.objects.filter(product_id__in=product_ids).delete()
+    RelatedProduct.objects.bulk_create(rows)
+
+
+def _rerank_pending():
+    """Re-rank every product ordered in runs not yet re-ranked; returns how many"""
+    pending = CoPurchaseRun.objects.filter(reranked=False)
+    last_pending = pending.order_by('-id').first()
+    if last_pending is None:
+        return 0
+    done = CoPurchaseRun.objects.filter(reranked=True).order_by('-id').first()
+    touched = sorted(set(
+        OrderItem.objects.filter(order_id__gt=done.last_order_id if done else 0, order_id__lte=last_pending.last_order_id)
+        .values_list('product_id', flat=True).distinct()
+    ))
+    for start in range(0, len(touched), PRODUCT_CHUNK):
+        with transaction.atomic():
+            _rebuild_top_k(touched[start:start + PRODUCT_CHUNK])
+    pending.filter(id__lte=last_pending.id).update(reranked=True)
+    return len(touched)
+
+
+def mine(batch_size=ORDER_BATCH):
+    """
+    Fold orders placed since the last run into the co-purchase tables.
+
+    Orders are read in id order, batch_size at a time; each batch adds its
+    pair counts to CoPurchase and records a CoPurchaseRun in one
+    transaction, so an interrupted run resumes where it stopped and no
+    order is counted twice. The top TOP_K neighbours of every product in
+    the mined orders are then re-ranked once, and the runs marked done;
+    a run cut short before that is re-ranked by the next one. Re-ranking
+    bumps the catalog version, which product detail ETags include.
+    Returns (orders mined, products re-ranked).
+    """
+    last_run = CoPurchaseRun.objects.order_by('-id').first()
+    position = last_run.last_order_id if last_run else 0
+    mined = 0
+
+    while True:
+        order_ids = list(Order.objects.filter(id__gt=position).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not order_ids:
+            break
+        end = order_ids[-1]
+        with transaction.atomic():
+            deltas = _pair_counts(position, end)
+            if deltas:
+                _add_pairs(deltas)
+            CoPurchaseRun.objects.create(last_order_id=end, orders=len(order_ids))
+        mined += len(order_ids)
+        position = end
+
+    reranked = _rerank_pending()
+    if reranked:
+        product_cache.bump_catalog_version()
+    return mined, reranked
+
+
+def reset():
+    """Forget everything mined, so the next mine() starts from the first order"""
+    with transaction.atomic():
+        RelatedProduct.objects.all().delete()
+        CoPurchase.objects.all().delete()
+        CoPurchaseRun.objects.all().delete()
+    product_cache.bump_catalog_version()
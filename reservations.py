@@ -0,0 +1,139 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import IntegerField, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import StockReservation
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'RESERVATION_TTL', 15 * 60))
+
+
+def _cache_key(product_id):
+    return f'reserved:{product_id}'
+
+
+def active_holds():
+    return StockReservation.objects.filter(expires_at__gt=timezone.now())
+
+
+def reserved_quantity(product_id):
+    """
+    Units of a product held by active reservations.
+
+    The SUM is answered from the (product, expires_at, quantity) index and
+    cached until the next hold change or the earliest hold expiry, so hot
+    products don't re-aggregate their holds on every request.
+    """
+    key = _cache_key(product_id)
+    reserved = cache.get(key)
+    if reserved is None:
+        totals = active_holds().filter(product_id=product_id).aggregate(
+            total=Sum('quantity'), next_expiry=Min('expires_at')
+        )
+        reserved = totals['total'] or 0
+        timeout = getattr(settings, 'RESERVATION_CACHE_TIMEOUT', 60)
+        if totals['next_expiry']:
+            until_expiry = (totals['next_expiry'] - timezone.now()).total_seconds()
+            timeout = max(1, min(timeout, int(until_expiry)))
+        cache.set(key, reserved, timeout)
+    return reserved
+
+
+def held_by(user, product_id, kind):
+    """Units of a product the user holds themselves with holds of one kind"""
+    return active_holds().filter(user=user, product_id=product_id, kind=kind).aggregate(
+        total=Sum('quantity')
+    )['total'] or 0
+
+
+def available_quantity(product, user=None, kind='cart'):
+    """
+    Stock minus every active hold except the user's own hold of ``kind``.
+
+    Only the kind being changed is credited back: a Buy Now hold is no
+    room for cart lines, nor the other way round.
+    """
+    available = product.stock - reserved_quantity(product.id)
+    if user is not None and user.is_authenticated:
+        available += held_by(user, product.id, kind)
+    return max(available, 0)
+
+
+def available_quantities(products, user, kind='cart'):
+    """available_quantity for many products, reading the user's holds in one query"""
+    held = dict(
+        active_holds().filter(user=user, kind=kind, product_id__in=[product.id for product in products])
+        .values_list('product_id', 'quantity')
+    )
+    return {
+        product.id: max(product.stock - reserved_quantity(product.id) + held.get(product.id, 0), 0)
+        for product in products
+    }
+
+
+def others_reserved(user, kind='cart'):
+    """SQL expression for units held by anyone but the user's ``kind`` hold, correlated to the outer Product"""
+    holds = (
+        active_holds()
+        .filter(product=OuterRef('pk'))
+        .exclude(user=user, kind=kind)
+        .order_by()
+        .values('product')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+    return Coalesce(Subquery(holds, output_field=IntegerField()), Value(0))
+
+
+def hold(user, product, quantity, kind='cart'):
+    """Create or refresh the user's hold on a product with a fresh TTL"""
+    StockReservation.objects.update_or_create(
+        user=user, product=product, kind=kind,
+        defaults={'quantity': quantity, 'expires_at': timezone.now() + _ttl()}
+    )
+    cache.delete(_cache_key(product.id))
+
+
+def hold_many(user, quantities, kind='cart'):
+    """hold() for many {product_id: quantity} at once, as one upsert"""
+    expires_at = timezone.now() + _ttl()
+    StockReservation.objects.bulk_create(
+        [
+            StockReservation(user=user, product_id=product_id, kind=kind, quantity=quantity, expires_at=expires_at)
+            for product_id, quantity in quantities.items()
+        ],
+        update_conflicts=True, unique_fields=['user', 'product', 'kind'], update_fields=['quantity', 'expires_at'],
+    )
+    cache.delete_many([_cache_key(product_id) for product_id in quantities])
+
+
+def release(user, product_ids=None, kind=None):
+    """Drop the user's holds, optionally limited to some products or one kind"""
+    holds = StockReservation.objects.filter(user=user)
+    if product_ids is not None:
+        holds = holds.filter(product_id__in=product_ids)
+    if kind is not None:
+        holds = holds.filter(kind=kind)
+    product_ids = list(holds.values_list('product_id', flat=True).distinct())
+    if product_ids:
+        holds.delete()
+        transaction.on_commit(lambda: cache.delete_many([_cache_key(pid) for pid in product_ids]))
+
+
+def expire_holds(batch_size=1000):
+    """Delete lapsed holds in bulk, returns how many were removed"""
+    removed = 0
+    while True:
+        expired = StockReservation.objects.filter(expires_at__lte=timezone.now())
+        batch = list(expired.values_list('id', 'product_id')[:batch_size])
+        if not batch:
+            return removed
+        StockReservation.objects.filter(id__in=[hold_id for hold_id, product_id in batch]).delete()
+        cache.delete_many({_cache_key(product_id) for hold_id, product_id in batch})
+        removed += len(batch)
@@ -0,0 +1,103 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# SQLite FTS5 table mirroring Product.name / Product.description (rowid = product id),
+# created by migration 0003 with a rank that weighs name matches above description ones
+SEARCH_TABLE = 'store_product_fts'
+
+MAX_SEARCH_TERMS = 8
+
+_index_available = None
+
+
+def index_available():
+    """Return True when the full-text index can be used on this database"""
+    global _index_available
+    if _index_available is None:
+        _index_available = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [SEARCH_TABLE]
+                )
+                _index_available = cursor.fetchone() is not None
+    return _index_available
+
+
+def build_match_expression(query):
+    """Turn free-form user input into a safe FTS5 prefix query"""
+    terms = re.findall(r'\w+', query.lower())[:MAX_SEARCH_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def index_product(product):
+    """Insert or refresh a single product in the index"""
+    if not index_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [product.pk])
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) VALUES (%s, %s, %s)",
+            [product.pk, product.name, product.description]
+        )
+
+
+def remove_product(product_id):
+    """Drop a product from the index"""
+    if not index_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [product_id])
+
+
+def rebuild_index():
+    """Repopulate the whole index from the product table, returns rows indexed"""
+    if not index_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) "
+            f"SELECT id, name, description FROM store_product"
+        )
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def search_products(queryset, query):
+    """
+    Restrict a Product queryset to matches for ``query``.
+
+    Matching ids come straight from the FTS index, so the cost scales with
+    the number of hits rather than the catalog size. Each result carries a
+    ``search_rank`` annotation (lower is better) for ordering.
+    """
+    match = build_match_expression(query)
+    if not match:
+        return queryset.none()
+
+    if not index_available():
+        # Fallback for databases without FTS5
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query)
+        )
+
+    table = queryset.model._meta.db_table
+    return queryset.filter(
+        id__in=RawSQL(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s",
+            (match,)
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f"SELECT rank FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s AND rowid = {table}.id",
+            (match,)
+        )
+    )
@@ -1,11 +1,103 @@
+import math
 import random
+import time
+from array import array
+from decimal import Decimal
+
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from store.models import Category, Product
+from django.db import transaction
+from store import facets, product_cache, related, search
+from store.orders import SUMMARY_ITEMS
+from store.models import Cart, Category, Order, OrderItem, Product
 from django.utils.text import slugify
 
+# --synthetic vocabulary per category: adjectives, nouns, price range
+SYNTHETIC_CATALOG = {
+    'Electronics': (
+        ['Wireless', 'Smart', 'Portable', 'Noise-Cancelling', 'Ultra HD', 'Bluetooth', 'Compact', 'Pro'],
+        ['Headphones', 'Speaker', 'Monitor', 'Charger', 'Camera', 'Keyboard', 'Tablet', 'Smartwatch', 'Router'],
+        (9, 2499),
+    ),
+    'Fashion': (
+        ['Classic', 'Slim Fit', 'Organic Cotton', 'Leather', 'Vintage', 'Waterproof', 'Lightweight', 'Knit'],
+        ['Jacket', 'Sneakers', 'Jeans', 'T-Shirt', 'Dress', 'Backpack', 'Sunglasses', 'Hoodie', 'Boots'],
+        (12, 399),
+    ),
+    'Home & Kitchen': (
+        ['Stainless Steel', 'Non-Stick', 'Ceramic', 'Bamboo', 'Programmable', 'Cordless', 'Glass', 'Cast Iron'],
+        ['Cookware Set', 'Blender', 'Coffee Maker', 'Knife Block', 'Vacuum', 'Lamp', 'Air Fryer', 'Kettle'],
+        (8, 899),
+    ),
+    'Books': (
+        ['Illustrated', 'Bestselling', 'Collected', 'Annotated', 'Beginner\'s', 'Complete', 'Pocket', 'Essential'],
+        ['Cookbook', 'Novel', 'Biography', 'Guide to Python', 'History of Rome', 'Poetry Collection', 'Atlas'],
+        (5, 79),
+    ),
+    'Sports & Outdoors': (
+        ['Insulated', 'Adjustable', 'Ultralight', 'All-Weather', 'Foldable', 'Carbon', 'Trail', 'Training'],
+        ['Yoga Mat', 'Dumbbell Set', 'Tent', 'Water Bottle', 'Bike Helmet', 'Running Shoes', 'Hiking Pack'],
+        (10, 1299),
+    ),
+    'Beauty & Health': (
+        ['Hydrating', 'Organic', 'Fragrance-Free', 'Vitamin C', 'Sensitive Skin', 'Travel Size', 'Daily'],
+        ['Face Serum', 'Moisturizer', 'Shampoo', 'Electric Toothbrush', 'Hair Dryer', 'Sunscreen', 'Perfume'],
+        (6, 499),
+    ),
+    'Toys & Games': (
+        ['Educational', 'Wooden', 'Remote Control', 'Deluxe', 'Family', 'Magnetic', 'Glow-in-the-Dark'],
+        ['Building Set', 'Puzzle', 'Board Game', 'Plush Toy', 'Drone', 'Train Set', 'Card Game', 'Doll House'],
+        (7, 349),
+    ),
+    'Automotive': (
+        ['Heavy Duty', 'Universal', 'Synthetic', 'Premium', 'All-Season', 'Portable', 'LED'],
+        ['Floor Mats', 'Jump Starter', 'Motor Oil', 'Wiper Blades', 'Dash Cam', 'Tire Inflator', 'Seat Covers'],
+        (9, 699),
+    ),
+}
+SYNTHETIC_BRANDS = [
+    'Acme', 'Northwind', 'Lumina', 'Vertex', 'Harbor & Pine', 'Zephyr', 'Kinetic', 'Aurora', 'Summit',
+    'Nimbus', 'Ironclad', 'Bloom', 'Polaris', 'Cobalt', 'Evergreen', 'Orbit', 'Atlas', 'Maple Row',
+]
+SYNTHETIC_BLURBS = [
+    'Built to last with a two-year warranty.',
+    'Rated five stars by thousands of customers.',
+    'Designed for everyday use at home or on the go.',
+    'Ships in recyclable packaging.',
+    'A customer favourite, now in new colours.',
+    'Tested to meet the highest quality standards.',
+]
+# Weighted towards completed orders, like a long-running shop
+ORDER_STATUSES = ['delivered'] * 6 + ['shipped'] * 2 + ['processing', 'pending', 'cancelled']
+
+# Shared by every synthetic shopper so seeding doesn't hash millions of passwords
+SYNTHETIC_PASSWORD = 'shopeasy-synthetic'
+
+
+def batches(rows, size):
+    """Split an iterable into lists of at most `size` items"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 class Command(BaseCommand):
-    help = 'Seed the database with 50+ sample products'
+    help = 'Seed the database with 50+ sample products, or a synthetic dataset of any size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bulk', action='store_true',
+                            help='Insert the sample products with batched bulk_create in one transaction')
+        parser.add_argument('--synthetic', type=int, metavar='N',
+                            help='Generate N synthetic products plus shoppers, carts and orders')
+        parser.add_argument('--users', type=int, help='Synthetic shoppers (default N / 20)')
+        parser.add_argument('--orders', type=int, help='Synthetic orders (default N / 4)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same dataset')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create batch')
 
     def handle(self, *args, **kwargs):
         # Create or get categories
@@ -36,7 +128,7 @@ class Command(BaseCommand):
                 'category': 'Electronics',
                 'price': 999.99,
                 'description': 'Latest iPhone with A17 Pro chip, titanium design, and advanced camera system.',
-                'image_url': 'C:\Users\Sunny\shopeasy\seed_images\electronics\iphone-15-pro-max.png',
+                'image_url': '',
                 'stock': 50
             },
             {
@@ -531,6 +623,13 @@ class Command(BaseCommand):
         # Combine all products
         all_products = products_data + additional_products
         
+        if kwargs['synthetic']:
+            self.seed_synthetic(kwargs, categories, all_products)
+            return
+        if kwargs['bulk']:
+            self.seed_bulk(all_products, categories, kwargs['batch_size'])
+            return
+        
         # Create products
         created_count = 0
         for product_data in all_products:
@@ -541,7 +640,7 @@ class Command(BaseCommand):
                         'category': categories[product_data['category']],
                         'price': product_data['price'],
                         'description': product_data['description'],
-                        'image': product_data['image_url'],
+                        'image_url': product_data['image_url'],
                         'stock': product_data['stock']
                     }
                 )
@@ -552,4 +651,177 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f"Error creating {product_data['name']}: {str(e)}"))
         
         self.stdout.write(self.style.SUCCESS(f'Successfully created {created_count} products!'))
-        self.stdout.write(self.style.SUCCESS(f'Total products in database: {Product.objects.count()}'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(f'Total products in database: {Product.objects.count()}'))
+    
+    def seed_bulk(self, all_products, categories, batch_size):
+        """Insert the sample products that don't exist yet with batched bulk_create"""
+        existing = set(Product.objects.values_list('name', flat=True))
+        products = [
+            Product(
+                name=product_data['name'],
+                category=categories[product_data['category']],
+                price=product_data['price'],
+                description=product_data['description'],
+                image_url=product_data['image_url'],
+                stock=product_data['stock']
+            )
+            for product_data in all_products
+            if product_data['name'] not in existing
+        ]
+        with transaction.atomic():
+            Product.objects.bulk_create(products, batch_size=batch_size)
+        self.finish_catalog()
+        
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {len(products)} products!'))
+        self.stdout.write(self.style.SUCCESS(f'Total products in database: {Product.objects.count()}'))
+    
+    def finish_catalog(self):
+        """bulk_create skips the save signals, so rebuild what they maintain"""
+        search.rebuild_index()
+        facets.refresh_facets()
+        product_cache.bump_catalog_version()
+    
+    def seed_synthetic(self, options, categories, all_products):
+        """
+        Generate a production-sized dataset from a fixed random seed.
+        
+        Products, shoppers, carts and orders are streamed into bulk_create
+        in batches, one transaction per table, so memory stays flat: only
+        product ids and prices are kept to build the carts and orders.
+        """
+        count = options['synthetic']
+        batch_size = options['batch_size']
+        rng = random.Random(options['seed'])
+        user_count = options['users'] if options['users'] is not None else max(1, count // 20)
+        order_count = options['orders'] if options['orders'] is not None else count // 4
+        
+        # Reuse the sample catalog's pictures for each category
+        image_urls = {}
+        for product_data in all_products:
+            if product_data['image_url'].startswith('http'):
+                image_urls.setdefault(product_data['category'], []).append(product_data['image_url'])
+        
+        started = time.monotonic()
+        product_ids = array('q')
+        product_cents = array('q')
+        with transaction.atomic():
+            rows = self.synthetic_products(rng, count, categories, image_urls)
+            for batch in batches(rows, batch_size):
+                for product in Product.objects.bulk_create(batch):
+                    product_ids.append(product.pk)
+                    product_cents.append(int(product.price * 100))
+        self.finish_catalog()
+        self.stdout.write(f'{len(product_ids)} products in {time.monotonic() - started:.1f}s')
+        
+        started = time.monotonic()
+        prefix = f"seed{options['seed']}-"
+        password = make_password(SYNTHETIC_PASSWORD)
+        with transaction.atomic():
+            users = (
+                User(username=f'{prefix}{i:07d}', email=f'{prefix}{i:07d}@example.com', password=password)
+                for i in range(user_count)
+            )
+            for batch in batches(users, batch_size):
+                User.objects.bulk_create(batch, ignore_conflicts=True)
+        user_ids = array('q', User.objects.filter(username__startswith=prefix).order_by('id').values_list('id', flat=True))
+        self.stdout.write(f'{len(user_ids)} shoppers in {time.monotonic() - started:.1f}s')
+        
+        if not product_ids or not user_ids:
+            return
+        
+        started = time.monotonic()
+        cart_count = 0
+        with transaction.atomic():
+            carts = self.synthetic_carts(rng, user_ids, product_ids)
+            for batch in batches(carts, batch_size):
+                Cart.objects.bulk_create(batch)
+                cart_count += len(batch)
+        self.stdout.write(f'{cart_count} cart rows in {time.monotonic() - started:.1f}s')
+        
+        started = time.monotonic()
+        item_count = 0
+        with transaction.atomic():
+            orders = self.synthetic_orders(rng, order_count, user_ids, product_ids, product_cents)
+            for batch in batches(orders, batch_size):
+                self.summarize_orders(batch)
+                Order.objects.bulk_create([order for order, order_items in batch])
+                items = []
+                for order, order_items in batch:
+                    for item in order_items:
+                        item.order = order
+                        items.append(item)
+                OrderItem.objects.bulk_create(items)
+                item_count += len(items)
+        self.stdout.write(f'{order_count} orders with {item_count} items in {time.monotonic() - started:.1f}s')
+        
+        started = time.monotonic()
+        mined, reranked = related.mine()
+        self.stdout.write(f'Related products for {reranked} products from {mined} orders in {time.monotonic() - started:.1f}s')
+        
+        self.stdout.write(self.style.SUCCESS(f'Total products in database: {Product.objects.count()}'))
+    
+    def synthetic_products(self, rng, count, categories, image_urls):
+        names = list(SYNTHETIC_CATALOG)
+        for i in range(count):
+            category = names[i % len(names)]
+            adjectives, nouns, (low, high) = SYNTHETIC_CATALOG[category]
+            brand = rng.choice(SYNTHETIC_BRANDS)
+            adjective = rng.choice(adjectives)
+            noun = rng.choice(nouns)
+            # Prices spread log-uniformly across the category's range, ending in .99
+            price = int(math.exp(rng.uniform(math.log(low), math.log(high))))
+            stock = rng.choices([0, rng.randint(1, 9), rng.randint(10, 500)], weights=[5, 15, 80])[0]
+            yield Product(
+                category=categories[category],
+                name=f'{brand} {adjective} {noun} {rng.choice("XSMPR")}{rng.randint(10, 999)}',
+                description=f'{adjective} {noun.lower()} by {brand}. {rng.choice(SYNTHETIC_BLURBS)}',
+                price=Decimal(price) + Decimal('0.99'),
+                image_url=rng.choice(image_urls.get(category, [''])),
+                stock=stock,
+            )
+    
+    def synthetic_carts(self, rng, user_ids, product_ids):
+        # About a third of shoppers have something in their cart
+        for user_id in user_ids:
+            if rng.random() < 0.3:
+                for product_id in rng.sample(product_ids, min(rng.randint(1, 5), len(product_ids))):
+                    yield Cart(user_id=user_id, product_id=product_id, quantity=rng.randint(1, 3))
+    
+    def summarize_orders(self, batch):
+        """Fill the order history summary that place_order would have written"""
+        ids = {item.product_id for order, order_items in batch for item in order_items[:SUMMARY_ITEMS]}
+        # Synthetic products only have image_url, so no renditions are made here
+        details = {pk: (name, image_url) for pk, name, image_url in
+                   Product.objects.filter(id__in=ids).values_list('id', 'name', 'image_url')}
+        for order, order_items in batch:
+            order.item_count = sum(item.quantity for item in order_items)
+            order.item_summary = [
+                {
+                    'name': details[item.product_id][0],
+                    'thumbnail': details[item.product_id][1] or '',
+                    'quantity': item.quantity,
+                    'price': str(item.price),
+                    'total': str(item.price * item.quantity),
+                }
+                for item in order_items[:SUMMARY_ITEMS]
+            ]
+    
+    def synthetic_orders(self, rng, count, user_ids, product_ids, product_cents):
+        for _ in range(count):
+            items = []
+            subtotal = 0
+            for index in rng.sample(range(len(product_ids)), min(rng.randint(1, 4), len(product_ids))):
+                quantity = rng.randint(1, 3)
+                items.append(OrderItem(
+                    product_id=product_ids[index],
+                    quantity=quantity,
+                    price=Decimal(product_cents[index]).scaleb(-2)
+                ))
+                subtotal += product_cents[index] * quantity
+            order = Order(
+                user_id=rng.choice(user_ids),
+                total_amount=Decimal(subtotal).scaleb(-2),
+                status=rng.choice(ORDER_STATUSES),
+                shipping_address=f'{rng.randint(1, 9999)} {rng.choice(SYNTHETIC_BRANDS)} Street, Springfield',
+            )
+            yield order, items
@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-your-secret-key-here'
@@ -20,12 +22,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'store.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'store.guest_cart.GuestCartMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -33,7 +37,8 @@ ROOT_URLCONF = 'shopeasy_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django templates, timed for the metrics middleware
+        'BACKEND': 'store.metrics.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -43,6 +48,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'store.context_processors.cart_context',  # Add this line
+                'store.context_processors.fragment_cache',
             ],
         },
     },
@@ -92,6 +98,111 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Page CSS/JS lives in store/static/store/. collectstatic copies it to
+# STATIC_ROOT under content-hashed names that can be cached forever.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'store.storage.HashedStaticStorage',
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Products per page on the catalog listing
+PRODUCTS_PER_PAGE = 24
+
+# Orders per page on the order history
+ORDERS_PER_PAGE = 10
+
+# Cache (point this at a shared backend such as Redis or Memcached in
+# production so invalidations reach every worker)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shopeasy',
+    },
+    # Sessions get their own cache, so product cards, cart summaries and
+    # throttle buckets can't evict logins and guest carts
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shopeasy-sessions',
+    },
+}
+
+# Sessions are read through the sessions cache and written to the database,
+# so a cache miss (eviction, another worker) costs one query, not a logout.
+# SHOPEASY_SESSION_CACHE_ONLY=1 skips the database entirely; it needs the
+# sessions cache pointed at a shared backend and is refused while that is
+# the per-process LocMemCache. Flash messages ride in a signed cookie
+# instead of the session
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_CACHE_ONLY = os.environ.get('SHOPEASY_SESSION_CACHE_ONLY') == '1'
+if SESSION_CACHE_ONLY and CACHES[SESSION_CACHE_ALIAS]['BACKEND'].endswith('.LocMemCache'):
+    raise ImproperlyConfigured(
+        'SHOPEASY_SESSION_CACHE_ONLY needs a shared cache for sessions, not LocMemCache'
+    )
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.cache' if SESSION_CACHE_ONLY
+    else 'django.contrib.sessions.backends.cached_db'
+)
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Seconds a cached cart count/subtotal lives without a cart change
+CART_SUMMARY_TIMEOUT = 300
+
+# Product cache: shared cache alias plus a short per-process tier in front
+PRODUCT_CACHE_ALIAS = 'default'
+PRODUCT_CACHE_TIMEOUT = 600
+PRODUCT_CACHE_LOCAL_TIMEOUT = 5
+
+# Serve unsearched listings from an in-memory NumPy snapshot per worker,
+# refreshed on catalog changes or after MAX_AGE seconds (needs numpy)
+CATALOG_SNAPSHOT = os.environ.get('SHOPEASY_CATALOG_SNAPSHOT') == '1'
+CATALOG_SNAPSHOT_MAX_AGE = 30
+
+# Template fragments (product cards, category nav) are keyed on product
+# updated_at or the catalog version; the timeout only bounds memory. A
+# card's actions row sits beside its cached fragment, never inside it,
+# because the add-to-cart form carries each visitor's CSRF token
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Product image renditions: how long their URLs stay cached, how long a
+# product whose renditions aren't built yet shows its original image
+# before the manifest is looked for again, and the callable
+# build_product_images downloads image_url sources with (swap in a stub
+# for tests)
+PRODUCT_IMAGE_CACHE_TIMEOUT = 24 * 60 * 60
+PRODUCT_IMAGE_RETRY_AFTER = 5 * 60
+PRODUCT_IMAGE_FETCHER = 'store.images.fetch_remote'
+
+# Stock reservations: how long cart/Buy Now holds last, and the longest
+# a product's reserved total is cached
+RESERVATION_TTL = 15 * 60
+RESERVATION_CACHE_TIMEOUT = 60
+
+# Serve home, product_list, product_detail and quick view with the async
+# views (only worthwhile under an ASGI server such as uvicorn)
+ASYNC_STOREFRONT = os.environ.get('SHOPEASY_ASYNC_STOREFRONT') == '1'
+
+# Login and registration throttling: token buckets per client IP and per
+# username in the shared cache, as (burst, seconds to refill the bucket).
+# Attempts beyond them get a 429 without any password hashing
+THROTTLE_RATES = {
+    'login-ip': (20, 60),
+    'login-user': (5, 60),
+    'register-ip': (5, 300),
+}
+
+# Request metrics served at /metrics: each worker process writes its totals
+# to METRICS_DIR every METRICS_FLUSH_INTERVAL seconds from a background
+# thread and a scrape sums every file. Empty METRICS_DIR on each deploy;
+# exited workers' files keep counting until then. Set METRICS_TOKEN to
+# require 'Authorization: Bearer <token>'
+METRICS_DIR = os.environ.get('SHOPEASY_METRICS_DIR', BASE_DIR / 'metrics')
+METRICS_FLUSH_INTERVAL = 1
+METRICS_TOKEN = os.environ.get('SHOPEASY_METRICS_TOKEN')
\ No newline at end of file
@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.contrib import messages
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cart_summary, facets, guest_cart, images, metrics, product_cache, search
+from .models import Category, Product
+
+
+@receiver(pre_save, sender=Product)
+def product_saving(sender, instance, update_fields=None, **kwargs):
+    """Record the facet cell a product is leaving"""
+    if update_fields is None or {'category', 'category_id', 'price'} & set(update_fields):
+        facets.remember_facet(instance)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the search index, facet counts, product cache and cart subtotals in sync with product edits"""
+    if update_fields is None or {'name', 'description'} & set(update_fields):
+        search.index_product(instance)
+    stored_price = instance.__dict__.pop('_stored_price', None)
+    if stored_price is not None and stored_price != Decimal(instance.price):
+        cart_summary.invalidate_product_carts(instance.pk)
+    facets.product_saved(instance, created)
+    product_cache.bump_catalog_version()
+    if instance.image and (update_fields is None or 'image' in update_fields):
+        # Pages only show renditions that already exist, so make them now
+        transaction.on_commit(lambda: images.build_variants(instance))
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    """Remove deleted products from the search index, facet counts and product cache"""
+    search.remove_product(instance.pk)
+    facets.product_deleted(instance)
+    product_cache.bump_catalog_version()
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, **kwargs):
+    """Product cards show the category name, so re-version the category's products"""
+    Product.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    """Cached products embed their category, so drop them all"""
+    product_cache.bump_catalog_version()
+
+
+@receiver(user_logged_in)
+def merge_guest_cart(sender, request, user, **kwargs):
+    """Carry the cart a visitor filled before logging in over to their account"""
+    if request is None:
+        return
+    for product, quantity in guest_cart.merge_into_cart(user, request):
+        messages.warning(
+            request, f'Sorry, only {quantity} of {product.name} available; your cart was adjusted.',
+            fail_silently=True,
+        )
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    """Count and time this connection's queries for the metrics middleware"""
+    metrics.instrument(connection)
@@ -0,0 +1,29 @@
+from django.contrib.staticfiles.storage import HashedFilesMixin, ManifestStaticFilesStorage, staticfiles_storage
+
+# Hashed names change whenever the content does, so they can be cached for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+_hashed_names = None
+
+
+class HashedStaticStorage(ManifestStaticFilesStorage):
+    """
+    Static files stored under content-hashed names (base.3f2a9c1e.css).
+
+    collectstatic writes the hashed copies and staticfiles.json; {% static %}
+    then resolves to the hashed name. Until the manifest exists (development,
+    tests) the source names are used rather than failing on a missing entry.
+    """
+
+    def url(self, name, force=False):
+        if not self.hashed_files and not force:
+            return super(HashedFilesMixin, self).url(name)
+        return super().url(name, force)
+
+
+def is_hashed(path):
+    """True if path is a content-hashed name from the collectstatic manifest"""
+    global _hashed_names
+    if _hashed_names is None:
+        _hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+    return path in _hashed_names
@@ -1,3 +1,895 @@
-from django.test import TestCase
+"""
+Per-view benchmarks with query budgets, and functional tests of the store.
+
+Every URL in urls.py is requested BENCH_ITERATIONS times (after one
+unmeasured warm-up) against a catalog made by ``seed_products --synthetic``.
+Each view declares a query budget, the most SQL queries a single request
+may run; the suite fails when a view goes over it. Latency percentiles and
+query counts are written to BENCH_RESULTS as JSON. When BENCH_BASELINE
+names an earlier results file, a view also fails if its median latency
+grew by more than BENCH_REGRESSION_THRESHOLD or it runs more queries than
+before. The median is compared because tail percentiles over a few dozen
+requests mostly measure GC pauses and scheduler noise. A replayed login
+flood checks that throttled attempts never reach the password hasher; its
+CPU time goes to BENCH_RESULTS too. The StoreTestCase classes after the
+benchmarks check results rather than speed, on a handful of products:
+search ranking, facet counts, cursors, conditional GETs, the cart API,
+stock holds and the rest.
+
+    BENCH_BASELINE=bench_baseline.json python manage.py test store
+
+Environment:
+    BENCH_ITERATIONS             measured requests per view (default 20)
+    BENCH_PRODUCTS               synthetic catalog size (default 2000)
+    BENCH_RESULTS                results file (default bench_results.json)
+    BENCH_BASELINE               results file to compare against (optional)
+    BENCH_REGRESSION_THRESHOLD   allowed median slowdown, 0.5 = 50% (default 0.5)
+"""
+import base64
+import datetime
+import io
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern
+from django.utils import timezone
+from PIL import Image
+
+from . import cart_summary, facets, guest_cart, images, metrics, related, reservations, search, throttle, urls
+from .pagination import KeysetPaginator
+from .models import Cart, Category, Order, OrderItem, Product, RelatedProduct, StockReservation
+from .orders import OutOfStockError, order_summary, place_order
+
+ITERATIONS = int(os.environ.get('BENCH_ITERATIONS', 20))
+PRODUCTS = int(os.environ.get('BENCH_PRODUCTS', 2000))
+RESULTS_PATH = os.environ.get('BENCH_RESULTS', 'bench_results.json')
+BASELINE_PATH = os.environ.get('BENCH_BASELINE')
+REGRESSION_THRESHOLD = float(os.environ.get('BENCH_REGRESSION_THRESHOLD', 0.5))
+
+# Slowdowns smaller than this are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 5.0
+
+# URL names with no benchmark: static_file only serves collectstatic output
+UNBENCHMARKED = {'static_file'}
+
+PASSWORD = 'bench-password'
+
+# The test client's address, which every benchmark request comes from
+CLIENT_IP = '127.0.0.1'
+
+# Logins replayed by the flood benchmark, and the burst it lets through
+FLOOD_ATTEMPTS = 100
+FLOOD_BURST = 3
+
+
+def stub_image_fetcher(url):
+    """Stands in for images.fetch_remote so the suite never touches the network"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), 'orange').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def failing_image_fetcher(url):
+    """A fetcher for checks that pages never download images"""
+    raise AssertionError(f'Fetched {url} while rendering')
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ViewBenchmarkTests(TestCase):
+    """Request every storefront URL, checking query budgets and latency"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(
+            MEDIA_ROOT=cls.media_root, PRODUCT_IMAGE_FETCHER='store.tests.stub_image_fetcher',
+            METRICS_DIR=os.path.join(cls.media_root, 'metrics'),
+        )
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_products', synthetic=PRODUCTS, seed=7, stdout=io.StringIO())
+        cls.user = User.objects.create_user('bench', 'bench@example.com', PASSWORD)
+        cls.product = Product.objects.order_by('id').first()
+        cls.others = list(Product.objects.exclude(id=cls.product.id).order_by('id')[:3])
+        Product.objects.filter(id__in=[cls.product.id] + [p.id for p in cls.others]).update(stock=10 ** 6)
+        cls.order = cls.make_order()
+        # More than a page of history
+        for _ in range(12):
+            cls.make_order(status='delivered')
+        # Gives the product detail page a full set of bought-together products
+        bundle = list(Product.objects.exclude(id=cls.product.id).order_by('-id')[:related.SHOWN])
+        cls.make_order(status='delivered', products=[cls.product] + bundle)
+        related.mine()
+        cls.unordered = Product.objects.exclude(
+            id__in=RelatedProduct.objects.values('product_id')
+        ).order_by('id').first()
+
+    @classmethod
+    def make_order(cls, status='pending', products=None):
+        products = products or cls.others
+        item_count, item_summary = order_summary([(product, 1) for product in products])
+        order = Order.objects.create(
+            user=cls.user, total_amount=0, shipping_address='1 Bench Street', status=status,
+            item_count=item_count, item_summary=item_summary,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=1, price=product.price)
+            for product in products
+        ])
+        return order
+
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        if getattr(cls, 'results', None):
+            with open(RESULTS_PATH, 'w') as f:
+                json.dump({
+                    'generated_at': timezone.now().isoformat(),
+                    'products': PRODUCTS,
+                    'iterations': ITERATIONS,
+                    'views': cls.results,
+                    'login_flood': getattr(cls, 'login_flood', None),
+                }, f, indent=2, sort_keys=True)
+
+    # Setup steps, run unmeasured before each request
+
+    def anonymous(self):
+        self.client.logout()
+
+    def logged_in(self):
+        self.client.force_login(self.user)
+
+    def catalog_snapshot(self):
+        # Stays on for the rest of the run; only product_list reads it
+        self.anonymous()
+        if not getattr(settings, 'CATALOG_SNAPSHOT', False):
+            snapshot = override_settings(CATALOG_SNAPSHOT=True)
+            snapshot.enable()
+            self.addCleanup(snapshot.disable)
+
+    def full_buckets(self):
+        # The login and register cases would otherwise throttle themselves
+        self.anonymous()
+        throttle.reset('login-ip', CLIENT_IP)
+        throttle.reset('register-ip', CLIENT_IP)
+
+    def flooded(self):
+        self.anonymous()
+        while not throttle.take_token('login-ip', CLIENT_IP):
+            pass
+
+    def revalidate(self, path):
+        """Setup sending the ETag of an anonymous GET of path back as If-None-Match"""
+        def setup():
+            self.anonymous()
+            self.client.defaults['HTTP_IF_NONE_MATCH'] = self.client.get(path)['ETag']
+        return setup
+
+    def fill_cart(self):
+        self.logged_in()
+        for product in self.others:
+            Cart.objects.get_or_create(user=self.user, product=product)
+
+    def fill_guest_cart(self):
+        self.anonymous()
+        for product in self.others:
+            self.client.post(f'/add-to-cart/{product.id}/', {'quantity': 1})
+
+    def guest_cart_before_login(self):
+        self.full_buckets()
+        self.fill_guest_cart()
+
+    def start_buy_now(self):
+        self.logged_in()
+        self.client.post(f'/buy-now/{self.product.id}/', {'quantity': 1})
+
+    def cart_item_id(self):
+        item, created = Cart.objects.get_or_create(user=self.user, product=self.product)
+        return item.id
+
+    def registration(self):
+        username = f'shopper{User.objects.count()}'
+        return {
+            'username': username, 'email': f'{username}@example.com', 'password': PASSWORD,
+            'confirm_password': PASSWORD, 'first_name': 'Bench', 'last_name': 'User', 'terms': 'on',
+        }
+
+    def cases(self):
+        """
+        (name, url name, query budget, expected status, setup, method, path, data)
+
+        path and data may be callables, evaluated after setup for each request.
+        """
+        product_id = self.product.id
+        batch_ids = ','.join(str(product.id) for product in Product.objects.order_by('id')[:50])
+        checkout_form = {
+            'first_name': 'Bench', 'last_name': 'User', 'email': 'bench@example.com', 'phone': '555-0100',
+            'shipping_address': '1 Bench Street', 'city': 'Springfield', 'state': 'IL',
+            'zip_code': '62701', 'country': 'US', 'payment_method': 'credit_card',
+        }
+        return [
+            # Catalog
+            ('home', 'home', 1, 200, self.anonymous, 'get', '/', None),
+            ('product_list', 'product_list', 2, 200, self.anonymous, 'get', '/products/', None),
+            ('product_list_logged_in', 'product_list', 3, 200, self.logged_in, 'get', '/products/', None),
+            ('product_list_filtered', 'product_list', 4, 200, self.anonymous, 'get',
+             '/products/?category=1&min_price=10&max_price=200&sort=price_asc', None),
+            ('product_list_search', 'product_list', 4, 200, self.anonymous, 'get', '/products/?search=wireless', None),
+            ('product_list_not_modified', 'product_list', 0, 304, self.revalidate('/products/'), 'get',
+             '/products/', None),
+            ('product_list_snapshot', 'product_list', 0, 200, self.catalog_snapshot, 'get', '/products/', None),
+            ('product_list_snapshot_filtered', 'product_list', 0, 200, self.catalog_snapshot, 'get',
+             '/products/?category=1&min_price=10&max_price=200&sort=price_asc', None),
+            ('product_detail', 'product_detail', 1, 200, self.anonymous, 'get', f'/product/{product_id}/', None),
+            ('product_detail_not_modified', 'product_detail', 0, 304, self.revalidate(f'/product/{product_id}/'), 'get',
+             f'/product/{product_id}/', None),
+            # Never ordered, so related products are topped up from the category
+            ('product_detail_unordered', 'product_detail', 2, 200, self.anonymous, 'get',
+             f'/product/{self.unordered.id}/', None),
+            ('quick_view', 'product_quick_view_api', 0, 200, self.anonymous, 'get',
+             f'/api/product/{product_id}/quick-view/', None),
+            ('quick_view_not_modified', 'product_quick_view_api', 0, 304,
+             self.revalidate(f'/api/product/{product_id}/quick-view/'), 'get',
+             f'/api/product/{product_id}/quick-view/', None),
+            ('quick_view_batch', 'product_quick_view_batch_api', 0, 200, self.anonymous, 'get',
+             f'/api/products/quick-view/?ids={batch_ids}', None),
+            ('catalog_api', 'product_catalog_api', 2, 200, self.anonymous, 'get', '/api/products/?limit=200', None),
+            ('about', 'about', 0, 200, self.anonymous, 'get', '/about/', None),
+            ('contact', 'contact', 0, 200, self.anonymous, 'get', '/contact/', None),
+            ('metrics', 'metrics', 0, 200, self.anonymous, 'get', '/metrics', None),
+            # Accounts; logging in and out rotate the session, which is
+            # written to the database (cached_db)
+            ('login_page', 'login', 0, 200, self.anonymous, 'get', '/login/', None),
+            ('login', 'login', 9, 302, self.full_buckets, 'post', '/login/', {'username': 'bench', 'password': PASSWORD}),
+            # Caps the guest's lines at the stock left to the user (one read
+            # of their holds), then merges lines and holds in two upserts
+            ('login_with_guest_cart', 'login', 13, 302, self.guest_cart_before_login, 'post', '/login/',
+             {'username': 'bench', 'password': PASSWORD}),
+            # Turned away before authenticate() hashes anything
+            ('login_throttled', 'login', 0, 429, self.flooded, 'post', '/login/',
+             {'username': 'bench', 'password': 'guess'}),
+            ('register_page', 'register', 0, 200, self.anonymous, 'get', '/register/', None),
+            ('register', 'register', 11, 302, self.full_buckets, 'post', '/register/', self.registration),
+            ('logout', 'logout', 3, 302, self.logged_in, 'get', '/logout/', None),
+            # Orders
+            ('order_confirmation', 'order_confirmation', 4, 200, self.logged_in, 'get',
+             f'/order-confirmation/{self.order.id}/', None),
+            ('order_history', 'order_history', 2, 200, self.logged_in, 'get', '/orders/', None),
+            ('order_history_page_2', 'order_history', 2, 200, self.logged_in, 'get',
+             lambda: f"/orders/?cursor={self.client.get('/orders/').context['page'].next_cursor}", None),
+            # Cart
+            ('cart', 'cart', 5, 200, self.fill_cart, 'get', '/cart/', None),
+            ('add_to_cart', 'add_to_cart', 10, 302, self.logged_in, 'post',
+             f'/add-to-cart/{product_id}/', {'quantity': 1}),
+            ('update_cart_item', 'update_cart_item', 10, 302, self.logged_in, 'post',
+             lambda: f'/update-cart/{self.cart_item_id()}/', {'quantity': 2}),
+            ('remove_cart_item', 'remove_cart_item', 4, 302, self.logged_in, 'post',
+             lambda: f'/remove-cart/{self.cart_item_id()}/', None),
+            ('clear_cart', 'clear_cart', 3, 302, self.fill_cart, 'post', '/clear-cart/', None),
+            # Guest carts live in a signed cookie, so changes write no rows
+            ('cart_guest', 'cart', 0, 200, self.fill_guest_cart, 'get', '/cart/', None),
+            ('add_to_cart_guest', 'add_to_cart', 1, 302, self.anonymous, 'post',
+             f'/add-to-cart/{product_id}/', {'quantity': 1}),
+            ('update_cart_item_guest', 'update_cart_item', 0, 302, self.fill_guest_cart, 'post',
+             f'/update-cart/{self.others[0].id}/', {'quantity': 2}),
+            # The cart page's JSON endpoints answer with the line and totals
+            ('update_cart_item_api', 'update_cart_item_api', 10, 200, self.fill_cart, 'post',
+             lambda: f'/api/cart/{self.cart_item_id()}/', {'quantity': 2}),
+            ('remove_cart_item_api', 'remove_cart_item_api', 5, 200, self.fill_cart, 'post',
+             lambda: f'/api/cart/{self.cart_item_id()}/remove/', None),
+            ('clear_cart_api', 'clear_cart_api', 4, 200, self.fill_cart, 'post', '/api/cart/clear/', None),
+            ('update_cart_item_api_guest', 'update_cart_item_api', 0, 200, self.fill_guest_cart, 'post',
+             f'/api/cart/{self.others[0].id}/', {'quantity': 2}),
+            # Checkout
+            ('checkout_page', 'checkout', 2, 200, self.fill_cart, 'get', '/checkout/', None),
+            ('checkout', 'checkout', 11, 302, self.fill_cart, 'post', '/checkout/', checkout_form),
+            ('buy_now', 'buy_now', 8, 302, self.logged_in, 'post', f'/buy-now/{product_id}/', {'quantity': 1}),
+            ('express_checkout_page', 'express_checkout', 2, 200, self.start_buy_now, 'get', '/express-checkout/', None),
+            ('express_checkout', 'express_checkout', 9, 302, self.start_buy_now, 'post',
+             '/express-checkout/', {'shipping_address': '1 Bench Street'}),
+            ('cancel_order', 'cancel_order', 16, 302, self.logged_in, 'post',
+             lambda: f'/orders/cancel/{self.make_order().id}/', None),
+        ]
+
+    def measure(self, setup, method, path, data, expected_status):
+        """Warm up once, then time ITERATIONS requests; returns (sorted latencies in ms, most queries)"""
+        latencies = []
+        queries = 0
+        for i in range(ITERATIONS + 1):
+            # Headers a setup adds to the client last for one request
+            defaults = dict(self.client.defaults)
+            setup()
+            request_path = path() if callable(path) else path
+            request_data = data() if callable(data) else data
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(self.client, method)(request_path, request_data)
+                if hasattr(response, 'streaming_content'):
+                    b''.join(response.streaming_content)
+                elapsed = (time.perf_counter() - started) * 1000
+            self.client.defaults = defaults
+            self.assertEqual(response.status_code, expected_status, f'{method.upper()} {request_path}')
+            if expected_status == 302:
+                self.assertFalse(response.url.startswith('/login/'), f'{request_path} redirected to login')
+            if i:
+                latencies.append(elapsed)
+                queries = max(queries, len(captured))
+        return sorted(latencies), queries
+
+    def test_every_url_is_benchmarked(self):
+        names = {pattern.name for pattern in urls.urlpatterns if isinstance(pattern, URLPattern)}
+        covered = {case[1] for case in self.cases()}
+        self.assertEqual(names - covered - UNBENCHMARKED, set(), 'URLs without a benchmark case')
+
+    def test_login_flood_cpu_is_bounded(self):
+        """A login flood from one address hashes FLOOD_BURST passwords, not one per attempt"""
+        self.full_buckets()
+        hashed = make_password(PASSWORD)
+        started = time.process_time()
+        for _ in range(FLOOD_BURST):
+            check_password('guess', hashed)
+        hash_seconds = (time.process_time() - started) / FLOOD_BURST
+
+        rates = dict(settings.THROTTLE_RATES, **{'login-ip': (FLOOD_BURST, 60)})
+        with override_settings(THROTTLE_RATES=rates):
+            started = time.process_time()
+            statuses = [
+                self.client.post('/login/', {'username': f'victim{i}', 'password': 'guess'}).status_code
+                for i in range(FLOOD_ATTEMPTS)
+            ]
+            cpu_seconds = time.process_time() - started
+
+        type(self).login_flood = {
+            'attempts': FLOOD_ATTEMPTS,
+            'throttled': statuses.count(429),
+            'cpu_ms': round(cpu_seconds * 1000, 3),
+            'unthrottled_estimate_ms': round(FLOOD_ATTEMPTS * hash_seconds * 1000, 3),
+        }
+        self.assertEqual(statuses.count(429), FLOOD_ATTEMPTS - FLOOD_BURST)
+        # Twice the burst's hashing leaves room for request overhead and
+        # timer noise while staying far below one hash per attempt
+        self.assertLess(cpu_seconds, 2 * FLOOD_BURST * hash_seconds)
+
+    def test_views_within_budget(self):
+        baseline = {}
+        if BASELINE_PATH:
+            with open(BASELINE_PATH) as f:
+                baseline = json.load(f)['views']
+
+        type(self).results = {}
+        for name, url_name, budget, expected_status, setup, method, path, data in self.cases():
+            with self.subTest(view=name):
+                latencies, queries = self.measure(setup, method, path, data, expected_status)
+                result = {
+                    'url_name': url_name,
+                    'queries': queries,
+                    'query_budget': budget,
+                    'mean_ms': round(statistics.mean(latencies), 3),
+                    'p50_ms': round(percentile(latencies, 50), 3),
+                    'p95_ms': round(percentile(latencies, 95), 3),
+                    'p99_ms': round(percentile(latencies, 99), 3),
+                }
+                self.results[name] = result
+
+                self.assertLessEqual(queries, budget, f'{name} ran {queries} queries, budget is {budget}')
+
+                previous = baseline.get(name)
+                if previous:
+                    self.assertLessEqual(
+                        queries, previous['queries'],
+                        f"{name} now runs {queries} queries, baseline ran {previous['queries']}"
+                    )
+                    allowed = max(previous['p50_ms'] * (1 + REGRESSION_THRESHOLD), previous['p50_ms'] + NOISE_FLOOR_MS)
+                    self.assertLessEqual(
+                        result['p50_ms'], allowed,
+                        f"{name} median {result['p50_ms']}ms regressed from {previous['p50_ms']}ms"
+                    )
+
+
+def encode_payload(payload):
+    """A cursor as KeysetPaginator encodes one, around any payload"""
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+@override_settings(PRODUCT_IMAGE_FETCHER='store.tests.stub_image_fetcher')
+class StoreTestCase(TestCase):
+    """A handful of products in two categories, for checking results rather than speed"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('shopper', 'shopper@example.com', PASSWORD)
+        cls.other_user = User.objects.create_user('other', 'other@example.com', PASSWORD)
+        cls.audio = Category.objects.create(name='Audio')
+        cls.books = Category.objects.create(name='Books')
+
+    def setUp(self):
+        cache.clear()
+
+    def make_product(self, name, price, category=None, stock=10, description=''):
+        return Product.objects.create(
+            name=name, price=price, category=category or self.audio, stock=stock,
+            description=description or name,
+        )
+
+
+class KeysetPaginationTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        # Equal prices, so pages must break ties on id
+        self.products = [self.make_product(f'Item {i}', 10 + i // 2) for i in range(7)]
+        self.paginator = KeysetPaginator(Product.objects.all(), 'price', False, per_page=3)
+
+    def test_pages_walk_forward_and_back(self):
+        first = self.paginator.get_page()
+        second = self.paginator.get_page(first.next_cursor)
+        third = self.paginator.get_page(second.next_cursor)
+        self.assertEqual([p.id for p in first], [p.id for p in self.products[:3]])
+        self.assertEqual([p.id for p in second], [p.id for p in self.products[3:6]])
+        self.assertEqual([p.id for p in third], [self.products[6].id])
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+
+        back = self.paginator.get_page(third.previous_cursor)
+        self.assertEqual([p.id for p in back], [p.id for p in second])
+        self.assertTrue(back.has_next())
+        self.assertEqual([p.id for p in self.paginator.get_page(back.previous_cursor)], [p.id for p in first])
+
+    def test_tampered_cursors_start_over(self):
+        cursors = [
+            'not-a-cursor',
+            encode_payload(['price', 'next', 'abc', 1]),
+            encode_payload(['price', 'next', '10.00', 'x']),
+            encode_payload(['price', 'next', None, 1]),
+            encode_payload(['price', 'next', 'NaN', 1]),
+            encode_payload(['price', 'sideways', '10.00', 1]),
+            encode_payload(['name', 'next', '10.00', 1]),
+        ]
+        first = [p.id for p in self.paginator.get_page()]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(self.paginator.decode_cursor(cursor))
+                self.assertEqual([p.id for p in self.paginator.get_page(cursor)], first)
+
+    def test_tampered_cursors_on_listing(self):
+        cursors = [
+            encode_payload(['created_at', 'next', 'yesterday', 1]),
+            encode_payload(['created_at', 'next', 5, 1]),
+            encode_payload(['created_at', 'next', '2024-01-01T00:00:00', 1]),
+        ]
+        # Both the SQL path and the in-memory snapshot (when NumPy is installed)
+        for snapshot in (False, True):
+            for cursor in cursors:
+                with self.subTest(snapshot=snapshot, cursor=cursor), override_settings(CATALOG_SNAPSHOT=snapshot):
+                    response = self.client.get('/products/', {'sort': 'newest', 'cursor': cursor})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertFalse(response.context['page'].has_previous())
+
+
+class CartSummaryTests(StoreTestCase):
+    def test_price_change_refreshes_cached_subtotal(self):
+        product = self.make_product('Headphones', '20.00')
+        untouched = self.make_product('Speaker', '5.00')
+        Cart.objects.create(user=self.user, product=product, quantity=2)
+        Cart.objects.create(user=self.other_user, product=untouched, quantity=1)
+        self.assertEqual(cart_summary.get_cart_summary(self.user)['subtotal'], Decimal('40.00'))
+        self.assertEqual(cart_summary.get_cart_summary(self.other_user)['subtotal'], Decimal('5.00'))
+
+        # Other edits keep the cached summary
+        product.stock = 5
+        product.save()
+        with self.assertNumQueries(0):
+            cart_summary.get_cart_summary(self.user)
+        product.price = Decimal('25.00')
+        product.save()
+        self.assertEqual(cart_summary.get_cart_summary(self.user)['subtotal'], Decimal('50.00'))
+        with self.assertNumQueries(0):
+            cart_summary.get_cart_summary(self.other_user)
+
+
+class ReservationTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product('Turntable', '100.00', stock=5)
+
+    def holds(self):
+        return sorted(StockReservation.objects.filter(product=self.product).values_list('user__username', 'kind', 'quantity'))
+
+    def test_others_holds_are_subtracted_and_own_credited_back(self):
+        reservations.hold(self.other_user, self.product, 2)
+        reservations.hold(self.user, self.product, 1)
+        self.assertEqual(reservations.reserved_quantity(self.product.id), 3)
+        self.assertEqual(reservations.available_quantity(self.product), 2)
+        self.assertEqual(reservations.available_quantity(self.product, self.user), 3)
+        self.assertEqual(reservations.available_quantity(self.product, self.other_user), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservations.release(self.other_user)
+        self.assertEqual(reservations.available_quantity(self.product, self.user), 5)
+
+    def test_expired_holds_free_their_stock(self):
+        reservations.hold(self.other_user, self.product, 4)
+        StockReservation.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        cache.clear()
+        self.assertEqual(reservations.available_quantity(self.product), 5)
+        self.assertEqual(reservations.expire_holds(), 1)
+
+    def test_buy_now_hold_is_no_room_for_the_cart(self):
+        self.client.force_login(self.user)
+        self.client.post(f'/buy-now/{self.product.id}/', {'quantity': 5})
+        self.client.post(f'/add-to-cart/{self.product.id}/', {'quantity': 5})
+        self.assertEqual(self.holds(), [('shopper', 'buy_now', 5)])
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+
+    def test_cart_hold_is_no_room_for_buy_now(self):
+        self.client.force_login(self.user)
+        self.client.post(f'/add-to-cart/{self.product.id}/', {'quantity': 4})
+        self.client.post(f'/buy-now/{self.product.id}/', {'quantity': 4})
+        self.assertEqual(self.holds(), [('shopper', 'cart', 4)])
+
+    def test_express_checkout_survives_a_cache_miss(self):
+        other = self.make_product('Amplifier', '60.00')
+        self.client.force_login(self.user)
+        self.client.post(f'/buy-now/{other.id}/', {'quantity': 1})
+        self.client.post(f'/buy-now/{self.product.id}/', {'quantity': 2})
+        cache.clear()
+        response = self.client.get('/express-checkout/')
+        self.assertEqual((response.context['product'], response.context['quantity']), (self.product, 2))
+
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/express-checkout/', {'shipping_address': '1 Test Street'})
+        order = Order.objects.get(user=self.user)
+        self.assertEqual(list(order.items.values_list('product__name', 'quantity')), [('Turntable', 2)])
+
+    def test_checkout_counts_the_users_other_holds(self):
+        reservations.hold(self.user, self.product, 3, kind='buy_now')
+        with self.assertRaises(OutOfStockError) as raised:
+            place_order(self.user, [(self.product, 3)], 300, '1 Test Street')
+        self.assertEqual(raised.exception.available, 2)
+        place_order(self.user, [(self.product, 3)], 300, '1 Test Street', hold_kind='buy_now')
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.holds()), (2, []))
+
+
+class ProductImageTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.product = self.make_product('Lamp', '30.00')
+        self.product.image_url = 'https://example.com/lamp.png'
+        self.product.save()
+
+    def test_pages_show_the_original_until_renditions_are_built(self):
+        with override_settings(PRODUCT_IMAGE_FETCHER='store.tests.failing_image_fetcher'):
+            html = self.client.get(f'/product/{self.product.id}/').content.decode()
+        self.assertIn('https://example.com/lamp.png', html)
+        self.assertEqual(images.get_variants(self.product), {})
+
+        call_command('build_product_images', stdout=io.StringIO())
+        cache.clear()
+        variants = images.get_variants(Product.objects.get(id=self.product.id))
+        self.assertEqual(list(variants), [64])
+        self.assertIn(variants[64], self.client.get('/products/').content.decode())
+
+    def test_racing_builds_keep_manifests_pointing_at_their_files(self):
+        first = images.generate_variants(self.product)
+        second = images.generate_variants(self.product)
+        self.assertNotEqual(first, second)
+        for variants in (first, second):
+            name = variants[64].removeprefix(settings.MEDIA_URL)
+            with self.subTest(name=name), Image.open(os.path.join(settings.MEDIA_ROOT, name)) as image:
+                self.assertEqual(image.format, 'WEBP')
+
+
+class MetricsStoreTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def store(self, flush_interval=60):
+        store = metrics.MetricsStore(self.directory, flush_interval)
+        self.addCleanup(store.stop)
+        return store
+
+    def test_workers_sharing_a_pid_keep_separate_files(self):
+        # As when a new worker reuses an exited worker's pid
+        first, second = self.store(), self.store()
+        first.inc('shopeasy_requests_total', {'view': 'home'}, 2)
+        second.inc('shopeasy_requests_total', {'view': 'home'}, 3)
+        first.flush(force=True)
+        second.flush(force=True)
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.endswith('.json')]), 2)
+        self.assertIn('shopeasy_requests_total{view="home"} 5', first.render())
+
+    def test_totals_are_flushed_off_the_request_thread(self):
+        store = self.store(flush_interval=0.05)
+        store.observe('shopeasy_request_queries', {'view': 'home'}, 3)
+        deadline = time.monotonic() + 5
+        while not (files := [name for name in os.listdir(self.directory) if name.endswith('.json')]):
+            self.assertLess(time.monotonic(), deadline, 'Nothing flushed')
+            time.sleep(0.01)
+        with open(os.path.join(self.directory, files[0])) as f:
+            samples = json.load(f)
+        self.assertIn(['shopeasy_request_queries', '_count', [['view', 'home']], None, 1], samples)
+
+
+class SessionStorageTests(StoreTestCase):
+    def test_sessions_outlive_evictions_from_their_cache(self):
+        product = self.make_product('Radio', '15.00')
+        self.client.post(f'/add-to-cart/{product.id}/', {'quantity': 2})
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        self.assertEqual(self.client.get('/cart/').context['cart_items'][0].quantity, 2)
+
+        self.client.login(username='shopper', password=PASSWORD)
+        cache.clear()
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        self.assertTrue(self.client.get('/cart/').context['user'].is_authenticated)
+
+
+class GuestCartTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product('Keyboard', '40.00', stock=5)
+        self.other = self.make_product('Mouse', '10.00', stock=5)
+
+    def log_in(self):
+        """Log in through the form; returns the warnings shown afterwards"""
+        response = self.client.post('/login/', {'username': 'shopper', 'password': PASSWORD}, follow=True)
+        return [str(message) for message in response.context['messages'] if message.level_tag == 'warning']
+
+    def cart(self):
+        return dict(Cart.objects.filter(user=self.user).values_list('product__name', 'quantity'))
+
+    def holds(self):
+        return dict(StockReservation.objects.filter(user=self.user, kind='cart').values_list('product__name', 'quantity'))
+
+    def guest_lines(self):
+        """The guest cart as the next request will read it from its cookie"""
+        request = RequestFactory().get('/')
+        request.COOKIES = {name: morsel.value for name, morsel in self.client.cookies.items()}
+        return guest_cart.get_lines(request)
+
+    def test_guest_carts_write_no_rows(self):
+        self.client.post(f'/add-to-cart/{self.product.id}/', {'quantity': 2})
+        self.client.post(f'/update-cart/{self.product.id}/', {'quantity': 3})
+        self.assertEqual(self.guest_lines(), {self.product.id: 3})
+        self.assertFalse(Session.objects.exists())
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.cookies)
+
+        # A cookie edited by hand is an empty cart
+        self.client.cookies[guest_cart.COOKIE_NAME] = self.client.cookies[guest_cart.COOKIE_NAME].value + 'x'
+        self.assertEqual(self.client.get('/cart/').context['cart_items'], [])
+
+    def test_login_adds_guest_lines_to_the_users_cart(self):
+        Cart.objects.create(user=self.user, product=self.product, quantity=1)
+        self.client.post(f'/add-to-cart/{self.product.id}/', {'quantity': 2})
+        self.client.post(f'/add-to-cart/{self.other.id}/', {'quantity': 1})
+        self.assertEqual(self.log_in(), [])
+        self.assertEqual(self.cart(), {'Keyboard': 3, 'Mouse': 1})
+        self.assertEqual(self.holds(), {'Keyboard': 3, 'Mouse': 1})
+        self.assertEqual(self.guest_lines(), {})
+        self.assertEqual(self.client.get('/cart/').context['cart_items'].count(), 2)
+
+    def test_merge_is_capped_at_available_stock(self):
+        self.client.post(f'/add-to-cart/{self.product.id}/', {'quantity': 3})
+        self.client.post(f'/add-to-cart/{self.other.id}/', {'quantity': 2})
+        # Meanwhile the user fills their cart on another device, and
+        # someone else holds most of the mice
+        Cart.objects.create(user=self.user, product=self.product, quantity=5)
+        reservations.hold(self.user, self.product, 5)
+        reservations.hold(self.other_user, self.other, 4)
+
+        self.assertEqual(len(self.log_in()), 2)
+        self.assertEqual(self.cart(), {'Keyboard': 5, 'Mouse': 1})
+        self.assertEqual(self.holds(), {'Keyboard': 5, 'Mouse': 1})
+        self.assertEqual(reservations.available_quantity(self.product, self.other_user), 0)
+
+    def test_guest_quantities_are_checked_against_stock(self):
+        reservations.hold(self.other_user, self.product, 3)
+        self.client.post(f'/add-to-cart/{self.product.id}/', {'quantity': 3})
+        self.assertEqual(self.guest_lines(), {})
+
+        self.client.post(f'/add-to-cart/{self.product.id}/', {'quantity': 2})
+        response = self.client.post(f'/api/cart/{self.product.id}/', {'quantity': 3})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['item']['quantity'], 2)
+        self.assertEqual(self.guest_lines(), {self.product.id: 2})
+
+
+class SearchTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.named = self.make_product('Wireless Headphones', '80.00', description='Over-ear, closed back')
+        self.described = self.make_product('Studio Monitor', '120.00', description='Pairs with wireless headphones')
+        self.unrelated = self.make_product('Cookbook', '20.00', category=self.books)
+
+    def listed(self, query, **params):
+        response = self.client.get('/products/', {'search': query, **params})
+        return [product.name for product in response.context['products']]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.listed('wireless headphones'), ['Wireless Headphones', 'Studio Monitor'])
+        self.assertEqual(self.listed('wire'), ['Wireless Headphones', 'Studio Monitor'])
+        self.assertEqual(self.listed('monitor'), ['Studio Monitor'])
+        self.assertEqual(self.listed('"; DROP TABLE'), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.unrelated.name = 'Wireless Charger'
+        self.unrelated.save()
+        self.described.delete()
+        self.assertEqual(self.listed('wireless', sort='price_asc'), ['Wireless Charger', 'Wireless Headphones'])
+
+    def test_substring_fallback_without_the_index(self):
+        with mock.patch.object(search, 'index_available', return_value=False):
+            self.assertEqual(self.listed('ireless', sort='name_asc'), ['Studio Monitor', 'Wireless Headphones'])
+            response = self.client.get('/products/', {'search': 'headphones'})
+        self.assertCountEqual([product.name for product in response.context['products']],
+                              ['Wireless Headphones', 'Studio Monitor'])
+        self.assertNotIn('search_rank', response.context['products'][0].__dict__)
+
+
+class FacetCountTests(StoreTestCase):
+    def counts(self):
+        """(category counts, non-empty bucket counts) from FacetCount, checked against a live count"""
+        precomputed = facets.get_facets()
+        self.assertEqual(precomputed, facets.get_facets(searched=Product.objects.all()))
+        return (
+            {category['name']: category['count'] for category in precomputed['categories']},
+            {bucket['label']: bucket['count'] for bucket in precomputed['price_buckets'] if bucket['count']},
+        )
+
+    def test_counts_follow_saves_and_deletes(self):
+        headphones = self.make_product('Headphones', '80.00')
+        self.make_product('Speaker', '30.00')
+        novel = self.make_product('Novel', '12.00', category=self.books)
+        self.assertEqual(self.counts(), (
+            {'Audio': 2, 'Books': 1},
+            {'Under $25': 1, '$25 - $50': 1, '$50 - $100': 1},
+        ))
+
+        headphones.price = '150.00'
+        headphones.save()
+        novel.category = self.audio
+        novel.save()
+        novel.stock = 3
+        novel.save(update_fields=['stock'])
+        self.assertEqual(self.counts(), (
+            {'Audio': 3, 'Books': 0},
+            {'Under $25': 1, '$25 - $50': 1, '$100 - $250': 1},
+        ))
+
+        headphones.delete()
+        self.assertEqual(self.counts(), ({'Audio': 2, 'Books': 0}, {'Under $25': 1, '$25 - $50': 1}))
+
+    def test_filters_leave_their_own_facet_alone(self):
+        self.make_product('Headphones', '80.00')
+        self.make_product('Novel', '12.00', category=self.books)
+        sidebar = facets.get_facets(category_id=self.books.id, min_price='50', max_price='99.99')
+        self.assertEqual([category['count'] for category in sidebar['categories']], [1, 0])
+        self.assertEqual([bucket['count'] for bucket in sidebar['price_buckets']][:3], [1, 0, 0])
+        self.assertTrue(sidebar['price_buckets'][2]['active'])
+
+    def test_listing_total_is_the_sidebars_count(self):
+        self.make_product('Headphones', '80.00', description='Wireless')
+        self.make_product('Speaker', '30.00', description='Wireless')
+        self.make_product('Novel', '12.00', category=self.books)
+        for params, expected in [
+            ({}, 3),
+            ({'category': self.audio.id}, 2),
+            ({'category': self.audio.id, 'min_price': '25', 'max_price': '49.99'}, 1),
+            ({'min_price': '20', 'max_price': '90'}, 2),
+            ({'search': 'wireless'}, 2),
+            ({'search': 'wireless', 'min_price': '50'}, 1),
+            ({'search': 'wireless', 'sort': 'price_asc', 'category': self.books.id}, 0),
+        ]:
+            with self.subTest(**params):
+                self.assertEqual(self.client.get('/products/', params).context['total_count'], expected)
+
+
+class ConditionalGetTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product('Headphones', '80.00')
+        self.url = f'/product/{self.product.id}/'
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_answer_304_without_sql(self):
+        for url in ('/products/', self.url, f'/api/product/{self.product.id}/quick-view/'):
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(0):
+                self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+    def test_etag_follows_the_viewer_and_their_cart(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.post(f'/add-to-cart/{self.product.id}/', {'quantity': 1})
+        # The success message is still waiting to be shown
+        self.assertEqual(self.revalidate(self.url, etag).status_code, 200)
+        response = self.revalidate(self.url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        self.client.force_login(self.user)
+        self.assertEqual(self.revalidate(self.url, etag).status_code, 200)
+
+    def test_etag_follows_the_product(self):
+        etag = self.client.get(self.url)['ETag']
+        self.product.price = '75.00'
+        self.product.save()
+        self.assertEqual(self.revalidate(self.url, etag).status_code, 200)
+
+
+class CartApiTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product('Keyboard', '40.00', stock=5)
+        self.client.force_login(self.user)
+        self.client.post(f'/add-to-cart/{self.product.id}/', {'quantity': 2})
+        self.line = Cart.objects.get(user=self.user, product=self.product)
+
+    def test_short_stock_answers_409_with_the_unchanged_line(self):
+        reservations.hold(self.other_user, self.product, 2)
+        response = self.client.post(f'/api/cart/{self.line.id}/', {'quantity': 4})
+        self.assertEqual(response.status_code, 409)
+        data = response.json()
+        self.assertEqual(data['item'], {
+            'id': self.line.id, 'product_id': self.product.id, 'quantity': 2, 'line_total': '80.00',
+        })
+        self.assertEqual((data['cart']['count'], data['cart']['subtotal']), (1, '80.00'))
+        self.assertEqual(Cart.objects.get(pk=self.line.pk).quantity, 2)
+
+        response = self.client.post(f'/api/cart/{self.line.id}/', {'quantity': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['item']['quantity'], 3)
+
+    def test_bad_quantity_answers_400(self):
+        response = self.client.post(f'/api/cart/{self.line.id}/', {'quantity': 'two'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Cart.objects.get(pk=self.line.pk).quantity, 2)
+
+
+class ExplainQueriesTests(StoreTestCase):
+    def test_explains_every_view_and_rolls_back(self):
+        self.make_product('Headphones', '80.00', description='Wireless')
+        self.make_product('Novel', '12.00', category=self.books)
+        out = io.StringIO()
+        call_command('explain_queries', '--fail', stdout=out)
+        for view in ('product_list', 'cart', 'checkout', 'order_history'):
+            self.assertIn(f'{view}: ', out.getvalue())
+        self.assertIn('No full table scans.', out.getvalue())
+        self.assertFalse(User.objects.filter(username='explain-queries').exists())
 
-# Create your tests here.
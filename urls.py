@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Read-only storefront views, served async under ASGI when enabled
+storefront = async_views if getattr(settings, 'ASYNC_STOREFRONT', False) else views
 
 urlpatterns = [
     # Public pages
-    path('', views.home, name='home'),
-    path('products/', views.product_list, name='product_list'),
-    path('product/<int:product_id>/', views.product_detail, name='product_detail'),
+    path('', storefront.home, name='home'),
+    path('products/', storefront.product_list, name='product_list'),
+    path('product/<int:product_id>/', storefront.product_detail, name='product_detail'),
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
     
@@ -20,6 +24,9 @@ urlpatterns = [
     path('update-cart/<int:item_id>/', views.update_cart_item, name='update_cart_item'),
     path('remove-cart/<int:item_id>/', views.remove_cart_item, name='remove_cart_item'),
     path('clear-cart/', views.clear_cart, name='clear_cart'),
+    path('api/cart/<int:item_id>/', views.update_cart_item_api, name='update_cart_item_api'),
+    path('api/cart/<int:item_id>/remove/', views.remove_cart_item_api, name='remove_cart_item_api'),
+    path('api/cart/clear/', views.clear_cart_api, name='clear_cart_api'),
     
     # Checkout and orders
     path('checkout/', views.checkout, name='checkout'),
@@ -30,5 +37,13 @@ urlpatterns = [
     path('orders/cancel/<int:order_id>/', views.cancel_order, name='cancel_order'),
     
     # API Endpoints
-    path('api/product/<int:product_id>/quick-view/', views.product_quick_view_api, name='product_quick_view_api'),
+    path('api/product/<int:product_id>/quick-view/', storefront.product_quick_view_api, name='product_quick_view_api'),
+    path('api/products/quick-view/', views.product_quick_view_batch_api, name='product_quick_view_batch_api'),
+    path('api/products/', views.product_catalog_api, name='product_catalog_api'),
+    
+    # Prometheus scrape endpoint
+    path('metrics', views.prometheus_metrics, name='metrics'),
+    
+    # Collected static bundles, for deployments without a separate static server
+    path(f"{settings.STATIC_URL.strip('/')}/<path:path>", views.static_file, name='static_file'),
 ]
@@ -1,153 +1,173 @@
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Q
-from .models import Product, Category, Cart, Order, OrderItem
+from django.views.decorators.http import require_POST
+from django.views.static import serve
+from .models import Product, Category, Cart, Order
+from . import catalog_api, catalog_snapshot, conditional, express_draft, facets, guest_cart, metrics, product_cache, related, reservations, search, throttle
+from .pagination import KeysetPaginator
+from .cart_summary import invalidate_cart_summary
+from .orders import OutOfStockError, order_totals, place_order
+from .storage import IMMUTABLE_MAX_AGE, is_hashed
+
+# sort parameter -> (keyset column, descending)
+PRODUCT_SORTS = {
+    'price_asc': ('price', False),
+    'price_desc': ('price', True),
+    'newest': ('created_at', True),
+    'name_asc': ('name', False),
+}
 
 def home(request):
     """Home page view"""
     featured_products = Product.objects.all()[:8]
     categories = Category.objects.all()[:6]
     
-    # Get cart count for authenticated users
-    cart_count = 0
-    if request.user.is_authenticated:
-        cart_count = Cart.objects.filter(user=request.user).count()
-    
     context = {
         'featured_products': featured_products,
         'categories': categories,
-        'cart_count': cart_count,
+        'catalog_version': product_cache.get_catalog_version(),
     }
     return render(request, 'store/home.html', context)
 
-def product_list(request):
-    """Product listing page with search and filtering"""
-    category_id = request.GET.get('category')
-    search_query = request.GET.get('search', '')
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
-    sort_by = request.GET.get('sort', '')
+def product_listing(params):
+    """
+    Parse listing parameters and build the filtered product queryset.
+    
+    No queries are run here so the sync and async listing views can share it.
+    """
+    listing = {
+        'category_id': params.get('category'),
+        'search_query': params.get('search', ''),
+        'min_price': params.get('min_price'),
+        'max_price': params.get('max_price'),
+        'sort_by': params.get('sort', ''),
+        'searched': None,
+        'ranked': False,
+    }
     
-    products = Product.objects.all()
+    products = Product.objects.select_related('category')
+    
+    # Search functionality (full-text index, best matches first)
+    if listing['search_query']:
+        products = search.search_products(products, listing['search_query'])
+        listing['searched'] = products
+        listing['ranked'] = not listing['sort_by'] and search.index_available()
     
     # Filter by category
-    if category_id:
-        products = products.filter(category_id=category_id)
-    
-    # Search functionality
-    if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) | 
-            Q(description__icontains=search_query)
-        )
+    if listing['category_id']:
+        products = products.filter(category_id=listing['category_id'])
     
     # Filter by price range
-    if min_price:
-        products = products.filter(price__gte=float(min_price))
-    if max_price:
-        products = products.filter(price__lte=float(max_price))
-    
-    # Sorting
-    if sort_by == 'price_asc':
-        products = products.order_by('price')
-    elif sort_by == 'price_desc':
-        products = products.order_by('-price')
-    elif sort_by == 'newest':
-        products = products.order_by('-created_at')
-    elif sort_by == 'name_asc':
-        products = products.order_by('name')
-    
-    categories = Category.objects.all()
-    
-    # Get cart count
-    cart_count = 0
-    if request.user.is_authenticated:
-        cart_count = Cart.objects.filter(user=request.user).count()
+    if listing['min_price']:
+        products = products.filter(price__gte=float(listing['min_price']))
+    if listing['max_price']:
+        products = products.filter(price__lte=float(listing['max_price']))
     
-    context = {
-        'products': products,
-        'categories': categories,
-        'selected_category': category_id,
-        'search_query': search_query,
-        'min_price': min_price,
-        'max_price': max_price,
-        'sort_by': sort_by,
-        'cart_count': cart_count,
+    listing['products'] = products
+    return listing
+
+def product_list_context(listing, sidebar, page, total_count):
+    return {
+        'products': page.object_list,
+        'page': page,
+        'total_count': total_count,
+        'categories': sidebar['categories'],
+        'category_total': sidebar['total'],
+        'price_buckets': sidebar['price_buckets'],
+        'selected_category': listing['category_id'],
+        'search_query': listing['search_query'],
+        'min_price': listing['min_price'],
+        'max_price': listing['max_price'],
+        'sort_by': listing['sort_by'],
     }
-    return render(request, 'store/product_list.html', context)
+
+def ranked_page(products, per_page, count, number):
+    """A numbered page of search results, best matches first, out of ``count``"""
+    paginator = Paginator(products.order_by('search_rank', 'id'), per_page)
+    paginator.count = count
+    return paginator.get_page(number)
+
+def product_list(request):
+    """Product listing page with search and filtering"""
+    # Answer revalidations before any listing query or rendering
+    etag, last_modified = conditional.listing_validators(
+        request, guest_cart.request_summary(request),
+        product_cache.get_catalog_version(), product_cache.get_catalog_modified()
+    )
+    not_modified = conditional.not_modified(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+    
+    listing = product_listing(request.GET)
+    products = listing['products']
+    per_page = getattr(settings, 'PRODUCTS_PER_PAGE', 24)
+    
+    # Unsearched pages come from this worker's in-memory snapshot when enabled
+    snapshot = None if listing['search_query'] else catalog_snapshot.get_snapshot()
+    if snapshot is not None:
+        sidebar = snapshot.facets(listing['category_id'], listing['min_price'], listing['max_price'])
+        field, descending = PRODUCT_SORTS.get(listing['sort_by'], ('id', False))
+        page, total_count = snapshot.page(listing, field, descending, per_page, request.GET.get('cursor'))
+        context = product_list_context(listing, sidebar, page, total_count)
+        return conditional.set_validators(render(request, 'store/product_list.html', context), etag, last_modified)
+    
+    # Sidebar counts, each facet ignoring its own filter
+    sidebar = facets.get_facets(
+        listing['category_id'], listing['min_price'], listing['max_price'],
+        searched=listing['searched']
+    )
+    
+    # The sidebar counted the matching products already
+    total_count = sidebar['matching']
+    
+    # Pagination: relevance-ranked search results page by number (the match
+    # set is small), every other ordering seeks by cursor so deep pages
+    # don't pay OFFSET costs
+    if listing['ranked']:
+        page = ranked_page(products, per_page, total_count, request.GET.get('page'))
+    else:
+        field, descending = PRODUCT_SORTS.get(listing['sort_by'], ('id', False))
+        paginator = KeysetPaginator(products, field, descending, per_page)
+        page = paginator.get_page(request.GET.get('cursor'))
+    
+    context = product_list_context(listing, sidebar, page, total_count)
+    return conditional.set_validators(render(request, 'store/product_list.html', context), etag, last_modified)
 
 def product_detail(request, product_id):
     """Product detail page view"""
-    product = get_object_or_404(Product, id=product_id)
-    related_products = Product.objects.filter(
-        category=product.category
-    ).exclude(id=product_id)[:4]
+    product = product_cache.get_product_or_404(product_id)
+    etag, last_modified = conditional.product_validators(
+        request, guest_cart.request_summary(request), product_cache.get_catalog_version(), product
+    )
+    not_modified = conditional.not_modified(request, etag, last_modified)
+    if not_modified:
+        return not_modified
     
-    # Get cart count
-    cart_count = 0
-    if request.user.is_authenticated:
-        cart_count = Cart.objects.filter(user=request.user).count()
+    # Frequently bought together, mined offline (see mine_related_products)
+    related_products = related.related_products(product)
     
     context = {
         'product': product,
         'related_products': related_products,
-        'cart_count': cart_count,
     }
-    return render(request, 'store/product_detail.html', context)
-
-@login_required
-def add_to_cart(request, product_id):
-    """Add product to cart"""
-    if request.method == 'POST':
-        product = get_object_or_404(Product, id=product_id)
-        quantity = int(request.POST.get('quantity', 1))
-        
-        # Check if product is in stock
-        if product.stock < quantity:
-            messages.error(request, f'Sorry, only {product.stock} items available in stock.')
-            return redirect('product_detail', product_id=product_id)
-        
-        # Check if item already in cart
-        cart_item, created = Cart.objects.get_or_create(
-            user=request.user,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-        
-        if not created:
-            # Update quantity if item already in cart
-            if cart_item.quantity + quantity > product.stock:
-                messages.error(request, f'Cannot add more. Only {product.stock - cart_item.quantity} more available.')
-                return redirect('product_detail', product_id=product_id)
-            
-            cart_item.quantity += quantity
-            cart_item.save()
-            messages.success(request, f'Updated quantity of {product.name} in cart!')
-        else:
-            messages.success(request, f'Added {product.name} to cart!')
-        
-        return redirect('cart')
-    
-    # If not POST request, redirect to product detail
-    return redirect('product_detail', product_id=product_id)
+    return conditional.set_validators(render(request, 'store/product_detail.html', context), etag, last_modified)
 
-@login_required
 def cart(request):
     """View shopping cart"""
-    cart_items = Cart.objects.filter(user=request.user)
+    if request.user.is_authenticated:
+        cart_items = Cart.objects.filter(user=request.user).select_related('product')
+    else:
+        cart_items = guest_cart.cart_items(request)
     
-    # Calculate totals
+    # Calculate totals (free shipping over $50, 10% tax)
     subtotal = sum(item.product.price * item.quantity for item in cart_items)
-    shipping = 0 if subtotal >= 50 else 5.00  # Free shipping over $50
-    tax = subtotal * 0.10  # 10% tax
-    total = subtotal + shipping + tax
-    
-    # Get cart count
-    cart_count = cart_items.count()
+    shipping, tax, total = order_totals(subtotal)
     
     context = {
         'cart_items': cart_items,
@@ -155,43 +175,13 @@ def cart(request):
         'shipping': shipping,
         'tax': tax,
         'total': total,
-        'cart_count': cart_count,
     }
     return render(request, 'store/cart.html', context)
 
-@login_required
-def update_cart_item(request, item_id):
-    """Update cart item quantity"""
-    if request.method == 'POST':
-        cart_item = get_object_or_404(Cart, id=item_id, user=request.user)
-        quantity = int(request.POST.get('quantity', 1))
-        
-        if quantity < 1:
-            cart_item.delete()
-            messages.success(request, 'Item removed from cart.')
-        elif quantity > cart_item.product.stock:
-            messages.error(request, f'Only {cart_item.product.stock} available in stock.')
-        else:
-            cart_item.quantity = quantity
-            cart_item.save()
-            messages.success(request, 'Cart updated.')
-        
-        return redirect('cart')
-    
-    return redirect('cart')
-
-@login_required
-def remove_cart_item(request, item_id):
-    """Remove item from cart"""
-    cart_item = get_object_or_404(Cart, id=item_id, user=request.user)
-    cart_item.delete()
-    messages.success(request, 'Item removed from cart.')
-    return redirect('cart')
-
 @login_required
 def checkout(request):
     """Checkout page"""
-    cart_items = Cart.objects.filter(user=request.user)
+    cart_items = Cart.objects.filter(user=request.user).select_related('product')
     
     if not cart_items:
         messages.warning(request, 'Your cart is empty!')
@@ -199,9 +189,7 @@ def checkout(request):
     
     # Calculate totals
     subtotal = sum(item.product.price * item.quantity for item in cart_items)
-    shipping = 0 if subtotal >= 50 else 5.00
-    tax = subtotal * 0.10
-    total = subtotal + shipping + tax
+    shipping, tax, total = order_totals(subtotal)
     
     if request.method == 'POST':
         # Get form data
@@ -219,29 +207,19 @@ def checkout(request):
         # Build full shipping address
         full_address = f"{first_name} {last_name}\n{shipping_address}\n{city}, {state} {zip_code}\n{country}"
         
-        # Create order
-        order = Order.objects.create(
-            user=request.user,
-            total_amount=total,
-            shipping_address=full_address,
-            status='pending'
-        )
-        
-        # Create order items
-        for cart_item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                quantity=cart_item.quantity,
-                price=cart_item.product.price
+        # Create order, take stock and clear the cart in one transaction
+        try:
+            order = place_order(
+                request.user,
+                [(item.product, item.quantity) for item in cart_items],
+                total,
+                full_address,
+                cart_items=Cart.objects.filter(id__in=[item.id for item in cart_items]),
             )
-            
-            # Update product stock
-            cart_item.product.stock -= cart_item.quantity
-            cart_item.product.save()
-        
-        # Clear cart
-        cart_items.delete()
+        except OutOfStockError as e:
+            messages.error(request, f'Sorry, only {e.available} of {e.product.name} left in stock.')
+            return redirect('cart')
+        invalidate_cart_summary(request.user)
         
         messages.success(request, 'Order placed successfully!')
         return redirect('order_confirmation', order_id=order.id)
@@ -261,46 +239,46 @@ def checkout(request):
         'tax': tax,
         'total': total,
         'initial_data': initial_data,
-        'cart_count': cart_items.count(),
     }
     return render(request, 'store/checkout.html', context)
 
 @login_required
 def order_confirmation(request, order_id):
     """Order confirmation page"""
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    order = get_object_or_404(Order.objects.prefetch_related('items__product'), id=order_id, user=request.user)
     
     # Calculate totals
-    shipping = 0 if order.total_amount >= 50 else 5.00
-    tax = order.total_amount * 0.10
-    total = order.total_amount + shipping + tax
-    
-    # Get cart count
-    cart_count = Cart.objects.filter(user=request.user).count()
+    shipping, tax, total = order_totals(order.total_amount)
     
     context = {
         'order': order,
         'shipping': shipping,
         'tax': tax,
         'total': total,
-        'cart_count': cart_count,
     }
     return render(request, 'store/order_confirmation.html', context)
 
 @login_required
 def order_history(request):
-    """Order history page"""
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
-    
-    # Get cart count
-    cart_count = Cart.objects.filter(user=request.user).count()
+    """Order history page, newest first, drawn from each order's stored item summary"""
+    orders = Order.objects.filter(user=request.user)
+    per_page = getattr(settings, 'ORDERS_PER_PAGE', 10)
+    # Seeks along order_user_created_idx, so deep pages stay cheap
+    page = KeysetPaginator(orders, 'created_at', True, per_page).get_page(request.GET.get('cursor'))
     
     context = {
-        'orders': orders,
-        'cart_count': cart_count,
+        'orders': page,
+        'page': page,
     }
     return render(request, 'store/order_history.html', context)
 
+def too_many_attempts(request, template_name, retry_after):
+    """429 page for a throttled login or registration"""
+    messages.error(request, f'Too many attempts. Please try again in {retry_after} seconds.')
+    response = render(request, template_name, {}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
 def login_view(request):
     """User login view"""
     if request.user.is_authenticated:
@@ -311,11 +289,22 @@ def login_view(request):
         password = request.POST.get('password', '').strip()
         remember = request.POST.get('remember')
         
+        # Turn floods away before paying for a password hash; the username
+        # bucket is only drawn on once the address is within its limit
+        retry_after = (
+            throttle.take_token('login-ip', throttle.client_ip(request))
+            or throttle.take_token('login-user', username)
+        )
+        if retry_after:
+            return too_many_attempts(request, 'store/login.html', retry_after)
+        
         # Try to authenticate
         user = authenticate(request, username=username, password=password)
         
         if user is not None:
             login(request, user)
+            # Earlier typos shouldn't count against the account's next login
+            throttle.reset('login-user', username)
             
             # Set session expiry
             if not remember:
@@ -347,6 +336,11 @@ def register_view(request):
         phone = request.POST.get('phone', '').strip()
         terms = request.POST.get('terms')
         
+        # Checked before the lookups and the password hash below
+        retry_after = throttle.take_token('register-ip', throttle.client_ip(request))
+        if retry_after:
+            return too_many_attempts(request, 'store/register.html', retry_after)
+        
         # Validation
         errors = []
         
@@ -401,14 +395,7 @@ def logout_view(request):
 
 def about(request):
     """About us page"""
-    # Get cart count for authenticated users
-    cart_count = 0
-    if request.user.is_authenticated:
-        cart_count = Cart.objects.filter(user=request.user).count()
-    
-    context = {
-        'cart_count': cart_count,
-    }
+    context = {}
     return render(request, 'store/about.html', context)
 
 def contact(request):
@@ -435,64 +422,22 @@ def contact(request):
             messages.success(request, 'Thank you for your message! We will get back to you soon.')
             return redirect('contact')
     
-    # Get cart count for authenticated users
-    cart_count = 0
-    if request.user.is_authenticated:
-        cart_count = Cart.objects.filter(user=request.user).count()
-    
-    context = {
-        'cart_count': cart_count,
-    }
+    context = {}
     return render(request, 'store/contact.html', context)
 
 @login_required
 def wishlist(request):
     """Wishlist page (placeholder)"""
     # Note: You need to create a Wishlist model for this to work
-    cart_count = Cart.objects.filter(user=request.user).count()
     
-    context = {
-        'cart_count': cart_count,
-    }
+    context = {}
     return render(request, 'store/wishlist.html', context)
 
 # Additional utility functions
 
 def get_cart_count(request):
     """Get cart count for any view"""
-    if request.user.is_authenticated:
-        return Cart.objects.filter(user=request.user).count()
-    return 0
-
-def clear_cart(request):
-    """Clear entire cart"""
-    if request.user.is_authenticated:
-        Cart.objects.filter(user=request.user).delete()
-        messages.success(request, 'Cart cleared successfully!')
-    return redirect('cart')
-
-@login_required
-def cancel_order(request, order_id):
-    """Cancel an order"""
-    if request.method == 'POST':
-        order = get_object_or_404(Order, id=order_id, user=request.user)
-        
-        if order.status == 'pending':
-            # Update order status
-            order.status = 'cancelled'
-            order.save()
-            
-            # Restore product stock
-            for item in order.items.all():
-                product = item.product
-                product.stock += item.quantity
-                product.save()
-            
-            messages.success(request, 'Order cancelled successfully.')
-        else:
-            messages.error(request, 'Cannot cancel order. Order is already being processed.')
-    
-    return redirect('order_history')
+    return guest_cart.request_summary(request)['count']
 
 @login_required
 def track_order(request, order_id):
@@ -515,7 +460,6 @@ def track_order(request, order_id):
     context = {
         'order': order,
         'tracking_info': tracking_info,
-        'cart_count': get_cart_count(request),
     }
     return render(request, 'store/track_order.html', context)
 
@@ -528,41 +472,44 @@ def buy_now(request, product_id):
         product = get_object_or_404(Product, id=product_id)
         quantity = int(request.POST.get('quantity', 1))
         
-        # Check stock
-        if product.stock < quantity:
-            messages.error(request, f'Sorry, only {product.stock} items available in stock.')
+        # Check stock not held by other shoppers or the user's cart
+        available = reservations.available_quantity(product, request.user, kind='buy_now')
+        if available < quantity:
+            messages.error(request, f'Sorry, only {available} items available in stock.')
             return redirect('product_detail', product_id=product_id)
         
-        # Calculate total
-        total = product.price * quantity
-        shipping = 0 if total >= 50 else 5.00
-        tax = total * 0.10
-        grand_total = total + shipping + tax
-        
-        # Store in session for checkout
-        request.session['buy_now_product'] = {
-            'product_id': product.id,
-            'quantity': quantity,
-            'total': float(total),
-            'shipping': shipping,
-            'tax': float(tax),
-            'grand_total': float(grand_total)
-        }
+        # Hold the stock while the user checks out
+        reservations.hold(request.user, product, quantity, kind='buy_now')
+        express_draft.save_draft(request.user, product, quantity)
         
         # Redirect to express checkout
         return redirect('express_checkout')
     
     return redirect('product_detail', product_id=product_id)
 
+def express_checkout_context(product, quantity):
+    total = product.price * quantity
+    shipping, tax, grand_total = order_totals(total)
+    return {
+        'product': product,
+        'quantity': quantity,
+        'total': total,
+        'shipping': shipping,
+        'tax': tax,
+        'grand_total': grand_total,
+    }
+
 @login_required
 def express_checkout(request):
     """Express checkout for Buy Now"""
-    if 'buy_now_product' not in request.session:
+    draft = express_draft.get_draft(request.user)
+    if draft is None:
         messages.error(request, 'No product selected for express checkout.')
         return redirect('product_list')
     
-    buy_now_data = request.session['buy_now_product']
-    product = get_object_or_404(Product, id=buy_now_data['product_id'])
+    product_id, quantity = draft
+    product = get_object_or_404(Product, id=product_id)
+    context = express_checkout_context(product, quantity)
     
     if request.method == 'POST':
         # Get shipping info
@@ -570,62 +517,56 @@ def express_checkout(request):
         
         if not shipping_address:
             messages.error(request, 'Please provide shipping address.')
-            return render(request, 'store/express_checkout.html', {
-                'product': product,
-                'quantity': buy_now_data['quantity'],
-                'total': buy_now_data['total'],
-                'shipping': buy_now_data['shipping'],
-                'tax': buy_now_data['tax'],
-                'grand_total': buy_now_data['grand_total']
-            })
-        
-        # Create order
-        order = Order.objects.create(
-            user=request.user,
-            total_amount=buy_now_data['grand_total'],
-            shipping_address=shipping_address,
-            status='pending'
-        )
-        
-        # Create order item
-        OrderItem.objects.create(
-            order=order,
-            product=product,
-            quantity=buy_now_data['quantity'],
-            price=product.price
-        )
-        
-        # Update product stock
-        product.stock -= buy_now_data['quantity']
-        product.save()
+            return render(request, 'store/express_checkout.html', context)
+        
+        # Create order and take stock in one transaction
+        try:
+            order = place_order(
+                request.user,
+                [(product, quantity)],
+                context['grand_total'],
+                shipping_address,
+                hold_kind='buy_now',
+            )
+        except OutOfStockError as e:
+            express_draft.clear_draft(request.user)
+            reservations.release(request.user, [product.id], kind='buy_now')
+            messages.error(request, f'Sorry, only {e.available} items available in stock.')
+            return redirect('product_detail', product_id=product.id)
         
-        # Clear session
-        del request.session['buy_now_product']
+        # Clear the Buy Now draft
+        express_draft.clear_draft(request.user)
         
         messages.success(request, 'Order placed successfully!')
         return redirect('order_confirmation', order_id=order.id)
     
-    return render(request, 'store/express_checkout.html', {
-        'product': product,
-        'quantity': buy_now_data['quantity'],
-        'total': buy_now_data['total'],
-        'shipping': buy_now_data['shipping'],
-        'tax': buy_now_data['tax'],
-        'grand_total': buy_now_data['grand_total']
-    })
+    return render(request, 'store/express_checkout.html', context)
 
-@login_required
 def add_to_cart(request, product_id):
     """Add product to cart"""
     if request.method == 'POST':
         product = get_object_or_404(Product, id=product_id)
         quantity = int(request.POST.get('quantity', 1))
         
-        # Check stock
-        if product.stock < quantity:
-            messages.error(request, f'Sorry, only {product.stock} items available in stock.')
+        # Check stock not held by other shoppers or the user's Buy Now
+        available = reservations.available_quantity(product, request.user, kind='cart')
+        if available < quantity:
+            messages.error(request, f'Sorry, only {available} items available in stock.')
             return redirect('product_detail', product_id=product_id)
         
+        # Guests' carts stay in a cookie until they log in
+        if not request.user.is_authenticated:
+            in_cart = guest_cart.get_lines(request).get(product.id, 0)
+            if in_cart + quantity > available:
+                messages.error(request, f'Cannot add more. Only {available - in_cart} more available.')
+                return redirect('product_detail', product_id=product_id)
+            guest_cart.set_quantity(request, product.id, in_cart + quantity)
+            if in_cart:
+                messages.success(request, f'Updated quantity of {product.name} in cart!')
+            else:
+                messages.success(request, f'Added {product.name} to cart!')
+            return redirect('cart')
+        
         # Check if item already in cart
         cart_item, created = Cart.objects.get_or_create(
             user=request.user,
@@ -635,8 +576,8 @@ def add_to_cart(request, product_id):
         
         if not created:
             # Update quantity if already in cart
-            if cart_item.quantity + quantity > product.stock:
-                messages.error(request, f'Cannot add more. Only {product.stock - cart_item.quantity} more available.')
+            if cart_item.quantity + quantity > available:
+                messages.error(request, f'Cannot add more. Only {available - cart_item.quantity} more available.')
                 return redirect('product_detail', product_id=product_id)
             
             cart_item.quantity += quantity
@@ -645,45 +586,136 @@ def add_to_cart(request, product_id):
         else:
             messages.success(request, f'Added {product.name} to cart!')
         
+        reservations.hold(request.user, product, cart_item.quantity)
+        invalidate_cart_summary(request.user)
         return redirect('cart')
     
     return redirect('product_detail', product_id=product_id)
 
-@login_required
+def set_cart_item_quantity(request, item_id, quantity):
+    """
+    Set one of the shopper's cart lines to quantity, removing it below 1.
+    
+    Returns (line, error): line is the Cart row (or guest line, keyed by
+    product id) as it now stands, None once removed; error says why the
+    quantity was left alone. Lines that aren't the shopper's are a 404.
+    """
+    if not request.user.is_authenticated:
+        if item_id not in guest_cart.get_lines(request):
+            raise Http404('No such cart item')
+        product = product_cache.get_product(item_id)
+        if quantity < 1 or product is None:
+            guest_cart.set_quantity(request, item_id, 0)
+            return None, None
+        available = reservations.available_quantity(product)
+        if quantity > available:
+            current = guest_cart.get_lines(request)[item_id]
+            return guest_cart.GuestLine(product, current), f'Only {available} available in stock.'
+        guest_cart.set_quantity(request, item_id, quantity)
+        return guest_cart.GuestLine(product, quantity), None
+    
+    cart_item = get_object_or_404(Cart.objects.select_related('product'), id=item_id, user=request.user)
+    error = None
+    if quantity < 1:
+        cart_item.delete()
+        reservations.release(request.user, [cart_item.product_id], kind='cart')
+        cart_item = None
+    else:
+        available = reservations.available_quantity(cart_item.product, request.user, kind='cart')
+        if quantity > available:
+            error = f'Only {available} available in stock.'
+        else:
+            cart_item.quantity = quantity
+            cart_item.save()
+            reservations.hold(request.user, cart_item.product, quantity)
+    invalidate_cart_summary(request.user)
+    return cart_item, error
+
+def empty_cart(request):
+    """Drop every line of the shopper's cart"""
+    if not request.user.is_authenticated:
+        guest_cart.clear(request)
+        return
+    Cart.objects.filter(user=request.user).delete()
+    reservations.release(request.user, kind='cart')
+    invalidate_cart_summary(request.user)
+
 def update_cart_item(request, item_id):
     """Update cart item quantity"""
-    cart_item = get_object_or_404(Cart, id=item_id, user=request.user)
-    
     if request.method == 'POST':
-        quantity = int(request.POST.get('quantity', 1))
-        
-        if quantity < 1:
-            cart_item.delete()
+        line, error = set_cart_item_quantity(request, item_id, int(request.POST.get('quantity', 1)))
+        if error:
+            messages.error(request, error)
+        elif line is None:
             messages.success(request, 'Item removed from cart.')
-        elif quantity > cart_item.product.stock:
-            messages.error(request, f'Only {cart_item.product.stock} available in stock.')
         else:
-            cart_item.quantity = quantity
-            cart_item.save()
             messages.success(request, 'Cart updated.')
     
     return redirect('cart')
 
-@login_required
 def remove_cart_item(request, item_id):
     """Remove item from cart"""
-    cart_item = get_object_or_404(Cart, id=item_id, user=request.user)
-    cart_item.delete()
+    set_cart_item_quantity(request, item_id, 0)
     messages.success(request, 'Item removed from cart.')
     return redirect('cart')
 
-@login_required
 def clear_cart(request):
     """Clear entire cart"""
-    Cart.objects.filter(user=request.user).delete()
+    empty_cart(request)
     messages.success(request, 'Cart cleared successfully!')
     return redirect('cart')
 
+# JSON twins of the cart actions for cart.js: each answers with the changed
+# line and the recomputed totals instead of redirecting to the cart page
+
+def cart_totals_data(request):
+    summary = guest_cart.request_summary(request)
+    shipping, tax, total = order_totals(summary['subtotal'])
+    # Database sums of decimals can come back with extra places
+    return {
+        'count': summary['count'],
+        'subtotal': f"{summary['subtotal']:.2f}",
+        'shipping': f'{shipping:.2f}',
+        'tax': f'{tax:.2f}',
+        'total': f'{total:.2f}',
+    }
+
+def cart_line_data(line):
+    if line is None:
+        return None
+    return {
+        'id': line.id,
+        'product_id': line.product_id,
+        'quantity': line.quantity,
+        'line_total': f'{line.total_price():.2f}',
+    }
+
+@require_POST
+def update_cart_item_api(request, item_id):
+    """Set a line's quantity (0 removes it); 409 with the unchanged line when stock is short"""
+    try:
+        quantity = int(request.POST.get('quantity', 1))
+    except ValueError:
+        return JsonResponse({'error': 'quantity must be an integer'}, status=400)
+    line, error = set_cart_item_quantity(request, item_id, quantity)
+    data = {'item': cart_line_data(line), 'cart': cart_totals_data(request)}
+    if error:
+        data['error'] = error
+        return JsonResponse(data, status=409)
+    return JsonResponse(data)
+
+@require_POST
+def remove_cart_item_api(request, item_id):
+    """Remove a line; item is always null"""
+    set_cart_item_quantity(request, item_id, 0)
+    return JsonResponse({'item': None, 'cart': cart_totals_data(request)})
+
+@require_POST
+def clear_cart_api(request):
+    """Empty the cart"""
+    empty_cart(request)
+    return JsonResponse({'cart': cart_totals_data(request)})
+
 @login_required
 def cancel_order(request, order_id):
     """Cancel an order"""
@@ -694,7 +726,7 @@ def cancel_order(request, order_id):
         order.save()
         
         # Restore product stock
-        for item in order.items.all():
+        for item in order.items.select_related('product'):
             product = item.product
             product.stock += item.quantity
             product.save()
@@ -705,11 +737,9 @@ def cancel_order(request, order_id):
     
     return redirect('order_history')
 
-def product_quick_view_api(request, product_id):
-    """API endpoint for quick view modal"""
-    product = get_object_or_404(Product, id=product_id)
-    
-    data = {
+def quick_view_data(product):
+    """Payload shown in the quick view modal"""
+    return {
         'id': product.id,
         'name': product.name,
         'description': product.description,
@@ -718,12 +748,67 @@ def product_quick_view_api(request, product_id):
         'category': product.category.name,
         'stock': product.stock,
     }
-    
+
+def product_quick_view_api(request, product_id):
+    """API endpoint for quick view modal"""
+    product = product_cache.get_product_or_404(product_id)
+    etag, last_modified = conditional.quick_view_validators(product_cache.get_catalog_version(), product)
+    not_modified = conditional.not_modified(request, etag, last_modified, private=False)
+    if not_modified:
+        return not_modified
+    return conditional.set_validators(JsonResponse(quick_view_data(product)), etag, last_modified, private=False)
+
+# Most products a single batch quick view request may ask for
+QUICK_VIEW_BATCH_LIMIT = 100
+
+def product_quick_view_batch_api(request):
+    """Quick view payloads for many products in one call (?ids=1,2,3)"""
+    try:
+        product_ids = list(dict.fromkeys(
+            int(value) for value in request.GET.get('ids', '').split(',') if value.strip()
+        ))
+    except ValueError:
+        return JsonResponse({'error': 'ids must be a comma-separated list of integers'}, status=400)
+    
+    if not product_ids:
+        return JsonResponse({'error': 'No product ids given'}, status=400)
+    if len(product_ids) > QUICK_VIEW_BATCH_LIMIT:
+        return JsonResponse({'error': f'At most {QUICK_VIEW_BATCH_LIMIT} ids per request'}, status=400)
+    
+    products = product_cache.get_products(product_ids)
+    data = {
+        'products': [quick_view_data(products[pid]) for pid in product_ids if pid in products],
+        'missing': [pid for pid in product_ids if pid not in products],
+    }
     return JsonResponse(data)
 
-# Add this function if missing
-def get_cart_count(request):
-    """Get cart count for any view"""
-    if request.user.is_authenticated:
-        return Cart.objects.filter(user=request.user).count()
-    return 0
\ No newline at end of file
+def product_catalog_api(request):
+    """Bulk catalog export, streamed as NDJSON (default) or JSON"""
+    try:
+        fields = catalog_api.parse_fields(request.GET.get('fields'))
+        after_id = catalog_api.decode_cursor(request.GET.get('cursor'))
+        limit = request.GET.get('limit')
+        limit = int(limit) if limit else None
+        if limit is not None and limit < 1:
+            raise ValueError('limit must be a positive integer')
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    items = catalog_api.iter_products(fields, after_id, limit)
+    if request.GET.get('format') == 'json':
+        return StreamingHttpResponse(catalog_api.stream_json(items), content_type='application/json')
+    return StreamingHttpResponse(catalog_api.stream_ndjson(items), content_type='application/x-ndjson')
+
+def static_file(request, path):
+    """Serve collected static files, marking content-hashed names immutable"""
+    response = serve(request, path, document_root=settings.STATIC_ROOT)
+    if is_hashed(path):
+        response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
+
+def prometheus_metrics(request):
+    """Request metrics of every worker process, in the Prometheus text format"""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(metrics.get_store().render(), content_type=metrics.CONTENT_TYPE)
\ No newline at end of file